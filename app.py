@@ -1,15 +1,21 @@
 import os
 import json
+import time
 import logging
+import functools
 from datetime import datetime
-from flask import Flask, request, jsonify, render_template, redirect, url_for, flash
+from flask import Flask, Response, request, jsonify, render_template, redirect, url_for, flash
 from flask_cors import CORS
-import hashlib
-import hmac
 
 from config_manager import ConfigManager
 from discord_webhook import DiscordWebhook
 from trading_engine import TradingEngine
+from signal_queue import SignalQueue, SignalWorkerPool
+from engine_server import connect_engine
+from metrics import (REGISTRY, WEBHOOK_LATENCY, WEBHOOK_REQUESTS, QUEUE_DEPTH, WorkerSnapshotWriter,
+                     read_worker_snapshots, render_snapshots)
+from idempotency import SignalDeduplicator, signal_key, IN_PROGRESS
+from signal_decoder import SignalDecodeError, decode_payload, decode_signal, decode_batch
 
 # 로깅 설정
 logging.basicConfig(
@@ -29,7 +35,61 @@ CORS(app)
 # 컴포넌트 초기화
 config_manager = ConfigManager()
 discord_webhook = DiscordWebhook(config_manager)
-trading_engine = TradingEngine(config_manager, discord_webhook)
+
+# 프로덕션(멀티 워커) 모드: 엔진 프로세스의 TradingEngine을 공유
+engine_socket = config_manager.get_engine_socket()
+if engine_socket:
+    engine_manager = connect_engine(engine_socket)
+    trading_engine = engine_manager.get_engine()
+    signal_deduplicator = engine_manager.get_deduplicator()
+    engine_metrics = engine_manager.get_metrics()
+else:
+    trading_engine = TradingEngine(config_manager, discord_webhook)
+    
+    # 중복 시그널 캐시 (트레이딩뷰 재전송 방지)
+    signal_deduplicator = SignalDeduplicator(
+        ttl_seconds=config_manager.get_idempotency_ttl(),
+        max_entries=config_manager.get_idempotency_max_entries(),
+        store_path=config_manager.get_idempotency_store_path()
+    )
+
+# 멀티 워커 모드: 웹훅 메트릭은 워커마다 공유 디렉터리에 기록하고 /metrics에서 합침
+metrics_dir = config_manager.get_metrics_dir()
+worker_metrics = WorkerSnapshotWriter(REGISTRY, metrics_dir) if metrics_dir else None
+
+# 큐 모드: 웹훅은 시그널을 저장만 하고 워커 풀이 처리합니다
+signal_queue = None
+signal_workers = None
+if config_manager.get_webhook_ingress_mode() == 'queue':
+    signal_queue = SignalQueue(config_manager.get_signal_queue_path())
+    QUEUE_DEPTH.set_function(signal_queue.depth)
+
+if signal_queue is not None and not engine_socket:
+    # 엔진 프로세스를 쓰는 경우 큐 워커는 엔진 프로세스에서 실행됩니다
+    signal_workers = SignalWorkerPool(
+        signal_queue,
+        lambda payload: (trading_engine.process_tradingview_batch(payload['signals'])
+                         if 'signals' in payload else trading_engine.process_tradingview_signal(payload)),
+        config_manager.get_signal_worker_count(),
+        config_manager.get_signal_park_attempts()
+    )
+    signal_workers.start()
+
+def track_webhook(endpoint):
+    """웹훅 처리 시간과 응답 코드를 메트릭으로 기록하는 데코레이터"""
+    latency = WEBHOOK_LATENCY.labels(endpoint)
+    
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            response = func(*args, **kwargs)
+            latency.observe(time.perf_counter() - started)
+            status = response[1] if isinstance(response, tuple) else response.status_code
+            WEBHOOK_REQUESTS.labels(endpoint, str(status)).inc()
+            return response
+        return wrapper
+    return decorator
 
 @app.route('/')
 def index():
@@ -178,6 +238,9 @@ def update_discord_webhook():
         success = config_manager.update_discord_webhook_url(url)
         
         if success:
+            # 알림을 보내는 엔진(프로덕션 모드에서는 별도 프로세스)에도 반영
+            trading_engine.reload_config()
+            
             # 새 웹훅으로 테스트 메시지 전송
             discord_webhook.webhook_url = url
             discord_webhook.send_message(
@@ -213,45 +276,170 @@ def update_webhook_secret():
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/webhook/tradingview', methods=['POST'])
+@track_webhook('tradingview')
 def tradingview_webhook():
     """트레이딩뷰 웹훅 수신"""
     try:
-        # 헤더에서 시그니처 확인 (보안)
-        webhook_secret = config_manager.get_webhook_secret()
-        if webhook_secret:
-            signature = request.headers.get('X-Webhook-Signature', '')
-            if not verify_webhook_signature(request.data, signature, webhook_secret):
-                logging.warning("Invalid webhook signature")
-                return jsonify({'error': 'Invalid signature'}), 401
-        
-        # JSON 데이터 파싱
-        data = request.json
-        if not data:
-            return jsonify({'error': 'No JSON data'}), 400
-        
-        logging.info(f"Received TradingView webhook: {json.dumps(data, indent=2)}")
+        # 시그니처 확인(보안), JSON 파싱, 필드 검증을 한 번에 처리
+        data = decode_payload(
+            request.get_data(),
+            request.headers.get('X-Webhook-Signature', ''),
+            config_manager.get_webhook_secret()
+        )
+        signal = decode_signal(data)
         
-        # 트레이딩 시그널 처리
-        result = trading_engine.process_tradingview_signal(data)
+        return process_once(data, lambda: handle_tradingview_signal(signal))
         
-        if result.get('success'):
-            return jsonify({
-                'status': 'success',
-                'message': 'Signal processed successfully',
-                'order_id': result.get('order_id')
-            })
-        else:
-            return jsonify({
-                'status': 'error',
-                'message': result.get('error', 'Unknown error')
-            }), 400
-            
+    except SignalDecodeError as e:
+        logging.warning(f"Rejected TradingView webhook: {e}")
+        return jsonify({'error': str(e)}), e.status_code
     except Exception as e:
         error_msg = f"Webhook processing error: {str(e)}"
         logging.error(error_msg)
         discord_webhook.send_error_alert("Webhook Error", error_msg, str(request.data))
         return jsonify({'error': error_msg}), 500
 
+@app.route('/webhook/tradingview/batch', methods=['POST'])
+@track_webhook('tradingview_batch')
+def tradingview_batch_webhook():
+    """트레이딩뷰 바스켓(다중 시그널) 웹훅 수신"""
+    try:
+        data = decode_payload(
+            request.get_data(),
+            request.headers.get('X-Webhook-Signature', ''),
+            config_manager.get_webhook_secret()
+        )
+        
+        # 배열 또는 {"signals": [...]} 형식 모두 허용
+        signals = decode_batch(data.get('signals') if isinstance(data, dict) else data)
+        
+        return process_once(data, lambda: handle_tradingview_batch(signals))
+        
+    except SignalDecodeError as e:
+        logging.warning(f"Rejected TradingView batch webhook: {e}")
+        return jsonify({'error': str(e), 'errors': e.errors}), e.status_code
+    except Exception as e:
+        error_msg = f"Batch webhook processing error: {str(e)}"
+        logging.error(error_msg)
+        discord_webhook.send_error_alert("Batch Webhook Error", error_msg, str(request.data)[:1000])
+        return jsonify({'error': error_msg}), 500
+
+def process_once(data, handler):
+    """중복 시그널이면 기존 응답을 그대로 반환하고, 처음이면 handler()를 실행합니다."""
+    key = signal_key(data)
+    is_new, previous = signal_deduplicator.begin(key)
+    
+    if not is_new:
+        if previous == IN_PROGRESS:
+            return jsonify({
+                'status': 'in_progress',
+                'message': 'Duplicate signal is still being processed'
+            }), 409
+        
+        logging.info(f"Duplicate signal ignored: {key}")
+        response = jsonify(previous['body'])
+        response.headers['X-Idempotent-Replay'] = 'true'
+        return response, previous['status']
+    
+    try:
+        body, status = handler()
+    except Exception:
+        signal_deduplicator.release(key)
+        raise
+    
+    if status == 503:
+        signal_deduplicator.release(key)
+    else:
+        signal_deduplicator.complete(key, {'body': body, 'status': status})
+    return jsonify(body), status
+
+def handle_tradingview_signal(signal):
+    """단일 시그널을 큐에 넣거나 즉시 처리합니다."""
+    # 큐 모드: 저장 후 즉시 응답 (처리는 워커가 담당)
+    if signal_queue is not None:
+        signal_id = signal_queue.enqueue(signal.payload)
+        return {
+            'status': 'accepted',
+            'message': 'Signal queued',
+            'signal_id': signal_id
+        }, 202
+    
+    logging.info(f"Received TradingView webhook: {signal}")
+    
+    # 트레이딩 시그널 처리
+    result = trading_engine.process_tradingview_signal(signal)
+    
+    if result.get('success'):
+        return {
+            'status': 'success',
+            'message': 'Signal processed successfully',
+            'order_id': result.get('order_id')
+        }, 200
+    elif result.get('retry_after') is not None:
+        # 회로가 열려 주문을 보내지 않음 - 같은 시그널을 다시 보내면 처리되도록 응답을 캐시하지 않음
+        return {
+            'status': 'unavailable',
+            'message': result.get('error'),
+            'retry_after': result['retry_after']
+        }, 503
+    else:
+        return {
+            'status': 'error',
+            'message': result.get('error', 'Unknown error')
+        }, 400
+
+def handle_tradingview_batch(signals):
+    """바스켓 시그널을 큐에 넣거나 즉시 처리합니다."""
+    if signal_queue is not None:
+        signal_id = signal_queue.enqueue({'signals': [signal.payload for signal in signals]})
+        return {
+            'status': 'accepted',
+            'message': f'Batch of {len(signals)} signals queued',
+            'signal_id': signal_id
+        }, 202
+    
+    logging.info(f"Received TradingView batch webhook with {len(signals)} signals")
+    result = trading_engine.process_tradingview_batch(signals)
+    
+    if 'results' not in result:
+        return {
+            'status': 'error',
+            'message': result.get('error', 'Unknown error'),
+            'errors': result.get('errors', [])
+        }, 400
+    
+    return {
+        'status': 'success' if result['success'] else 'partial',
+        'succeeded': result['succeeded'],
+        'failed': result['failed'],
+        'elapsed_ms': result['elapsed_ms'],
+        'results': result['results']
+    }, 200 if result['success'] else 207
+
+@app.route('/api/queue/<int:signal_id>')
+def get_queued_signal(signal_id):
+    """큐에 저장된 시그널 처리 상태 조회"""
+    if signal_queue is None:
+        return jsonify({'error': 'Signal queue is not enabled'}), 404
+    
+    item = signal_queue.get(signal_id)
+    if item is None:
+        return jsonify({'error': 'Signal not found'}), 404
+    return jsonify(item)
+
+@app.route('/api/execution/<parent_id>')
+def get_execution(parent_id):
+    """TWAP/아이스버그 분할 집행 상태 조회"""
+    execution = trading_engine.get_execution(parent_id)
+    if execution is None:
+        return jsonify({'error': 'Execution not found'}), 404
+    return jsonify(execution)
+
+@app.route('/api/orders/open')
+def get_open_orders():
+    """추적 중인 미체결 지정가 주문 조회"""
+    return jsonify(trading_engine.get_open_orders())
+
 @app.route('/webhook/discord', methods=['POST'])
 def discord_command_webhook():
     """디스코드 명령어 웹훅 (선택적)"""
@@ -288,11 +476,26 @@ def get_status():
         logging.error(f"Status error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus 메트릭 조회"""
+    try:
+        # 프로덕션 모드에서는 엔진 프로세스와 모든 워커의 메트릭을 합쳐서 노출
+        snapshots = [engine_metrics.snapshot()] if engine_socket else []
+        if worker_metrics is not None:
+            worker_metrics.flush()
+            return Response(render_snapshots(read_worker_snapshots(metrics_dir) + snapshots),
+                            mimetype='text/plain; version=0.0.4')
+        return Response(REGISTRY.render(*snapshots), mimetype='text/plain; version=0.0.4')
+    except Exception as e:
+        logging.error(f"Metrics error: {e}")
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/test-discord')
 def test_discord():
     """디스코드 연결 테스트"""
     try:
-        success = discord_webhook.send_message(
+        success = discord_webhook.send_message_now(
             f"🧪 **디스코드 연결 테스트**\n"
             f"• 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
             f"• 메시지: 연결이 정상적으로 작동합니다!"
@@ -307,23 +510,6 @@ def test_discord():
         logging.error(f"Discord test error: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
-def verify_webhook_signature(payload, signature, secret):
-    """웹훅 시그니처 검증"""
-    if not signature or not secret:
-        return True  # 시크릿이 설정되지 않은 경우 통과
-    
-    try:
-        expected_signature = hmac.new(
-            secret.encode('utf-8'),
-            payload,
-            hashlib.sha256
-        ).hexdigest()
-        
-        return hmac.compare_digest(f"sha256={expected_signature}", signature)
-    except Exception as e:
-        logging.error(f"Signature verification error: {e}")
-        return False
-
 if __name__ == '__main__':
     # 시작 시 디스코드 알림
     discord_webhook.send_message(
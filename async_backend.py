@@ -0,0 +1,417 @@
+"""
+Asyncio exchange backend for the Trading Bot
+ccxt.async_support 클라이언트와 aiohttp 기반 KIS/업비트 전송 계층을 전용 이벤트 루프 스레드 하나에서 실행합니다.
+거래소 왕복 동안 스레드를 붙잡지 않으므로 루프 하나로 수백 건의 주문/잔고/시세 요청을 동시에 진행할 수 있습니다.
+기존 호출자는 ExchangeClients와 같은 동기 메서드(get_balance/create_order/get_ticker ...)를 그대로 쓰고,
+비동기 호출자는 같은 이름의 *_async 코루틴을 루프 안에서 await 합니다. (EXCHANGE_BACKEND=async)
+"""
+
+import json
+import time
+import atexit
+import asyncio
+import inspect
+import threading
+import logging
+from concurrent.futures import Future
+from typing import Any, Awaitable, Dict, Iterable, List, Optional
+
+try:
+    import aiohttp
+    import ccxt.async_support as ccxt_async
+except ImportError:  # 없으면 동기 백엔드만 사용
+    aiohttp = None
+    ccxt_async = None
+
+from circuit_breaker import get_circuit_breaker, raise_for_venue_status
+from config_manager import ConfigManager
+from exchange_clients import ExchangeClients, KISClient, UpbitClient
+from http_transport import _origin
+from kis_token_store import KISTokenStore
+from rate_limiter import PRIORITY_BALANCE
+
+
+class EventLoopThread:
+    """전용 데몬 스레드에서 도는 asyncio 이벤트 루프"""
+
+    def __init__(self, name: str = "exchange-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable) -> Future:
+        """코루틴을 루프에 올리고 결과를 받을 Future를 반환합니다. (아무 스레드에서나 호출 가능)"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """코루틴을 루프에서 실행하고 결과를 기다립니다. 루프 스레드 안에서는 await를 써야 합니다."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Blocking call on the exchange event loop; await the *_async method instead")
+        return self.submit(coro).result(timeout)
+
+
+class AsyncResponse:
+    """본문까지 읽은 aiohttp 응답 (requests.Response처럼 status_code, text, json() 제공)"""
+
+    __slots__ = ("status_code", "text", "headers")
+
+    def __init__(self, status_code: int, text: str, headers: Any = None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers if headers is not None else {}
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+class AsyncHttpTransport:
+    """호스트별 aiohttp 세션(연결 풀)과 요청 통계 - HttpTransport의 비동기 버전"""
+
+    def __init__(self, runner: EventLoopThread, connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 pool_size: int = 32, keepalive_interval: float = 45.0):
+        self.runner = runner
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.pool_size = pool_size
+        self.keepalive_interval = keepalive_interval
+        # 세션/통계는 루프 스레드에서만 바뀌므로 락이 필요 없음
+        self._sessions: Dict[str, "aiohttp.ClientSession"] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._last_used: Dict[str, float] = {}
+        self._keepalive_task: Optional[asyncio.Task] = None
+
+    def session(self, url: str) -> "aiohttp.ClientSession":
+        """URL 호스트의 세션을 반환합니다. (없으면 생성, 루프 안에서만 호출)"""
+        origin = _origin(url)
+        session = self._sessions.get(origin)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=0, limit_per_host=self.pool_size,
+                keepalive_timeout=max(15.0, self.keepalive_interval * 2)
+            )
+            session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._sessions[origin] = session
+            self._stats.setdefault(origin, {"requests": 0, "errors": 0, "total_seconds": 0.0})
+        return session
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> AsyncResponse:
+        """풀의 연결로 요청을 보내고 본문까지 읽어 반환합니다."""
+        origin = _origin(url)
+        session = self.session(url)
+        stats = self._stats[origin]
+        started = time.perf_counter()
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                return AsyncResponse(response.status, await response.text(), response.headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            stats["errors"] += 1
+            raise
+        finally:
+            stats["requests"] += 1
+            stats["total_seconds"] += time.perf_counter() - started
+            self._last_used[origin] = time.monotonic()
+
+    def prewarm(self, urls: Iterable[str]):
+        """호스트별로 연결을 미리 맺어 두고 유휴 연결 유지 작업을 시작합니다. (아무 스레드에서나 호출 가능)"""
+        self.runner.submit(self._prewarm([_origin(url) for url in urls]))
+
+    async def _prewarm(self, origins: List[str]):
+        if self.keepalive_interval and (self._keepalive_task is None or self._keepalive_task.done()):
+            self._keepalive_task = asyncio.ensure_future(self._keepalive())
+        await asyncio.gather(*(self._touch(origin) for origin in set(origins)))
+
+    async def _touch(self, origin: str):
+        try:
+            await self.request("HEAD", f"{origin}/", allow_redirects=False)
+        except Exception as e:
+            logging.warning(f"HTTP prewarm to {origin} failed: {e}")
+
+    async def _keepalive(self):
+        """오래 쓰지 않은 호스트의 연결이 서버 쪽에서 끊기기 전에 연결을 유지합니다."""
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            cutoff = time.monotonic() - self.keepalive_interval
+            for origin in list(self._sessions):
+                if self._last_used.get(origin, 0.0) < cutoff:
+                    asyncio.ensure_future(self._touch(origin))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """호스트별 요청 수, 오류 수, 평균 지연시간, 연결 풀 상태 (HttpTransport.stats와 같은 형식)"""
+        result = {}
+        for origin, session in list(self._sessions.items()):
+            stats = self._stats[origin]
+            connector = session.connector
+            idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+            result[origin] = {
+                "requests": int(stats["requests"]),
+                "errors": int(stats["errors"]),
+                "avg_ms": round(stats["total_seconds"] / stats["requests"] * 1000, 1) if stats["requests"] else None,
+                "connections_opened": idle + len(getattr(connector, "_acquired", ())),
+                "idle_connections": idle,
+                "pool_size": self.pool_size
+            }
+        return result
+
+    async def close(self):
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+        for session in list(self._sessions.values()):
+            await session.close()
+
+
+class AsyncUpbitClient(UpbitClient):
+    """업비트 비동기 클라이언트 (UpbitClient와 같은 메서드가 코루틴을 반환)"""
+
+    def __init__(self, access_key: str, secret_key: str, transport: AsyncHttpTransport):
+        super().__init__(access_key, secret_key)
+        self.transport = transport
+
+    async def _request(self, method: str, endpoint: str, params: Dict = None,
+                       priority: int = PRIORITY_BALANCE, signed: bool = True) -> Dict:
+        """API 요청을 보냅니다. 요청 한도는 루프를 막지 않고 기다립니다."""
+        await self.rate_limiter.acquire_async(self.credential, self._endpoint_group(method, endpoint), priority)
+        url, kwargs = self._prepare(method, endpoint, params, signed)
+        response = await self.transport.request(method.upper(), url, **kwargs)
+        raise_for_venue_status("upbit", response)
+        return response.json()
+
+
+class AsyncKISClient(KISClient):
+    """한국투자증권 비동기 클라이언트 (KISClient와 같은 메서드가 코루틴을 반환)"""
+
+    def __init__(self, app_key: str, app_secret: str, account_number: str, account_code: str,
+                 transport: AsyncHttpTransport, token_store: KISTokenStore = None, name: str = "kis",
+                 call_timeout: Optional[float] = None):
+        # 토큰 발급(분당 1회 수준)은 토큰 저장소 스레드에서 기존 동기 전송 계층으로 처리
+        super().__init__(app_key, app_secret, account_number, account_code, token_store=token_store, name=name)
+        self.async_transport = transport
+        self.call_timeout = call_timeout
+
+    async def _access_token(self) -> Optional[str]:
+        token = self.token_store.peek(self.app_key)
+        if token:
+            return token
+        # 최초 발급은 동기 호출이므로 루프를 막지 않도록 스레드에서 기다림
+        return await asyncio.get_running_loop().run_in_executor(None, self.token_store.get, self.app_key)
+
+    async def _request(self, method: str, endpoint: str, tr_id: str, data: Dict = None,
+                       priority: int = PRIORITY_BALANCE, tr_cont: str = "") -> Dict:
+        """API 요청을 보냅니다. 회로가 열려 있으면 바로 CircuitOpenError, call_timeout을 넘기면 취소합니다."""
+        return await self.breaker.call_async(self._send, method, endpoint, tr_id, data, priority,
+                                             tr_cont=tr_cont, timeout=self.call_timeout)
+
+    async def _send(self, method: str, endpoint: str, tr_id: str, data: Dict = None,
+                    priority: int = PRIORITY_BALANCE, retry: bool = True, tr_cont: str = "") -> Dict:
+        """토큰 만료로 거부되면 토큰을 다시 받아 한 번 재시도합니다."""
+        access_token = await self._access_token()
+        if not access_token:
+            return self._no_token_result()
+        await self.rate_limiter.acquire_async(self.credential, "default", priority)
+        url, kwargs = self._prepare(method, endpoint, tr_id, data, access_token, tr_cont)
+        response = await self.async_transport.request(method.upper(), url, **kwargs)
+        raise_for_venue_status(self.breaker.name, response)
+
+        result = response.json()
+        if retry and result.get("msg_cd") in self.EXPIRED_TOKEN_CODES:
+            self.token_store.invalidate(self.app_key)
+            return await self._send(method, endpoint, tr_id, data, priority, retry=False, tr_cont=tr_cont)
+        result["tr_cont"] = response.headers.get("tr_cont", "")
+        return result
+
+    async def _request_pages(self, method: str, endpoint: str, tr_id: str, data: Dict) -> Dict:
+        """KISClient._request_pages의 비동기 버전"""
+        result = await self._request(method, endpoint, tr_id, data)
+        if result.get("rt_cd") != "0":
+            return result
+        rows = list(result.get("output1") or [])
+        for _ in range(self.MAX_PAGES - 1):
+            data = self._next_page(result, data)
+            if data is None:
+                break
+            result = await self._request(method, endpoint, tr_id, data, tr_cont="N")
+            if result.get("rt_cd") != "0":
+                return result
+            rows.extend(result.get("output1") or [])
+        result["output1"] = rows
+        return result
+
+
+class SyncFacade:
+    """코루틴을 반환하는 클라이언트를 기존 동기 호출자가 그대로 쓰도록 감쌉니다."""
+
+    def __init__(self, client: Any, runner: EventLoopThread):
+        self.client = client  # 비동기 호출자는 이 객체의 메서드를 직접 await
+        self._runner = runner
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self.client, name)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            result = value(*args, **kwargs)
+            return self._runner.run(result) if inspect.isawaitable(result) else result
+        return call
+
+
+class AsyncExchangeClients(ExchangeClients):
+    """
+    ccxt.async_support 기반 거래소 클라이언트 모음.
+    동기 메서드는 루프에 코루틴을 넘기고 결과를 기다리며, *_async 메서드는 루프 안에서 직접 await 합니다.
+    """
+
+    ccxt_module = ccxt_async
+
+    def __init__(self, config_manager: ConfigManager, close_delay: float = 30.0, market_feed: bool = True):
+        if aiohttp is None or ccxt_async is None:
+            raise ImportError("aiohttp and ccxt.async_support are required for the async exchange backend")
+        self.runner = EventLoopThread()
+        self.close_delay = close_delay  # 교체된 클라이언트는 진행 중인 호출이 끝나도록 잠시 뒤에 닫음
+        self.call_timeout = config_manager.get_exchange_call_timeout()
+        super().__init__(config_manager, market_feed)
+        atexit.register(self.close)
+
+    def _create_transport(self) -> AsyncHttpTransport:
+        return AsyncHttpTransport(
+            self.runner,
+            *self.config_manager.get_http_timeout(),
+            pool_size=self.config_manager.get_http_pool_size(),
+            keepalive_interval=self.config_manager.get_http_keepalive_interval()
+        )
+
+    def _init_upbit(self, config: Dict[str, Any]):
+        """업비트 비동기 클라이언트 초기화"""
+        client = AsyncUpbitClient(config["key"], config["secret"], self.transport)
+        logging.info("Upbit async client initialized")
+        return client
+
+    def _attach_markets(self, exchange: str, client):
+        """load_markets 코루틴은 이벤트 루프에서 실행합니다."""
+        self.market_cache.attach(exchange, client, runner=self.runner.run)
+
+    def _discard_client(self, exchange: str, client):
+        if hasattr(client, "close"):
+            self.runner.submit(self._close_later(client))
+
+    async def _close_later(self, client):
+        await asyncio.sleep(self.close_delay)
+        await client.close()
+
+    def create_kis_client(self, app_key: str, app_secret: str, account_number: str, account_code: str,
+                          token_store: KISTokenStore = None, name: str = "kis") -> SyncFacade:
+        """비동기 KIS 클라이언트를 동기 파사드로 감싸 반환합니다. (facade.client는 코루틴 API)"""
+        client = AsyncKISClient(app_key, app_secret, account_number, account_code, self.transport,
+                                token_store=token_store, name=name, call_timeout=self.call_timeout)
+        return SyncFacade(client, self.runner)
+
+    async def _guarded_async(self, exchange: str, func, *args) -> Any:
+        """거래소 코루틴 호출을 서킷 브레이커와 호출 제한 시간(EXCHANGE_CALL_TIMEOUT)으로 감쌉니다."""
+        return await get_circuit_breaker(exchange.lower()).call_async(func, *args, timeout=self.call_timeout)
+
+    async def get_balance_async(self, exchange: str) -> Optional[Dict]:
+        """잔고를 조회합니다."""
+        try:
+            client = self.get_client(exchange)
+            if not client:
+                return None
+
+            if exchange.lower() == "upbit":
+                return await self._guarded_async(exchange, client.get_balance)
+            return await self._guarded_async(exchange, client.fetch_balance)
+        except Exception as e:
+            logging.error(f"Failed to get balance from {exchange}: {e}")
+            return None
+
+    async def create_order_async(self, exchange: str, symbol: str, side: str,
+                                 amount: float, price: float = None, order_type: str = "market") -> Optional[Dict]:
+        """주문을 생성합니다."""
+        try:
+            client = self.get_client(exchange)
+            if not client:
+                return None
+
+            if exchange.lower() == "upbit":
+                return await self._guarded_async(exchange, client.create_order,
+                                                 symbol, side, amount, price, order_type)
+            return await self._guarded_async(exchange, client.create_order,
+                                             symbol, order_type, side, amount, price)
+        except Exception as e:
+            logging.error(f"Failed to create order on {exchange}: {e}")
+            return None
+
+    async def fetch_open_orders_async(self, exchange: str, symbol: str = None) -> Optional[List[Dict]]:
+        """미체결 주문 목록을 가져옵니다. (symbol이 없으면 계좌 전체)"""
+        try:
+            client = self.get_client(exchange)
+            if not client:
+                return None
+
+            if exchange.lower() == "upbit":
+                return await self._guarded_async(exchange, client.get_orders, "wait", symbol)
+            return await self._guarded_async(exchange, client.fetch_open_orders, symbol)
+        except Exception as e:
+            logging.error(f"Failed to fetch open orders from {exchange}: {e}")
+            return None
+
+    async def fetch_order_async(self, exchange: str, order_id: str, symbol: str) -> Optional[Dict]:
+        """주문 하나의 상태를 가져옵니다."""
+        try:
+            client = self.get_client(exchange)
+            if not client:
+                return None
+
+            if exchange.lower() == "upbit":
+                return await self._guarded_async(exchange, client.get_order, order_id)
+            return await self._guarded_async(exchange, client.fetch_order, order_id, symbol)
+        except Exception as e:
+            logging.error(f"Failed to fetch order {order_id} from {exchange}: {e}")
+            return None
+
+    async def get_ticker_async(self, exchange: str, symbol: str) -> Optional[Dict]:
+        """티커 정보를 가져옵니다. WebSocket 시세가 있으면 메모리에서, 없으면 REST로 조회합니다."""
+        try:
+            client = self.get_client(exchange)
+            if not client:
+                return None
+
+            ticker = self.market_feed.get_ticker(exchange.lower(), symbol) if self.market_feed else None
+            if ticker is not None:
+                return ticker
+            if exchange.lower() == "upbit":
+                return await self._guarded_async(exchange, client.get_ticker, symbol)
+            return await self._guarded_async(exchange, client.fetch_ticker, symbol)
+        except Exception as e:
+            logging.error(f"Failed to get ticker from {exchange}: {e}")
+            return None
+
+    def get_balance(self, exchange: str) -> Optional[Dict]:
+        return self.runner.run(self.get_balance_async(exchange))
+
+    def create_order(self, exchange: str, symbol: str, side: str,
+                     amount: float, price: float = None, order_type: str = "market") -> Optional[Dict]:
+        return self.runner.run(self.create_order_async(exchange, symbol, side, amount, price, order_type))
+
+    def fetch_open_orders(self, exchange: str, symbol: str = None) -> Optional[List[Dict]]:
+        return self.runner.run(self.fetch_open_orders_async(exchange, symbol))
+
+    def fetch_order(self, exchange: str, order_id: str, symbol: str) -> Optional[Dict]:
+        return self.runner.run(self.fetch_order_async(exchange, order_id, symbol))
+
+    def get_ticker(self, exchange: str, symbol: str) -> Optional[Dict]:
+        return self.runner.run(self.get_ticker_async(exchange, symbol))
+
+    def close(self, timeout: float = 5.0):
+        """모든 ccxt 세션과 HTTP 연결을 닫습니다. (종료 시 자동 호출)"""
+        async def close_all():
+            for client in list(self.clients.values()):
+                if hasattr(client, "close"):
+                    await client.close()
+            await self.transport.close()
+        try:
+            self.runner.run(close_all(), timeout)
+        except Exception as e:
+            logging.warning(f"Failed to close async exchange clients: {e}")
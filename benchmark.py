@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+시그널 → 주문 엔드투엔드 부하 생성기 및 지연시간 벤치마크
+KIS, 업비트, CCXT 거래소, 디스코드 웹훅을 대신하는 로컬 서버를 띄우고
+/webhook/tradingview로 트레이딩뷰 형식의 시그널을 대량으로 전송합니다.
+
+사용 예:
+    python benchmark.py --count 2000 --concurrency 32 --latency kis=40 --latency binance=25
+    python benchmark.py --compare bench_results/이전결과.json
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import requests
+
+CCXT_EXCHANGES = ["binance", "bybit", "okx", "bitget"]
+VENUES = ["kis", "upbit"] + CCXT_EXCHANGES + ["discord"]
+STAGES = ["ingress", "parsing", "process_tradingview_signal", "_execute_trade", "order_call"]
+
+
+class StandInServer:
+    """고정 지연시간으로 응답하는 로컬 대역 서버"""
+
+    def __init__(self, venue: str, latency_ms: float):
+        self.venue = venue
+        self.latency = latency_ms / 1000.0
+        self.request_count = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self):
+                length = int(self.headers.get("Content-Length", 0) or 0)
+                if length:
+                    self.rfile.read(length)
+                server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                status, body = server.respond(self.command, self.path.split("?")[0])
+                data = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                if data:
+                    self.wfile.write(data)
+
+            do_GET = _reply
+            do_POST = _reply
+            do_DELETE = _reply
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+
+    def respond(self, method: str, path: str):
+        """경로별 가짜 응답을 만듭니다."""
+        if self.venue == "discord":
+            return 204, None
+
+        if self.venue == "kis":
+            if path == "/oauth2/tokenP":
+                return 200, {"access_token": "bench-token", "expires_in": 86400}
+            if path.endswith("/order-cash"):
+                return 200, {"rt_cd": "0", "msg1": "OK", "KRX_FWDG_ORD_ORGNO": "00950",
+                             "output": {"ODNO": uuid.uuid4().hex[:10]}}
+            return 200, {"rt_cd": "0", "output1": [], "output2": [{}]}
+
+        if self.venue == "upbit":
+            if path == "/v1/orders":
+                return 201, {"uuid": str(uuid.uuid4()), "state": "wait"}
+            if path == "/v1/ticker":
+                return 200, [{"market": "KRW-BTC", "trade_price": 50000000}]
+            return 200, []
+
+        # CCXT 거래소 대역
+        if path.endswith("/order"):
+            return 200, {"id": uuid.uuid4().hex, "status": "open"}
+        if path.endswith("/ticker"):
+            return 200, {"last": 50000.0, "bid": 49999.0, "ask": 50001.0}
+        return 200, {"free": {}, "used": {}, "total": {}}
+
+
+class StandInExchange:
+    """CCXT 거래소 객체를 대신해 대역 서버로 요청하는 클라이언트"""
+
+    def __init__(self, exchange_id: str, base_url: str):
+        self.id = exchange_id
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def create_order(self, symbol, order_type, side, amount, price=None):
+        response = self.session.post(f"{self.base_url}/{self.id}/order", json={
+            "symbol": symbol, "type": order_type, "side": side, "amount": amount, "price": price
+        })
+        return response.json()
+
+    def fetch_balance(self):
+        return self.session.get(f"{self.base_url}/{self.id}/balance").json()
+
+    def fetch_ticker(self, symbol):
+        return self.session.get(f"{self.base_url}/{self.id}/ticker", params={"symbol": symbol}).json()
+
+
+class StageRecorder:
+    """단계별 소요시간 기록기"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    def record(self, stage: str, seconds: float):
+        self.samples[stage].append(seconds)
+
+    def wrap(self, stage: str, func):
+        """함수 호출 시간을 기록하는 래퍼를 반환합니다."""
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+        return wrapper
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """정렬된 값에서 백분위수를 계산합니다. (nearest-rank)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples: List[float], wall_seconds: float) -> Dict[str, float]:
+    """샘플 목록을 통계로 요약합니다. (단위: ms)"""
+    values = sorted(samples)
+    count = len(values)
+    return {
+        "count": count,
+        "throughput_per_sec": round(count / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0
+    }
+
+
+def build_payloads(count: int, targets: List[str]) -> List[Dict]:
+    """트레이딩뷰 형식의 시그널을 생성합니다."""
+    payloads = []
+    for i in range(count):
+        target = targets[i % len(targets)]
+        payload = {
+            "action": "buy" if i % 2 == 0 else "sell",
+            "order_type": "market",
+            "price": 0,
+            "strategy": "Benchmark",
+            "signal_id": f"bench-{uuid.uuid4().hex}"
+        }
+        if target == "kis":
+            payload.update({"ticker": "005930", "quantity": 1, "exchange": "krx", "account": "kis1"})
+        elif target == "upbit":
+            payload.update({"ticker": "KRW-BTC", "quantity": 0.001, "exchange": "upbit", "account": "upbit"})
+        else:
+            payload.update({"ticker": "BTC/USDT", "quantity": 0.001, "exchange": target, "account": target})
+        payloads.append(payload)
+    return payloads
+
+
+def prepare_environment(servers: Dict[str, StandInServer], ingress_mode: str):
+    """앱이 대역 서버를 사용하도록 환경을 구성합니다."""
+    # 실제 .env를 건드리지 않도록 임시 작업 디렉토리에서 실행
+    workdir = tempfile.mkdtemp(prefix="tradingbot-bench-")
+    os.chdir(workdir)
+
+    os.environ["DISCORD_WEBHOOK_URL"] = f"{servers['discord'].url}/webhook"
+    os.environ["WEBHOOK_SECRET"] = ""
+    os.environ["WEBHOOK_INGRESS_MODE"] = ingress_mode
+    os.environ["KIS1_KEY"] = "bench-key"
+    os.environ["KIS1_SECRET"] = "bench-secret"
+    os.environ["KIS1_ACCOUNT_NUMBER"] = "00000000"
+    os.environ["KIS1_ACCOUNT_CODE"] = "01"
+    for exchange in ["binance", "upbit", "bybit", "okx", "bitget"]:
+        os.environ[f"{exchange.upper()}_KEY"] = "bench-key"
+        os.environ[f"{exchange.upper()}_SECRET"] = "bench-secret"
+        os.environ[f"{exchange.upper()}_PASSPHRASE"] = "bench-passphrase"
+    os.environ["BITGET_DEMO_MODE"] = "false"
+    # 실제 거래소 WebSocket에 접속하지 않고, 백그라운드 트래픽이 측정값에 섞이지 않도록 함
+    os.environ["MARKET_FEED_ENABLED"] = "false"
+
+    from exchange_clients import ExchangeClients, KISClient, UpbitClient
+    from portfolio_snapshot import PortfolioSnapshotService
+    KISClient.BASE_URL = servers["kis"].url
+    UpbitClient.BASE_URL = servers["upbit"].url
+    # 엔진 생성 시점부터 CCXT 대신 대역 클라이언트를 사용 (실제 거래소 load_markets 호출 방지)
+    for exchange in CCXT_EXCHANGES:
+        setattr(ExchangeClients, f"_init_{exchange}",
+                lambda self, config, exchange=exchange: StandInExchange(exchange, servers[exchange].url))
+    ExchangeClients._prewarm_markets = lambda self, exchanges: None
+    PortfolioSnapshotService.start = lambda self: None  # 주기적인 잔고 조회 중지
+    return workdir
+
+
+def instrument(app_module, recorder: StageRecorder):
+    """앱과 엔진의 주요 단계에 타이머를 설치합니다."""
+    # 서명 검증 + JSON 파싱(decode_payload) + 필드 검증(decode_signal) 단계
+    parse = app_module.decode_payload
+    decode = app_module.decode_signal
+    local = threading.local()
+
+    def timed_parse(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return parse(*args, **kwargs)
+        finally:
+            local.parse_seconds = time.perf_counter() - started
+
+    def timed_decode(data):
+        started = time.perf_counter()
+        try:
+            return decode(data)
+        finally:
+            elapsed = time.perf_counter() - started
+            recorder.record("parsing", getattr(local, "parse_seconds", 0.0) + elapsed)
+
+    app_module.decode_payload = timed_parse
+    app_module.decode_signal = timed_decode
+
+    engine = app_module.trading_engine
+    engine.process_tradingview_signal = recorder.wrap(
+        "process_tradingview_signal", engine.process_tradingview_signal)
+    engine._execute_trade = recorder.wrap("_execute_trade", engine._execute_trade)
+
+    exchange_clients = engine.exchange_clients
+    exchange_clients.create_order = recorder.wrap("order_call", exchange_clients.create_order)
+    for client in engine.kis_clients.values():
+        client.create_order = recorder.wrap("order_call", client.create_order)
+
+
+def run_benchmark(args) -> Dict:
+    """벤치마크를 실행하고 결과를 반환합니다."""
+    latencies = {venue: args.default_latency for venue in VENUES}
+    for item in args.latency:
+        venue, _, value = item.partition("=")
+        latencies[venue.strip().lower()] = float(value)
+
+    servers = {venue: StandInServer(venue, latencies[venue]) for venue in VENUES}
+    for server in servers.values():
+        server.start()
+
+    recorder = StageRecorder()
+    targets = [t.strip().lower() for t in args.targets.split(",") if t.strip()]
+    payloads = build_payloads(args.count, targets)
+    url = args.url
+    app_module = None
+    http_server = None
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+
+    if not url:
+        sys.path.insert(0, repo_dir)
+        prepare_environment(servers, args.mode)
+        import app as app_module  # 환경 구성 후 임포트해야 대역 서버를 사용합니다
+        from werkzeug.serving import make_server
+
+        instrument(app_module, recorder)
+
+        http_server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+        threading.Thread(target=http_server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{http_server.server_port}/webhook/tradingview"
+
+    local = threading.local()
+    status_counts: Counter = Counter()
+    status_lock = threading.Lock()
+
+    def fire(payload: Dict):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            response = session.post(url, json=payload, timeout=args.timeout)
+            key = str(response.status_code)
+        except Exception as e:
+            key = type(e).__name__
+        recorder.record("ingress", time.perf_counter() - started)
+        with status_lock:
+            status_counts[key] += 1
+
+    # 워밍업 (커넥션 및 지연 초기화 비용 제외)
+    for payload in build_payloads(min(args.warmup, args.count), targets):
+        fire(payload)
+    recorder.samples = {stage: [] for stage in STAGES}
+    status_counts.clear()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(fire, payloads))
+    wall_seconds = time.perf_counter() - started
+
+    # 큐 모드에서는 워커가 모두 처리할 때까지 대기
+    if app_module is not None and app_module.signal_queue is not None:
+        deadline = time.monotonic() + args.drain_timeout
+        while app_module.signal_queue.depth() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        drain_seconds = time.perf_counter() - started
+    else:
+        drain_seconds = wall_seconds
+
+    if http_server is not None:
+        http_server.shutdown()
+    for server in servers.values():
+        server.stop()
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "count": args.count,
+            "concurrency": args.concurrency,
+            "targets": targets,
+            "mode": args.mode if not args.url else "external",
+            "latency_ms": latencies
+        },
+        "wall_seconds": round(wall_seconds, 3),
+        "drain_seconds": round(drain_seconds, 3),
+        "throughput_per_sec": round(args.count / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "status_counts": status_counts,
+        "stand_in_requests": {venue: server.request_count for venue, server in servers.items()},
+        "stages": {stage: summarize(recorder.samples[stage], drain_seconds if stage != "ingress" else wall_seconds)
+                   for stage in STAGES}
+    }
+
+
+def print_report(result: Dict, baseline: Optional[Dict] = None):
+    """결과를 표로 출력합니다."""
+    print("\n" + "=" * 78)
+    print(f"📊 벤치마크 결과 - {result['timestamp']}")
+    print("=" * 78)
+    config = result["config"]
+    print(f"• 시그널 수: {config['count']} / 동시성: {config['concurrency']} / 모드: {config['mode']}")
+    print(f"• 처리량: {result['throughput_per_sec']} signals/s (소요 {result['wall_seconds']}s)")
+    print(f"• 응답 코드: {result['status_counts']}")
+    print()
+    print(f"{'stage':<28}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for stage, stats in result["stages"].items():
+        line = (f"{stage:<28}{stats['count']:>8}{stats['p50_ms']:>10.2f}"
+                f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+        if baseline and stage in baseline.get("stages", {}):
+            before = baseline["stages"][stage]["p99_ms"]
+            if before:
+                line += f"   p99 {((stats['p99_ms'] - before) / before) * 100:+.1f}%"
+        print(line)
+    if baseline:
+        before = baseline.get("throughput_per_sec", 0)
+        if before:
+            change = (result["throughput_per_sec"] - before) / before * 100
+            print(f"\n• 처리량 변화: {before} → {result['throughput_per_sec']} ({change:+.1f}%)")
+    print("(단위: ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trading Bot 시그널→주문 벤치마크")
+    parser.add_argument("--count", type=int, default=1000, help="전송할 시그널 수")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 요청 수")
+    parser.add_argument("--warmup", type=int, default=20, help="워밍업 요청 수")
+    parser.add_argument("--targets", default="kis,upbit,binance,bybit,okx,bitget",
+                        help="시그널 대상 (쉼표 구분, 순환 배분)")
+    parser.add_argument("--latency", action="append", default=[],
+                        help="대역 서버 지연시간 venue=ms (반복 지정 가능)")
+    parser.add_argument("--default-latency", type=float, default=20.0, help="기본 지연시간(ms)")
+    parser.add_argument("--mode", choices=["sync", "queue"], default="sync", help="웹훅 수신 모드")
+    parser.add_argument("--url", default="", help="외부 서버 URL (지정 시 수신 지연만 측정)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="요청 타임아웃(초)")
+    parser.add_argument("--drain-timeout", type=float, default=120.0, help="큐 처리 대기 시간(초)")
+    parser.add_argument("--output", default="", help="결과 JSON 경로")
+    parser.add_argument("--compare", default="", help="비교할 이전 결과 JSON 경로")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "bench_results",
+        f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    output = os.path.abspath(output)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    result = run_benchmark(args)
+    print_report(result, baseline)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 결과 저장: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Per-venue circuit breaker for the Trading Bot
+거래소/KIS 계좌별로 최근 호출의 오류율과 지연 시간을 추적하다가 연속 실패나 오류율이 한도를 넘으면
+회로를 열어(open) 이후 호출을 네트워크 대기 없이 바로 거부합니다.
+열린 뒤 일정 시간이 지나면 반개방(half-open) 상태에서 시험 호출만 통과시켜 성공하면 다시 닫고, 실패하면 다시 엽니다.
+
+주문 거부, 잔고 부족처럼 거래소가 정상 응답한 오류는 실패로 세지 않고
+연결/타임아웃/점검(5xx) 같은 거래소 장애만 셉니다.
+"""
+
+import time
+import asyncio
+import threading
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+try:
+    import ccxt
+except ImportError:
+    ccxt = None
+
+from metrics import CIRCUIT_REJECTIONS, CIRCUIT_TRANSITIONS
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+DEFAULT_SETTINGS: Dict[str, float] = {
+    "enabled": 1,
+    "failure_threshold": 5,     # 연속 실패 횟수
+    "error_rate": 0.5,          # 윈도 내 실패 비율
+    "min_calls": 10,            # 오류율을 판단할 최소 호출 수
+    "window_seconds": 60.0,     # 오류율/지연 시간 집계 구간
+    "open_seconds": 30.0,       # 열린 뒤 시험 호출까지 대기 시간
+    "slow_call_seconds": 0.0,   # 이보다 느린 호출은 실패로 집계 (0이면 사용 안 함)
+    "half_open_probes": 1,      # 반개방 상태에서 동시에 허용할 시험 호출 수
+}
+
+# 윈도 안에서 집계할 최근 호출 최대 개수
+MAX_SAMPLES = 1000
+
+
+class CircuitOpenError(Exception):
+    """회로가 열려 호출을 보내지 않고 거부했을 때 발생합니다."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit open for {name}, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class VenueUnavailableError(Exception):
+    """거래소가 5xx(점검/내부 오류)로 응답했을 때 발생합니다. (정상 응답 오류와 달리 장애로 집계)"""
+
+    def __init__(self, name: str, status_code: int, body: str = ""):
+        super().__init__(f"{name} returned HTTP {status_code}: {body[:200]}")
+        self.name = name
+        self.status_code = status_code
+
+
+def raise_for_venue_status(name: str, response: Any):
+    """응답 상태 코드가 5xx이면 VenueUnavailableError를 발생시킵니다. (requests/AsyncResponse 공용)"""
+    if response.status_code >= 500:
+        raise VenueUnavailableError(name, response.status_code, response.text or "")
+
+
+def is_venue_failure(error: BaseException) -> bool:
+    """거래소 장애로 볼 예외인지 판단합니다. (CCXT 주문/인증 오류 등 정상 응답 오류는 제외)"""
+    if not isinstance(error, Exception) or isinstance(error, CircuitOpenError):
+        return False
+    if ccxt is not None and isinstance(error, ccxt.BaseError):
+        return isinstance(error, ccxt.NetworkError)
+    return True
+
+
+class CircuitBreaker:
+    """거래소 또는 KIS 계좌 하나의 회로 상태와 최근 호출 기록"""
+
+    def __init__(self, name: str, settings: Optional[Dict[str, float]] = None):
+        self.name = name
+        settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.enabled = bool(settings["enabled"])
+        self.failure_threshold = int(settings["failure_threshold"])
+        self.error_rate = float(settings["error_rate"])
+        self.min_calls = int(settings["min_calls"])
+        self.window_seconds = float(settings["window_seconds"])
+        self.open_seconds = float(settings["open_seconds"])
+        self.slow_call_seconds = float(settings["slow_call_seconds"])
+        self.half_open_probes = int(settings["half_open_probes"])
+
+        self.state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._probes = 0
+        self._calls: Deque[Tuple[float, bool, float]] = deque(maxlen=MAX_SAMPLES)  # (시각, 실패 여부, 지연 시간)
+        self._last_error = ""
+        self._trips = 0
+        self._lock = threading.Lock()
+
+    def blocked_for(self) -> float:
+        """지금 호출하면 거부될 경우 남은 대기 시간(초), 허용되면 0 (락 없이 상태만 읽음)"""
+        if not self.enabled or self.state == STATE_CLOSED:
+            return 0.0
+        if self.state == STATE_OPEN:
+            return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+        return 0.0 if self._probes < self.half_open_probes else 1.0
+
+    def before_call(self) -> bool:
+        """
+        호출 전에 허용 여부를 확인합니다. 거부되면 CircuitOpenError,
+        허용되면 시험 호출(반개방)인지 여부를 반환합니다.
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            if self.state == STATE_OPEN:
+                remaining = self._opened_at + self.open_seconds - time.monotonic()
+                if remaining > 0:
+                    CIRCUIT_REJECTIONS.labels(self.name).inc()
+                    raise CircuitOpenError(self.name, remaining)
+                self._transition(STATE_HALF_OPEN)
+            if self.state == STATE_HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    CIRCUIT_REJECTIONS.labels(self.name).inc()
+                    raise CircuitOpenError(self.name, 1.0)
+                self._probes += 1
+                return True
+            return False
+
+    def after_call(self, probe: bool, latency: float, error: Optional[BaseException] = None):
+        """호출 결과를 기록하고 상태를 갱신합니다."""
+        if not self.enabled:
+            return
+        failed = error is not None and is_venue_failure(error)
+        if not failed and self.slow_call_seconds and latency > self.slow_call_seconds:
+            failed = True
+            error = TimeoutError(f"slow call {latency:.2f}s")
+        now = time.monotonic()
+        with self._lock:
+            if probe:
+                self._probes -= 1
+            if error is not None and not isinstance(error, Exception):
+                return  # 취소된 호출은 결과를 알 수 없으므로 집계하지 않음
+            self._calls.append((now, failed, latency))
+            self._trim(now)
+            if failed:
+                self._consecutive_failures += 1
+                self._last_error = f"{type(error).__name__}: {error}".rstrip(": ")[:200]
+            else:
+                self._consecutive_failures = 0
+
+            if self.state == STATE_HALF_OPEN:
+                if failed:
+                    self._open(now)
+                elif probe and self._probes == 0:
+                    self._calls.clear()  # 장애 구간 기록은 버리고 새로 집계
+                    self._transition(STATE_CLOSED)
+            elif self.state == STATE_CLOSED and failed and self._should_open():
+                self._open(now)
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """동기 호출을 회로로 감쌉니다."""
+        probe = self.before_call()
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self.after_call(probe, time.monotonic() - started, e)
+            raise
+        self.after_call(probe, time.monotonic() - started)
+        return result
+
+    async def call_async(self, func: Callable[..., Awaitable[Any]], *args,
+                         timeout: Optional[float] = None, **kwargs) -> Any:
+        """코루틴 호출을 회로로 감쌉니다. timeout을 넘기면 호출을 취소하고 실패로 집계합니다."""
+        probe = self.before_call()
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(func(*args, **kwargs), timeout)
+        except BaseException as e:
+            self.after_call(probe, time.monotonic() - started, e)
+            raise
+        self.after_call(probe, time.monotonic() - started)
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        """/api/status에 표시할 상태와 최근 윈도 통계"""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            latencies = sorted(latency for _, _, latency in self._calls)
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            calls = len(self._calls)
+            return {
+                "state": self.state,
+                "calls": calls,
+                "error_rate": round(failures / calls, 3) if calls else 0.0,
+                "avg_ms": round(sum(latencies) / calls * 1000, 1) if calls else None,
+                "p95_ms": round(latencies[min(calls - 1, int(calls * 0.95))] * 1000, 1) if calls else None,
+                "consecutive_failures": self._consecutive_failures,
+                "retry_in": round(max(0.0, self._opened_at + self.open_seconds - now), 1)
+                if self.state == STATE_OPEN else 0.0,
+                "trips": self._trips,
+                "last_error": self._last_error,
+            }
+
+    def _should_open(self) -> bool:
+        if self.failure_threshold and self._consecutive_failures >= self.failure_threshold:
+            return True
+        calls = len(self._calls)
+        if calls < max(1, self.min_calls):
+            return False
+        failures = sum(1 for _, failed, _ in self._calls if failed)
+        return failures / calls >= self.error_rate
+
+    def _open(self, now: float):
+        self._opened_at = now
+        self._trips += 1
+        self._transition(STATE_OPEN)
+        logging.warning(f"Circuit opened for {self.name} for {self.open_seconds:g}s: {self._last_error}")
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        if state == STATE_CLOSED:
+            logging.info(f"Circuit closed for {self.name}")
+        self.state = state
+        CIRCUIT_TRANSITIONS.labels(self.name, state).inc()
+
+    def _trim(self, now: float):
+        cutoff = now - self.window_seconds
+        calls = self._calls
+        while calls and calls[0][0] < cutoff:
+            calls.popleft()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_settings: Dict[str, float] = dict(DEFAULT_SETTINGS)
+_breakers_lock = threading.Lock()
+
+
+def configure_circuit_breakers(settings: Dict[str, float]):
+    """이후 만들어지는 회로에 적용할 설정을 지정합니다."""
+    _settings.update(settings)
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """거래소/KIS 계좌별 서킷 브레이커 싱글톤 인스턴스 반환"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = CircuitBreaker(name, _settings)
+    return breaker
+
+
+def circuit_status() -> Dict[str, Dict[str, Any]]:
+    """모든 회로의 상태"""
+    return {name: breaker.status() for name, breaker in sorted(_breakers.items())}
@@ -0,0 +1,113 @@
+"""
+Client registry for the Trading Bot
+설정 지문(fingerprint)별로 API 클라이언트를 보관하고, 설정이 바뀐 항목만 다시 생성합니다.
+읽는 쪽은 락 없이 읽기 전용 뷰를 사용하며, 변경 시에는 새 딕셔너리를 만들어 뷰를 한 번에 교체합니다(copy-on-write).
+계좌 하나의 키를 바꿔도 그 계좌 클라이언트만 다시 만들고, 진행 중인 주문은 항상 완전한 뷰를 봅니다.
+"""
+
+import json
+import hashlib
+import threading
+import logging
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+
+def config_fingerprint(config: Dict[str, Any]) -> str:
+    """설정 딕셔너리의 지문 (비밀 값을 그대로 보관하지 않도록 해시 사용)"""
+    encoded = json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ClientRegistry:
+    """이름 -> 클라이언트 읽기 전용 뷰를 원자적으로 교체하는 레지스트리"""
+
+    def __init__(self, build: Callable[[str, Dict[str, Any]], Optional[Any]], label: str = "client",
+                 on_discard: Optional[Callable[[str, Any], None]] = None):
+        self._build = build  # (이름, 설정) -> 클라이언트 (생성할 수 없으면 None)
+        self.label = label
+        self._on_discard = on_discard  # 교체/제거된 (이름, 클라이언트) 정리 (예: 비동기 세션 닫기)
+        self._fingerprints: Dict[str, Optional[str]] = {}
+        self._view: Mapping[str, Any] = MappingProxyType({})
+        self._write_lock = threading.Lock()  # 변경끼리만 직렬화 (읽기는 락 없음)
+
+    @property
+    def view(self) -> Mapping[str, Any]:
+        """현재 클라이언트 뷰 (읽기 전용, 교체되어도 이미 얻은 뷰는 바뀌지 않음)"""
+        return self._view
+
+    def get(self, name: str) -> Optional[Any]:
+        return self._view.get(name)
+
+    def sync(self, configs: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        설정과 현재 클라이언트를 비교하여 추가/변경된 항목만 생성하고 사라진 항목은 제거합니다.
+        {"added": [...], "updated": [...], "removed": [...]}를 반환합니다.
+        """
+        changes: Dict[str, List[str]] = {"added": [], "updated": [], "removed": []}
+        discarded: List[Tuple[str, Any]] = []
+        with self._write_lock:
+            current = self._view
+            clients = dict(current)
+            fingerprints = dict(self._fingerprints)
+
+            for name in list(clients):
+                if name not in configs:
+                    discarded.append((name, clients.pop(name)))
+                    fingerprints.pop(name, None)
+                    changes["removed"].append(name)
+
+            for name, config in configs.items():
+                fingerprint = config_fingerprint(config)
+                if name in clients and fingerprints.get(name) == fingerprint:
+                    continue
+                existed = name in clients
+                try:
+                    client = self._build(name, config)
+                except Exception as e:
+                    logging.error(f"Failed to initialize {self.label} {name}: {e}")
+                    client = None
+
+                if client is None:
+                    # 새 설정으로 만들 수 없으면 이전 설정의 클라이언트도 쓰지 않음 (다음 동기화 때 재시도)
+                    if existed:
+                        discarded.append((name, clients.pop(name)))
+                        fingerprints.pop(name, None)
+                        changes["removed"].append(name)
+                    continue
+                if existed:
+                    discarded.append((name, clients[name]))
+                clients[name] = client
+                fingerprints[name] = fingerprint
+                changes["updated" if existed else "added"].append(name)
+
+            if any(changes.values()):
+                self._fingerprints = fingerprints
+                self._view = MappingProxyType(clients)
+
+        # 뷰를 교체한 뒤에 알림 (이전 뷰로 진행 중인 호출이 있을 수 있으므로 정리 시점은 on_discard가 정함)
+        for name, client in discarded:
+            self._discard(name, client)
+        if any(changes.values()):
+            logging.info(f"{self.label} registry synced: " + ", ".join(
+                f"{kind}={','.join(names)}" for kind, names in changes.items() if names))
+        return changes
+
+    def put(self, name: str, client: Any):
+        """클라이언트를 직접 등록합니다. (다음 동기화 때 설정 기준으로 다시 생성됨)"""
+        with self._write_lock:
+            clients = dict(self._view)
+            previous = clients.get(name)
+            clients[name] = client
+            self._fingerprints[name] = None
+            self._view = MappingProxyType(clients)
+        if previous is not None and previous is not client:
+            self._discard(name, previous)
+
+    def _discard(self, name: str, client: Any):
+        if self._on_discard is None:
+            return
+        try:
+            self._on_discard(name, client)
+        except Exception as e:
+            logging.error(f"Failed to close {self.label} {name}: {e}")
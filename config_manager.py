@@ -1,17 +1,26 @@
 import os
 import re
-from typing import Dict, Optional, List
-from dotenv import load_dotenv, set_key, unset_key
+from typing import Dict, Optional, List, Tuple
+from dotenv import dotenv_values, load_dotenv, set_key, unset_key
 import logging
 
 class ConfigManager:
     def __init__(self, env_file_path: str = ".env"):
         self.env_file_path = env_file_path
+        self._file_keys = set()  # 마지막으로 .env에서 읽은 키
         self.load_config()
         
-    def load_config(self):
-        """환경변수 파일을 로드합니다."""
-        load_dotenv(self.env_file_path)
+    def load_config(self, override: bool = False):
+        """
+        환경변수 파일을 로드합니다. override이면 파일 값으로 기존 환경변수를 덮어쓰고
+        파일에서 지워진 키는 환경변수에서도 제거합니다. (다른 프로세스가 바꾼 설정 반영)
+        """
+        values = dotenv_values(self.env_file_path)
+        if override:
+            for key in self._file_keys - values.keys():
+                os.environ.pop(key, None)
+        load_dotenv(self.env_file_path, override=override)
+        self._file_keys = set(values)
         
     def get_kis_accounts(self) -> List[Dict[str, str]]:
         """모든 KIS 계좌 정보를 가져옵니다."""
@@ -52,7 +61,7 @@ class ConfigManager:
             if acc_code is not None:
                 set_key(self.env_file_path, f"{prefix}_ACCOUNT_CODE", acc_code)
                 
-            self.load_config()
+            self.load_config(override=True)
             return True
         except Exception as e:
             logging.error(f"Failed to update KIS account {account_number}: {e}")
@@ -72,7 +81,7 @@ class ConfigManager:
                 except:
                     pass  # 키가 없어도 에러 무시
                     
-            self.load_config()
+            self.load_config(override=True)
             return True
         except Exception as e:
             logging.error(f"Failed to delete KIS account {account_number}: {e}")
@@ -166,7 +175,7 @@ class ConfigManager:
                 if "demo" in kwargs:
                     set_key(self.env_file_path, "BITGET_DEMO_MODE", str(kwargs["demo"]).lower())
                     
-            self.load_config()
+            self.load_config(override=True)
             return True
         except Exception as e:
             logging.error(f"Failed to update {exchange} config: {e}")
@@ -180,7 +189,7 @@ class ConfigManager:
         """디스코드 웹훅 URL을 업데이트합니다."""
         try:
             set_key(self.env_file_path, "DISCORD_WEBHOOK_URL", url)
-            self.load_config()
+            self.load_config(override=True)
             return True
         except Exception as e:
             logging.error(f"Failed to update Discord webhook URL: {e}")
@@ -194,8 +203,311 @@ class ConfigManager:
         """트레이딩뷰 웹훅 시크릿을 업데이트합니다."""
         try:
             set_key(self.env_file_path, "WEBHOOK_SECRET", secret)
-            self.load_config()
+            self.load_config(override=True)
             return True
         except Exception as e:
             logging.error(f"Failed to update webhook secret: {e}")
             return False
+            
+    def get_webhook_ingress_mode(self) -> str:
+        """웹훅 수신 모드를 가져옵니다. (sync: 즉시 처리, queue: 큐 저장 후 202 응답)"""
+        return os.getenv("WEBHOOK_INGRESS_MODE", "sync").lower()
+        
+    def get_signal_queue_path(self) -> str:
+        """시그널 큐 SQLite 파일 경로를 가져옵니다."""
+        return os.getenv("SIGNAL_QUEUE_PATH", "data/signal_queue.db")
+        
+    def get_signal_worker_count(self) -> int:
+        """시그널 큐 워커 수를 가져옵니다."""
+        try:
+            return max(1, int(os.getenv("SIGNAL_WORKER_COUNT", "4")))
+        except ValueError:
+            return 4
+        
+    def get_batch_max_workers(self) -> int:
+        """바스켓 주문 동시 실행 스레드 수를 가져옵니다."""
+        try:
+            return max(1, int(os.getenv("BATCH_MAX_WORKERS", "16")))
+        except ValueError:
+            return 16
+        
+    def get_kis_group(self, name: str) -> List[str]:
+        """KIS 계좌 그룹 구성원을 가져옵니다. (KIS_GROUP_<NAME>=kis1,kis2,...)"""
+        members = os.getenv(f"KIS_GROUP_{name.upper()}", "")
+        return [member.strip().lower() for member in members.split(",") if member.strip()]
+        
+    def get_kis_fanout_workers(self) -> int:
+        """다계좌 동시 주문 스레드 수를 가져옵니다."""
+        try:
+            return max(1, int(os.getenv("KIS_FANOUT_WORKERS", "32")))
+        except ValueError:
+            return 32
+            
+    def get_kis_order_interval(self) -> float:
+        """KIS 계좌별 최소 주문 간격(초)을 가져옵니다."""
+        try:
+            return max(0.0, float(os.getenv("KIS_ORDER_INTERVAL_MS", "50")) / 1000)
+        except ValueError:
+            return 0.05
+            
+    def get_kis_token_store_path(self) -> str:
+        """KIS 액세스 토큰 저장 파일 경로를 가져옵니다. (비우면 메모리에만 보관)"""
+        return os.getenv("KIS_TOKEN_STORE_PATH", "data/kis_tokens.enc")
+        
+    def get_kis_token_key(self) -> str:
+        """KIS 토큰 파일 암호화 키를 가져옵니다. (없으면 SECRET_KEY 사용)"""
+        return os.getenv("KIS_TOKEN_KEY") or os.getenv("SECRET_KEY", "")
+        
+    def get_kis_token_renew_before(self) -> float:
+        """KIS 토큰을 만료 몇 초 전에 미리 갱신할지 가져옵니다."""
+        try:
+            return max(120.0, float(os.getenv("KIS_TOKEN_RENEW_MINUTES", "60")) * 60)
+        except ValueError:
+            return 3600.0
+            
+    def get_portfolio_refresh_interval(self) -> float:
+        """포트폴리오 스냅샷 갱신 주기(초)를 가져옵니다."""
+        try:
+            return max(5.0, float(os.getenv("PORTFOLIO_REFRESH_SECONDS", "60")))
+        except ValueError:
+            return 60.0
+            
+    def get_portfolio_call_timeout(self) -> float:
+        """계좌별 잔고 조회 타임아웃(초)을 가져옵니다."""
+        try:
+            return max(1.0, float(os.getenv("PORTFOLIO_CALL_TIMEOUT", "10")))
+        except ValueError:
+            return 10.0
+            
+    def get_portfolio_max_workers(self) -> int:
+        """잔고 동시 조회 스레드 수를 가져옵니다."""
+        try:
+            return max(1, int(os.getenv("PORTFOLIO_MAX_WORKERS", "16")))
+        except ValueError:
+            return 16
+            
+    def get_position_ledger_path(self) -> str:
+        """포지션 원장 파일 경로를 가져옵니다."""
+        return os.getenv("POSITION_LEDGER_PATH", "data/positions.json")
+        
+    def get_risk_limits(self) -> Dict[str, float]:
+        """사전 리스크 한도를 가져옵니다. (0 또는 미설정이면 해당 검사 안 함)"""
+        limits = {}
+        for name, default in (("max_order_quantity", "0"), ("max_order_notional", "0"),
+                              ("max_account_notional", "0"), ("max_symbol_notional", "0"),
+                              ("max_strategy_notional", "0"), ("max_orders_per_window", "0"),
+                              ("order_window_seconds", "60"), ("max_daily_loss", "0")):
+            try:
+                limits[name] = max(0.0, float(os.getenv(f"RISK_{name.upper()}", default)))
+            except ValueError:
+                limits[name] = float(default)
+        return limits
+        
+    def get_algo_max_workers(self) -> int:
+        """분할 집행 자식 주문 전송 스레드 수를 가져옵니다."""
+        try:
+            return max(1, int(os.getenv("ALGO_MAX_WORKERS", "8")))
+        except ValueError:
+            return 8
+            
+    def get_algo_venue_interval(self) -> float:
+        """같은 계좌/거래소로 가는 자식 주문 간 최소 간격(초)을 가져옵니다."""
+        try:
+            return max(0.0, float(os.getenv("ALGO_VENUE_INTERVAL_MS", "200")) / 1000)
+        except ValueError:
+            return 0.2
+            
+    def get_market_cache_dir(self) -> str:
+        """거래소 마켓 정보 캐시 디렉터리를 가져옵니다."""
+        return os.getenv("MARKET_CACHE_DIR", "data/markets")
+        
+    def get_market_cache_ttl(self) -> float:
+        """거래소 마켓 정보 캐시 유효 시간(초)을 가져옵니다."""
+        try:
+            return max(60.0, float(os.getenv("MARKET_CACHE_TTL_HOURS", "12")) * 3600)
+        except ValueError:
+            return 43200.0
+            
+    def get_order_track_fast_interval(self) -> float:
+        """제출 직후 주문 상태 조회 간격(초)을 가져옵니다."""
+        try:
+            return max(0.2, float(os.getenv("ORDER_TRACK_FAST_SECONDS", "1")))
+        except ValueError:
+            return 1.0
+            
+    def get_order_track_slow_interval(self) -> float:
+        """오래 걸려 있는 주문의 최대 상태 조회 간격(초)을 가져옵니다."""
+        try:
+            return max(1.0, float(os.getenv("ORDER_TRACK_SLOW_SECONDS", "30")))
+        except ValueError:
+            return 30.0
+            
+    def get_router_max_quote_age(self) -> float:
+        """스마트 라우팅에 사용할 호가의 최대 경과 시간(초)을 가져옵니다."""
+        try:
+            return max(0.5, float(os.getenv("ROUTER_MAX_QUOTE_AGE", "5")))
+        except ValueError:
+            return 5.0
+            
+    def get_router_refresh_interval(self) -> float:
+        """스마트 라우팅 호가 갱신 주기(초)를 가져옵니다."""
+        try:
+            return max(0.2, float(os.getenv("ROUTER_QUOTE_INTERVAL", "2")))
+        except ValueError:
+            return 2.0
+            
+    def get_router_default_venue(self) -> str:
+        """유효한 호가가 없을 때 사용할 기본 거래소를 가져옵니다."""
+        return os.getenv("ROUTER_DEFAULT_VENUE", "").lower()
+        
+    def is_market_feed_enabled(self) -> bool:
+        """WebSocket 시세 피드 사용 여부를 가져옵니다."""
+        return os.getenv("MARKET_FEED_ENABLED", "true").lower() == "true"
+        
+    def get_market_feed_max_age(self) -> float:
+        """메모리 시세를 get_ticker에 사용할 최대 경과 시간(초)을 가져옵니다."""
+        try:
+            return max(0.5, float(os.getenv("MARKET_FEED_MAX_AGE", "10")))
+        except ValueError:
+            return 10.0
+            
+    def get_market_feed_symbols(self) -> List[Tuple[str, str]]:
+        """시작 시 구독할 (거래소, 심볼) 목록을 가져옵니다. (예: binance:BTC/USDT,upbit:KRW-BTC)"""
+        symbols = []
+        for item in os.getenv("MARKET_FEED_SYMBOLS", "").split(","):
+            venue, _, symbol = item.strip().partition(":")
+            if venue and symbol:
+                symbols.append((venue.lower(), symbol))
+        return symbols
+        
+    def get_market_feed_urls(self) -> Dict[str, str]:
+        """거래소별 WebSocket 주소 재정의를 가져옵니다. (MARKET_FEED_URL_BINANCE 등, 재생 서버 테스트용)"""
+        urls = {}
+        for venue in ("upbit", "binance", "bybit", "okx", "bitget"):
+            url = os.getenv(f"MARKET_FEED_URL_{venue.upper()}", "")
+            if url:
+                urls[venue] = url
+        return urls
+        
+    def get_market_feed_record_path(self) -> str:
+        """수신한 원본 시세 메시지를 기록할 JSONL 경로를 가져옵니다. (비어 있으면 기록 안 함)"""
+        return os.getenv("MARKET_FEED_RECORD", "")
+        
+    def get_market_order_protection_bps(self) -> float:
+        """시장가 주문을 로컬 호가창 기준 지정가로 바꿀 때 허용할 슬리피지(bp)를 가져옵니다. (0이면 사용 안 함)"""
+        try:
+            return max(0.0, float(os.getenv("MARKET_ORDER_PROTECTION_BPS", "0")))
+        except ValueError:
+            return 0.0
+            
+    def get_discord_outbox_size(self) -> int:
+        """디스코드 알림 대기열 최대 길이를 가져옵니다."""
+        try:
+            return max(1, int(os.getenv("DISCORD_OUTBOX_SIZE", "1000")))
+        except ValueError:
+            return 1000
+            
+    def get_discord_timeout(self) -> Tuple[float, float]:
+        """디스코드 전송 (연결, 읽기) 타임아웃(초)을 가져옵니다."""
+        try:
+            return (float(os.getenv("DISCORD_CONNECT_TIMEOUT", "3.05")),
+                    float(os.getenv("DISCORD_READ_TIMEOUT", "10")))
+        except ValueError:
+            return (3.05, 10.0)
+            
+    def get_exchange_backend(self) -> str:
+        """거래소 호출 백엔드를 가져옵니다. ("sync": 스레드 + ccxt, "async": 이벤트 루프 + ccxt.async_support)"""
+        backend = os.getenv("EXCHANGE_BACKEND", "sync").lower()
+        return backend if backend in ("sync", "async") else "sync"
+        
+    def get_http_timeout(self) -> Tuple[float, float]:
+        """KIS/업비트 REST 호출 (연결, 읽기) 타임아웃(초)을 가져옵니다."""
+        try:
+            return (float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05")),
+                    float(os.getenv("HTTP_READ_TIMEOUT", "10")))
+        except ValueError:
+            return (3.05, 10.0)
+            
+    def get_http_pool_size(self) -> int:
+        """호스트별 최대 keep-alive 연결 수를 가져옵니다."""
+        try:
+            return max(1, int(os.getenv("HTTP_POOL_SIZE", "32")))
+        except ValueError:
+            return 32
+            
+    def get_http_keepalive_interval(self) -> float:
+        """유휴 연결 유지 요청 간격(초)을 가져옵니다. (0이면 사용 안 함)"""
+        try:
+            return max(0.0, float(os.getenv("HTTP_KEEPALIVE_SECONDS", "45")))
+        except ValueError:
+            return 45.0
+            
+    def get_kis_rate_limit(self) -> Dict[str, Tuple[float, float]]:
+        """KIS 앱 키별 (초당 요청 수, 버스트)를 가져옵니다. (실전 20건/초, 모의투자 2건/초)"""
+        try:
+            rate = max(0.5, float(os.getenv("KIS_RATE_LIMIT_PER_SEC", "18")))
+        except ValueError:
+            rate = 18.0
+        return {"default": (rate, rate)}
+        
+    def get_circuit_breaker_settings(self) -> Dict[str, float]:
+        """거래소/KIS 계좌별 서킷 브레이커 설정을 가져옵니다."""
+        settings = {"enabled": 1.0 if os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true" else 0.0}
+        for name, default in (("failure_threshold", "5"), ("error_rate", "0.5"), ("min_calls", "10"),
+                              ("window_seconds", "60"), ("open_seconds", "30"), ("slow_call_seconds", "0"),
+                              ("half_open_probes", "1")):
+            try:
+                settings[name] = max(0.0, float(os.getenv(f"CIRCUIT_{name.upper()}", default)))
+            except ValueError:
+                settings[name] = float(default)
+        return settings
+        
+    def get_exchange_call_timeout(self) -> float:
+        """비동기 백엔드 거래소 호출 하나의 전체 제한 시간(초)을 가져옵니다. (요청 한도 대기 포함)"""
+        try:
+            return max(1.0, float(os.getenv("EXCHANGE_CALL_TIMEOUT", "30")))
+        except ValueError:
+            return 30.0
+            
+    def get_signal_park_attempts(self) -> int:
+        """회로가 열린 거래소로 가는 시그널을 큐에서 다시 시도할 최대 횟수를 가져옵니다. (0이면 바로 실패)"""
+        try:
+            return max(0, int(os.getenv("SIGNAL_PARK_ATTEMPTS", "5")))
+        except ValueError:
+            return 5
+            
+    def get_idempotency_ttl(self) -> float:
+        """중복 시그널 캐시 보존 시간(초)을 가져옵니다."""
+        try:
+            return max(1.0, float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600")))
+        except ValueError:
+            return 600.0
+            
+    def get_idempotency_max_entries(self) -> int:
+        """중복 시그널 캐시 최대 항목 수를 가져옵니다."""
+        try:
+            return max(1, int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000")))
+        except ValueError:
+            return 10000
+            
+    def get_idempotency_store_path(self) -> str:
+        """
+        중복 시그널 캐시 파일 경로를 가져옵니다. (비어 있으면 메모리에만 보관)
+        큐 모드에서는 재시작 후 트레이딩뷰 재전송이 다시 큐에 들어가지 않도록 항상 파일에 보관합니다.
+        """
+        path = os.getenv("IDEMPOTENCY_STORE_PATH", "")
+        if not path and self.get_webhook_ingress_mode() == "queue":
+            return "data/signal_ids.jsonl"
+        return path
+        
+    def get_engine_socket(self) -> str:
+        """공유 엔진 프로세스 Unix 소켓 경로를 가져옵니다. (비어 있으면 프로세스 내 엔진 사용)"""
+        return os.getenv("ENGINE_SOCKET", "")
+        
+    def get_metrics_dir(self) -> str:
+        """워커별 메트릭 스냅샷을 모을 공유 디렉터리를 가져옵니다. (비어 있으면 프로세스 내 메트릭만 사용)"""
+        return os.getenv("METRICS_MULTIPROC_DIR", "")
+        
+    def get_serving_mode(self) -> str:
+        """웹 서버 실행 모드를 가져옵니다. (development: Flask 개발 서버, production: gunicorn 멀티 워커)"""
+        return os.getenv("SERVING_MODE", "development").lower()
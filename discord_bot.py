@@ -7,6 +7,7 @@ import logging
 from config_manager import ConfigManager
 from discord_webhook import DiscordWebhook
 from trading_engine import TradingEngine
+from engine_server import DEFAULT_SOCKET_PATH, connect_engine
 
 # 로깅 설정
 logging.basicConfig(
@@ -23,7 +24,16 @@ bot = commands.Bot(command_prefix='!', intents=intents)
 # 컴포넌트 초기화
 config_manager = ConfigManager()
 discord_webhook = DiscordWebhook(config_manager)
-trading_engine = TradingEngine(config_manager, discord_webhook)
+
+# 엔진 프로세스가 있으면(프로덕션 모드) 그 TradingEngine을 공유하고,
+# 없으면 백그라운드 서비스 없이 조회/설정 반영용 엔진만 만듭니다. (원장, 토큰 갱신, 시세 피드는 웹 프로세스 담당)
+engine_socket = config_manager.get_engine_socket()
+if not engine_socket and config_manager.get_serving_mode() == 'production':
+    engine_socket = DEFAULT_SOCKET_PATH
+if engine_socket:
+    trading_engine = connect_engine(engine_socket).get_engine()
+else:
+    trading_engine = TradingEngine(config_manager, discord_webhook, background_services=False)
 
 @bot.event
 async def on_ready():
@@ -1,23 +1,180 @@
 import os
 import json
 import re
+import time
+import atexit
+import threading
 import requests
+from collections import deque
 from datetime import datetime
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 import logging
 from config_manager import ConfigManager
+from models import Order, OrderResult
+from metrics import DISCORD_SEND_LATENCY, DISCORD_SEND_FAILURES, DISCORD_OUTBOX_DEPTH
+
+# 디스코드 메시지 하나에 담을 수 있는 최대 임베드 수
+MAX_EMBEDS_PER_MESSAGE = 10
+
+
+class DiscordOutbox:
+    """
+    디스코드 알림 발송 대기열
+    알림은 메모리 큐에 쌓이고 백그라운드 스레드가 하나의 세션으로 전송합니다.
+    내용 없이 임베드만 있는 연속 알림은 최대 10개까지 한 메시지로 합치며,
+    웹훅별 레이트리밋 헤더(X-RateLimit-Remaining/Reset-After)와 429 응답을 따릅니다.
+    """
+
+    def __init__(self, webhook: "DiscordWebhook", max_size: int = 1000,
+                 timeout: Tuple[float, float] = (3.05, 10.0), max_retries: int = 3):
+        self.webhook = webhook
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self._messages: deque = deque(maxlen=max_size)
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._sending = False
+        self._blocked_until = 0.0
+        self.dropped = 0
+        atexit.register(self.flush, 5.0)
+
+    def put(self, content: str, embeds: List[Dict] = None) -> bool:
+        """알림을 대기열에 넣습니다. 전송을 기다리지 않습니다."""
+        with self._condition:
+            if len(self._messages) == self._messages.maxlen:
+                self.dropped += 1
+                logging.warning("Discord outbox full, dropping oldest notification")
+            self._messages.append((content, list(embeds) if embeds else []))
+            self._ensure_started()
+            self._condition.notify()
+        return True
+
+    def depth(self) -> int:
+        """전송 대기 중인 알림 수"""
+        return len(self._messages)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """대기열이 빌 때까지 기다립니다. (종료 시 사용)"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._messages or self._sending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None:
+                    return False
+                self._condition.wait(min(remaining, 0.1))
+        return True
+
+    def _ensure_started(self):
+        # fork 이후에도 각 프로세스에서 새로 시작되도록 첫 알림 시점에 스레드 생성
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="discord-outbox", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> Tuple[str, List[Dict], int]:
+        """대기열 앞에서 하나의 디스코드 메시지로 보낼 알림들을 꺼냅니다."""
+        messages = self._messages
+        content, embeds = messages.popleft()
+        count = 1
+        if not content:
+            embeds = list(embeds)
+            while messages:
+                next_content, next_embeds = messages[0]
+                if next_content or len(embeds) + len(next_embeds) > MAX_EMBEDS_PER_MESSAGE:
+                    break
+                messages.popleft()
+                embeds.extend(next_embeds)
+                count += 1
+        return content, embeds, count
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._messages:
+                    self._condition.wait()
+                content, embeds, count = self._next_batch()
+                self._sending = True
+
+            try:
+                self._deliver(content, embeds)
+            except Exception as e:
+                logging.error(f"Discord outbox error: {e}")
+            finally:
+                with self._condition:
+                    self._sending = False
+                    self._condition.notify_all()
+
+    def _deliver(self, content: str, embeds: List[Dict]):
+        """레이트리밋을 지키며 메시지를 전송합니다. 429 응답은 지정된 시간 후 재시도합니다."""
+        for _ in range(self.max_retries + 1):
+            wait = self._blocked_until - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+            response = self.webhook.post(content, embeds, session=self.session, timeout=self.timeout)
+            if response is None:
+                return
+
+            self._update_rate_limit(response)
+            if response.status_code != 429:
+                return
+            logging.warning(f"Discord rate limited, retrying in {self._blocked_until - time.monotonic():.2f}s")
+
+        DISCORD_SEND_FAILURES.inc()
+        logging.error("Discord message dropped after repeated rate limiting")
+
+    def _update_rate_limit(self, response):
+        """응답 헤더로 다음 전송 가능 시각을 계산합니다."""
+        headers = response.headers
+        now = time.monotonic()
+        if response.status_code == 429:
+            retry_after = headers.get("Retry-After")
+            try:
+                retry_after = float(retry_after if retry_after is not None else response.json().get("retry_after", 1))
+            except (ValueError, AttributeError):
+                retry_after = 1.0
+            self._blocked_until = now + retry_after
+        elif headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                self._blocked_until = now + float(headers.get("X-RateLimit-Reset-After", 1))
+            except ValueError:
+                self._blocked_until = now + 1.0
+
 
 class DiscordWebhook:
     def __init__(self, config_manager: ConfigManager):
         self.config_manager = config_manager
         self.webhook_url = config_manager.get_discord_webhook_url()
+        self.outbox = DiscordOutbox(
+            self,
+            max_size=config_manager.get_discord_outbox_size(),
+            timeout=config_manager.get_discord_timeout()
+        )
+        DISCORD_OUTBOX_DEPTH.set_function(self.outbox.depth)
         
     def send_message(self, content: str, embeds: List[Dict] = None) -> bool:
-        """디스코드 채널로 메시지를 전송합니다."""
+        """디스코드 메시지를 발송 대기열에 넣습니다. (전송을 기다리지 않음)"""
+        if not self.webhook_url:
+            logging.warning("Discord webhook URL not configured")
+            return False
+            
+        return self.outbox.put(content, embeds)
+        
+    def send_message_now(self, content: str, embeds: List[Dict] = None) -> bool:
+        """대기열을 거치지 않고 즉시 전송하고 결과를 반환합니다. (연결 테스트용)"""
         if not self.webhook_url:
             logging.warning("Discord webhook URL not configured")
             return False
             
+        response = self.post(content, embeds, session=self.outbox.session, timeout=self.outbox.timeout)
+        return response is not None and response.ok
+        
+    def post(self, content: str, embeds: List[Dict] = None, session: requests.Session = None,
+             timeout: Tuple[float, float] = (3.05, 10.0)) -> Optional[requests.Response]:
+        """디스코드 웹훅으로 메시지를 전송합니다. 네트워크 오류 시 None을 반환합니다."""
+        if not self.webhook_url:
+            return None
+            
         try:
             payload = {
                 "content": content,
@@ -28,12 +185,18 @@ class DiscordWebhook:
             if embeds:
                 payload["embeds"] = embeds
                 
-            response = requests.post(self.webhook_url, json=payload)
-            response.raise_for_status()
-            return True
+            started = time.perf_counter()
+            try:
+                response = (session or requests).post(self.webhook_url, json=payload, timeout=timeout)
+            finally:
+                DISCORD_SEND_LATENCY.observe(time.perf_counter() - started)
+            if response.status_code != 429:
+                response.raise_for_status()
+            return response
         except Exception as e:
+            DISCORD_SEND_FAILURES.inc()
             logging.error(f"Failed to send Discord message: {e}")
-            return False
+            return None
             
     def send_trading_alert(self, symbol: str, action: str, quantity: float, 
                           price: float, status: str, message: str = "") -> bool:
@@ -57,6 +220,18 @@ class DiscordWebhook:
             
         return self.send_message("", [embed])
         
+    def send_order_alert(self, order: Order, result: OrderResult) -> bool:
+        """주문 실행 결과 알림을 전송합니다."""
+        if result.success:
+            return self.send_trading_alert(
+                order.symbol, order.side.upper(), order.quantity, order.price, "success",
+                f"주문이 성공적으로 실행되었습니다. 주문 ID: {result.order_id or 'N/A'}"
+            )
+        return self.send_trading_alert(
+            order.symbol, order.side.upper(), order.quantity, order.price, "failed",
+            result.error or "Unknown error"
+        )
+        
     def send_error_alert(self, error_type: str, error_message: str, details: str = "") -> bool:
         """에러 알림을 전송합니다."""
         embed = {
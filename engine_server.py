@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Shared trading engine process
+여러 웹 워커(gunicorn)가 하나의 TradingEngine을 Unix 소켓으로 공유하도록 합니다.
+토큰, 거래소 클라이언트, 마켓 정보는 이 프로세스에만 존재합니다.
+"""
+
+import os
+import sys
+import time
+import logging
+from multiprocessing import Process
+from multiprocessing.managers import BaseManager
+
+DEFAULT_SOCKET_PATH = "data/engine.sock"  # 프로덕션 모드에서 ENGINE_SOCKET이 없을 때 사용
+
+ENGINE_METHODS = (
+    "process_tradingview_signal",
+    "process_tradingview_batch",
+    "refresh_clients",
+    "reload_config",
+    "get_portfolio_status",
+    "send_daily_report",
+    "get_execution",
+    "get_open_orders",
+)
+
+DEDUPLICATOR_METHODS = ("begin", "complete", "release")
+
+_engine = None
+_deduplicator = None
+
+
+def _get_engine():
+    """엔진 프로세스의 TradingEngine 인스턴스를 반환합니다."""
+    return _engine
+
+
+def _get_metrics_registry():
+    """엔진 프로세스의 메트릭 레지스트리를 반환합니다."""
+    from metrics import REGISTRY
+    return REGISTRY
+
+
+def _get_deduplicator():
+    """엔진 프로세스의 중복 시그널 캐시를 반환합니다. (모든 워커가 공유)"""
+    return _deduplicator
+
+
+class EngineManager(BaseManager):
+    """TradingEngine과 공유 상태를 원격 프록시로 노출하는 매니저"""
+
+
+EngineManager.register("get_engine", callable=_get_engine, exposed=ENGINE_METHODS)
+EngineManager.register("get_deduplicator", callable=_get_deduplicator, exposed=DEDUPLICATOR_METHODS)
+EngineManager.register("get_metrics", callable=_get_metrics_registry, exposed=("snapshot",))
+
+
+def get_authkey() -> bytes:
+    """엔진 소켓 인증 키를 가져옵니다."""
+    return os.getenv("ENGINE_AUTHKEY", os.getenv("SECRET_KEY", "tradingbot_secret_key_2024")).encode("utf-8")
+
+
+def serve_engine(socket_path: str):
+    """TradingEngine을 생성하고 Unix 소켓으로 요청을 처리합니다. (블로킹)"""
+    global _engine, _deduplicator
+
+    from config_manager import ConfigManager
+    from discord_webhook import DiscordWebhook
+    from trading_engine import TradingEngine
+    from signal_queue import SignalQueue, SignalWorkerPool
+    from idempotency import SignalDeduplicator
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - engine - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('trading_bot.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+    config_manager = ConfigManager()
+    discord_webhook = DiscordWebhook(config_manager)
+    _engine = TradingEngine(config_manager, discord_webhook)
+    _deduplicator = SignalDeduplicator(
+        ttl_seconds=config_manager.get_idempotency_ttl(),
+        max_entries=config_manager.get_idempotency_max_entries(),
+        store_path=config_manager.get_idempotency_store_path()
+    )
+
+    # 큐 모드에서는 큐 워커도 엔진 프로세스에서 한 번만 실행
+    if config_manager.get_webhook_ingress_mode() == "queue":
+        signal_queue = SignalQueue(config_manager.get_signal_queue_path())
+        SignalWorkerPool(
+            signal_queue,
+            lambda payload: (_engine.process_tradingview_batch(payload["signals"])
+                             if "signals" in payload else _engine.process_tradingview_signal(payload)),
+            config_manager.get_signal_worker_count(),
+            config_manager.get_signal_park_attempts()
+        ).start()
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    directory = os.path.dirname(socket_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    manager = EngineManager(address=socket_path, authkey=get_authkey())
+    server = manager.get_server()
+    os.chmod(socket_path, 0o600)
+    logging.info(f"Trading engine serving on {socket_path}")
+    server.serve_forever()
+
+
+def start_engine_process(socket_path: str, timeout: float = 60.0) -> Process:
+    """엔진 프로세스를 시작하고 소켓이 준비될 때까지 기다립니다."""
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    process = Process(target=serve_engine, args=(socket_path,), name="trading-engine", daemon=True)
+    process.start()
+
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(socket_path):
+        if not process.is_alive():
+            raise RuntimeError("Trading engine process exited during startup")
+        if time.monotonic() > deadline:
+            process.terminate()
+            raise TimeoutError(f"Trading engine did not start within {timeout}s")
+        time.sleep(0.1)
+
+    logging.info(f"Trading engine process started (pid {process.pid})")
+    return process
+
+
+def connect_engine(socket_path: str, timeout: float = 60.0) -> EngineManager:
+    """엔진 프로세스에 연결합니다. get_engine()/get_deduplicator()/get_metrics()로 프록시를 얻습니다."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            manager = EngineManager(address=socket_path, authkey=get_authkey())
+            manager.connect()
+            logging.info(f"Connected to shared trading engine at {socket_path}")
+            return manager
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Could not connect to trading engine at {socket_path}: {e}")
+            time.sleep(0.2)
+
+
+if __name__ == "__main__":
+    serve_engine(sys.argv[1] if len(sys.argv) > 1 else os.getenv("ENGINE_SOCKET", DEFAULT_SOCKET_PATH))
@@ -1,106 +1,169 @@
 import ccxt
-import requests
 import json
 import hmac
 import hashlib
 import base64
 import time
 from datetime import datetime
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple
 import logging
 from config_manager import ConfigManager
+from market_cache import get_market_cache
+from client_registry import ClientRegistry
+from kis_token_store import KISTokenStore, get_kis_token_store
+from http_transport import get_http_transport
+from market_feed import get_market_feed
+from circuit_breaker import configure_circuit_breakers, get_circuit_breaker, raise_for_venue_status
+from rate_limiter import (PRIORITY_BALANCE, PRIORITY_ORDER, PRIORITY_QUOTE, credential_id,
+                          get_rate_limiter)
 
 class ExchangeClients:
-    def __init__(self, config_manager: ConfigManager):
+    EXCHANGES = ("binance", "upbit", "bybit", "okx", "bitget")
+    ccxt_module = ccxt  # 비동기 백엔드는 ccxt.async_support
+    
+    def __init__(self, config_manager: ConfigManager, market_feed: bool = True):
         self.config_manager = config_manager
-        self.clients = {}
+        self.registry = ClientRegistry(self._build_client, label="Exchange", on_discard=self._discard_client)
+        self.transport = self._create_transport()
+        self.request_timeout_ms = int(config_manager.get_http_timeout()[1] * 1000)  # CCXT 요청 타임아웃
+        get_rate_limiter("kis", config_manager.get_kis_rate_limit())
+        configure_circuit_breakers(config_manager.get_circuit_breaker_settings())
+        self.market_cache = get_market_cache(
+            config_manager.get_market_cache_dir(),
+            config_manager.get_market_cache_ttl()
+        )
+        self.market_feed = None
+        if market_feed and config_manager.is_market_feed_enabled():
+            self.market_feed = get_market_feed(
+                config_manager.get_market_feed_urls(),
+                config_manager.get_market_feed_max_age(),
+                config_manager.get_market_feed_record_path()
+            )
+            for venue, symbol in config_manager.get_market_feed_symbols():
+                self.market_feed.watch(venue, symbol)
         self._initialize_clients()
         
-    def _initialize_clients(self):
-        """거래소 클라이언트들을 초기화합니다."""
-        self._init_binance()
-        self._init_upbit()
-        self._init_bybit()
-        self._init_okx()
-        self._init_bitget()
+    @property
+    def clients(self):
+        """거래소 -> 클라이언트 읽기 전용 뷰"""
+        return self.registry.view
+        
+    def _create_transport(self):
+        """KIS/업비트 REST 호출이 공유하는 전송 계층을 설정대로 만듭니다."""
+        return get_http_transport(
+            *self.config_manager.get_http_timeout(),
+            pool_size=self.config_manager.get_http_pool_size(),
+            keepalive_interval=self.config_manager.get_http_keepalive_interval()
+        )
+        
+    def _initialize_clients(self) -> Dict[str, List[str]]:
+        """설정이 바뀐 거래소 클라이언트만 (다시) 생성합니다."""
+        configs = {exchange: self.config_manager.get_exchange_config(exchange) for exchange in self.EXCHANGES}
+        changes = self.registry.sync({exchange: config for exchange, config in configs.items()
+                                      if config.get("key") and config.get("secret")})
+        self._prewarm_markets(changes["added"] + changes["updated"])
+        if "upbit" in changes["added"]:
+            self.transport.prewarm([self.clients["upbit"].base_url])
+        return changes
+        
+    def _prewarm_markets(self, exchanges: List[str]):
+        """새로 만든 CCXT 클라이언트에 캐시된 마켓 정보를 주입하고, 없거나 만료된 것은 백그라운드에서 받습니다."""
+        for exchange in exchanges:
+            client = self.clients.get(exchange)
+            if hasattr(client, "load_markets"):  # 업비트 커스텀 클라이언트 제외
+                self._attach_markets(exchange, client)
+        self.market_cache.prewarm()
+        
+    def _attach_markets(self, exchange: str, client):
+        """캐시된 마켓 정보를 클라이언트에 주입하고 갱신 대상으로 등록합니다."""
+        self.market_cache.attach(exchange, client)
+        
+    def _discard_client(self, exchange: str, client):
+        """교체/제거된 클라이언트를 정리합니다. (동기 클라이언트는 정리할 자원 없음)"""
+        pass
+        
+    def _build_client(self, exchange: str, config: Dict[str, Any]):
+        """거래소 클라이언트를 생성합니다. 필요한 설정이 없으면 None"""
+        builder = getattr(self, f"_init_{exchange}")
+        return builder(config)
         
-    def _init_binance(self):
+    def create_kis_client(self, app_key: str, app_secret: str, account_number: str, account_code: str,
+                          token_store: KISTokenStore = None, name: str = "kis") -> "KISClient":
+        """이 백엔드의 전송 계층을 쓰는 KIS 계좌 클라이언트를 생성합니다. (name: 서킷 브레이커 이름)"""
+        return KISClient(app_key, app_secret, account_number, account_code, token_store=token_store, name=name)
+        
+    def _init_binance(self, config: Dict[str, Any]):
         """바이낸스 클라이언트 초기화"""
-        try:
-            config = self.config_manager.get_exchange_config("binance")
-            if config.get("key") and config.get("secret"):
-                self.clients["binance"] = ccxt.binance({
-                    'apiKey': config["key"],
-                    'secret': config["secret"],
-                    'sandbox': False,
-                    'enableRateLimit': True,
-                })
-                logging.info("Binance client initialized")
-        except Exception as e:
-            logging.error(f"Failed to initialize Binance client: {e}")
-            
-    def _init_upbit(self):
+        client = self.ccxt_module.binance({
+            'apiKey': config["key"],
+            'secret': config["secret"],
+            'sandbox': False,
+            'enableRateLimit': True,
+            'timeout': self.request_timeout_ms,
+            # 주문 추적기가 계좌 전체 미체결 주문을 한 번에 조회
+            'options': {'warnOnFetchOpenOrdersWithoutSymbol': False},
+        })
+        logging.info("Binance client initialized")
+        return client
+        
+    def _init_upbit(self, config: Dict[str, Any]):
         """업비트 클라이언트 초기화"""
-        try:
-            config = self.config_manager.get_exchange_config("upbit")
-            if config.get("key") and config.get("secret"):
-                # 업비트는 CCXT로 직접 지원하지 않으므로 커스텀 클라이언트 사용
-                self.clients["upbit"] = UpbitClient(config["key"], config["secret"])
-                logging.info("Upbit client initialized")
-        except Exception as e:
-            logging.error(f"Failed to initialize Upbit client: {e}")
-            
-    def _init_bybit(self):
+        # 업비트는 CCXT로 직접 지원하지 않으므로 커스텀 클라이언트 사용
+        client = UpbitClient(config["key"], config["secret"])
+        logging.info("Upbit client initialized")
+        return client
+        
+    def _init_bybit(self, config: Dict[str, Any]):
         """바이비트 클라이언트 초기화"""
-        try:
-            config = self.config_manager.get_exchange_config("bybit")
-            if config.get("key") and config.get("secret"):
-                self.clients["bybit"] = ccxt.bybit({
-                    'apiKey': config["key"],
-                    'secret': config["secret"],
-                    'sandbox': False,
-                    'enableRateLimit': True,
-                })
-                logging.info("Bybit client initialized")
-        except Exception as e:
-            logging.error(f"Failed to initialize Bybit client: {e}")
-            
-    def _init_okx(self):
+        client = self.ccxt_module.bybit({
+            'apiKey': config["key"],
+            'secret': config["secret"],
+            'sandbox': False,
+            'enableRateLimit': True,
+            'timeout': self.request_timeout_ms,
+        })
+        logging.info("Bybit client initialized")
+        return client
+        
+    def _init_okx(self, config: Dict[str, Any]):
         """OKX 클라이언트 초기화"""
-        try:
-            config = self.config_manager.get_exchange_config("okx")
-            if config.get("key") and config.get("secret") and config.get("passphrase"):
-                self.clients["okx"] = ccxt.okx({
-                    'apiKey': config["key"],
-                    'secret': config["secret"],
-                    'password': config["passphrase"],
-                    'sandbox': False,
-                    'enableRateLimit': True,
-                })
-                logging.info("OKX client initialized")
-        except Exception as e:
-            logging.error(f"Failed to initialize OKX client: {e}")
-            
-    def _init_bitget(self):
+        if not config.get("passphrase"):
+            return None
+        client = self.ccxt_module.okx({
+            'apiKey': config["key"],
+            'secret': config["secret"],
+            'password': config["passphrase"],
+            'sandbox': False,
+            'enableRateLimit': True,
+            'timeout': self.request_timeout_ms,
+        })
+        logging.info("OKX client initialized")
+        return client
+        
+    def _init_bitget(self, config: Dict[str, Any]):
         """비트겟 클라이언트 초기화"""
-        try:
-            config = self.config_manager.get_exchange_config("bitget")
-            if config.get("key") and config.get("secret") and config.get("passphrase"):
-                self.clients["bitget"] = ccxt.bitget({
-                    'apiKey': config["key"],
-                    'secret': config["secret"],
-                    'password': config["passphrase"],
-                    'sandbox': config.get("demo", False),
-                    'enableRateLimit': True,
-                })
-                logging.info("Bitget client initialized")
-        except Exception as e:
-            logging.error(f"Failed to initialize Bitget client: {e}")
-            
+        if not config.get("passphrase"):
+            return None
+        client = self.ccxt_module.bitget({
+            'apiKey': config["key"],
+            'secret': config["secret"],
+            'password': config["passphrase"],
+            'sandbox': config.get("demo", False),
+            'enableRateLimit': True,
+            'timeout': self.request_timeout_ms,
+        })
+        logging.info("Bitget client initialized")
+        return client
+        
     def get_client(self, exchange: str):
         """거래소 클라이언트를 가져옵니다."""
         return self.clients.get(exchange.lower())
         
+    @staticmethod
+    def _guarded(exchange: str, func, *args) -> Any:
+        """거래소 호출을 거래소별 서킷 브레이커로 감쌉니다. 회로가 열려 있으면 CircuitOpenError"""
+        return get_circuit_breaker(exchange.lower()).call(func, *args)
+        
     def get_balance(self, exchange: str) -> Optional[Dict]:
         """잔고를 조회합니다."""
         try:
@@ -109,9 +172,9 @@ class ExchangeClients:
                 return None
                 
             if exchange.lower() == "upbit":
-                return client.get_balance()
+                return self._guarded(exchange, client.get_balance)
             else:
-                return client.fetch_balance()
+                return self._guarded(exchange, client.fetch_balance)
         except Exception as e:
             logging.error(f"Failed to get balance from {exchange}: {e}")
             return None
@@ -125,41 +188,90 @@ class ExchangeClients:
                 return None
                 
             if exchange.lower() == "upbit":
-                return client.create_order(symbol, side, amount, price, order_type)
+                return self._guarded(exchange, client.create_order, symbol, side, amount, price, order_type)
             else:
-                return client.create_order(symbol, order_type, side, amount, price)
+                return self._guarded(exchange, client.create_order, symbol, order_type, side, amount, price)
         except Exception as e:
             logging.error(f"Failed to create order on {exchange}: {e}")
             return None
             
+    def fetch_open_orders(self, exchange: str, symbol: str = None) -> Optional[List[Dict]]:
+        """미체결 주문 목록을 가져옵니다. (symbol이 없으면 계좌 전체)"""
+        try:
+            client = self.get_client(exchange)
+            if not client:
+                return None
+                
+            if exchange.lower() == "upbit":
+                return self._guarded(exchange, client.get_orders, "wait", symbol)
+            else:
+                return self._guarded(exchange, client.fetch_open_orders, symbol)
+        except Exception as e:
+            logging.error(f"Failed to fetch open orders from {exchange}: {e}")
+            return None
+            
+    def fetch_order(self, exchange: str, order_id: str, symbol: str) -> Optional[Dict]:
+        """주문 하나의 상태를 가져옵니다."""
+        try:
+            client = self.get_client(exchange)
+            if not client:
+                return None
+                
+            if exchange.lower() == "upbit":
+                return self._guarded(exchange, client.get_order, order_id)
+            else:
+                return self._guarded(exchange, client.fetch_order, order_id, symbol)
+        except Exception as e:
+            logging.error(f"Failed to fetch order {order_id} from {exchange}: {e}")
+            return None
+            
     def get_ticker(self, exchange: str, symbol: str) -> Optional[Dict]:
-        """티커 정보를 가져옵니다."""
+        """티커 정보를 가져옵니다. WebSocket 시세가 있으면 메모리에서, 없으면 REST로 조회합니다."""
         try:
             client = self.get_client(exchange)
             if not client:
                 return None
                 
+            ticker = self.market_feed.get_ticker(exchange.lower(), symbol) if self.market_feed else None
+            if ticker is not None:
+                return ticker
             if exchange.lower() == "upbit":
-                return client.get_ticker(symbol)
+                return self._guarded(exchange, client.get_ticker, symbol)
             else:
-                return client.fetch_ticker(symbol)
+                return self._guarded(exchange, client.fetch_ticker, symbol)
         except Exception as e:
             logging.error(f"Failed to get ticker from {exchange}: {e}")
             return None
             
-    def refresh_clients(self):
-        """클라이언트들을 새로고침합니다."""
-        self.clients.clear()
-        self._initialize_clients()
+    def watch_market(self, exchange: str, symbol: str):
+        """거래하는 종목의 WebSocket 시세와 호가창을 구독합니다. (피드를 쓰지 않으면 무시)"""
+        if self.market_feed is not None:
+            self.market_feed.watch(exchange.lower(), symbol)
+            self.market_feed.watch_book(exchange.lower(), symbol)
+
+    def get_order_book(self, exchange: str, symbol: str):
+        """동기화된 로컬 호가창(OrderBook)을 반환합니다. 피드를 쓰지 않거나 아직 동기화되지 않았으면 None"""
+        if self.market_feed is None:
+            return None
+        return self.market_feed.get_book(exchange.lower(), symbol)
+            
+    def refresh_clients(self) -> Dict[str, List[str]]:
+        """설정이 바뀐 클라이언트만 다시 만들고 변경 내역을 반환합니다."""
+        return self._initialize_clients()
 
 
 class UpbitClient:
     """업비트 전용 클라이언트"""
     
+    BASE_URL = "https://api.upbit.com"
+    
     def __init__(self, access_key: str, secret_key: str):
         self.access_key = access_key
         self.secret_key = secret_key
-        self.base_url = "https://api.upbit.com"
+        self.base_url = self.BASE_URL
+        self.transport = get_http_transport()
+        self.rate_limiter = get_rate_limiter("upbit")
+        self.credential = credential_id(access_key)
         
     def _generate_signature(self, query_string: str = "") -> str:
         """JWT 토큰을 생성합니다."""
@@ -176,10 +288,21 @@ class UpbitClient:
             
         return jwt.encode(payload, self.secret_key, algorithm='HS256')
         
-    def _request(self, method: str, endpoint: str, params: Dict = None) -> Dict:
-        """API 요청을 보냅니다."""
-        url = f"{self.base_url}{endpoint}"
+    def _request(self, method: str, endpoint: str, params: Dict = None,
+                 priority: int = PRIORITY_BALANCE, signed: bool = True) -> Dict:
+        """API 요청을 보냅니다. 엔드포인트 그룹별 요청 한도를 우선순위 순으로 지킵니다."""
+        self.rate_limiter.acquire(self.credential, self._endpoint_group(method, endpoint), priority)
+        url, kwargs = self._prepare(method, endpoint, params, signed)
+        response = self.transport.request(method.upper(), url, **kwargs)
+        raise_for_venue_status("upbit", response)  # 점검/장애는 서킷 브레이커가 실패로 집계
+        return response.json()
         
+    def _prepare(self, method: str, endpoint: str, params: Dict = None,
+                 signed: bool = True) -> Tuple[str, Dict[str, Any]]:
+        """서명 헤더를 붙인 요청 URL과 전송 인자를 만듭니다. (시세 같은 공개 API는 서명 생략)"""
+        url = f"{self.base_url}{endpoint}"
+        if not signed:
+            return url, {"params": params, "headers": {'Accept': 'application/json'}}
         if params:
             query_string = "&".join([f"{k}={v}" for k, v in params.items()])
         else:
@@ -191,11 +314,17 @@ class UpbitClient:
         }
         
         if method.upper() == "GET":
-            response = requests.get(url, params=params, headers=headers)
-        else:
-            response = requests.post(url, json=params, headers=headers)
-            
-        return response.json()
+            return url, {"params": params, "headers": headers}
+        return url, {"json": params, "headers": headers}
+        
+    @staticmethod
+    def _endpoint_group(method: str, endpoint: str) -> str:
+        """업비트 요청 수 제한 그룹"""
+        if endpoint in ("/v1/orders", "/v1/order") and method.upper() in ("POST", "DELETE"):
+            return "order"
+        if endpoint.startswith(("/v1/ticker", "/v1/orderbook", "/v1/trades", "/v1/candles")):
+            return "quotation"
+        return "exchange"
         
     def get_balance(self) -> Dict:
         """잔고를 조회합니다."""
@@ -204,11 +333,23 @@ class UpbitClient:
     def get_ticker(self, symbol: str) -> Dict:
         """티커 정보를 가져옵니다."""
         params = {"markets": symbol}
-        return self._request("GET", "/v1/ticker", params)
+        return self._request("GET", "/v1/ticker", params, priority=PRIORITY_QUOTE, signed=False)
+        
+    def get_orders(self, state: str = "wait", symbol: str = None) -> List[Dict]:
+        """상태별 주문 목록을 조회합니다."""
+        params = {"state": state}
+        if symbol:
+            params["market"] = symbol
+        return self._request("GET", "/v1/orders", params)
+        
+    def get_order(self, uuid: str) -> Dict:
+        """주문 하나를 조회합니다."""
+        return self._request("GET", "/v1/order", {"uuid": uuid})
         
     def create_order(self, symbol: str, side: str, amount: float, 
                     price: float = None, order_type: str = "market") -> Dict:
-        """주문을 생성합니다."""
+        """주문을 생성합니다. side는 buy/sell 또는 업비트 형식(bid/ask)"""
+        side = {"buy": "bid", "sell": "ask"}.get(side.lower(), side)
         params = {
             "market": symbol,
             "side": side,
@@ -220,65 +361,112 @@ class UpbitClient:
             params["volume"] = str(amount)
         else:  # market order
             if side == "bid":  # 매수
+                params["ord_type"] = "price"  # 업비트 시장가 매수 주문 유형
                 params["price"] = str(amount)  # 매수는 총 가격
             else:  # 매도
                 params["volume"] = str(amount)  # 매도는 수량
                 
-        return self._request("POST", "/v1/orders", params)
+        return self._request("POST", "/v1/orders", params, priority=PRIORITY_ORDER)
 
 
 class KISClient:
     """한국투자증권 API 클라이언트"""
     
-    def __init__(self, app_key: str, app_secret: str, account_number: str, account_code: str):
+    BASE_URL = "https://openapi.koreainvestment.com:9443"
+    EXPIRED_TOKEN_CODES = ("EGW00121", "EGW00123")  # 유효하지 않은/만료된 토큰
+    MAX_PAGES = 20  # 연속 조회 최대 페이지 수
+    NO_TOKEN_CODE = "TOKEN_UNAVAILABLE"  # 토큰이 없어 요청을 보내지 않았을 때의 msg_cd
+    
+    def __init__(self, app_key: str, app_secret: str, account_number: str, account_code: str,
+                 token_store: KISTokenStore = None, name: str = "kis"):
         self.app_key = app_key
         self.app_secret = app_secret
         self.account_number = account_number
         self.account_code = account_code
-        self.base_url = "https://openapi.koreainvestment.com:9443"
-        self.access_token = None
-        self._get_access_token()
+        self.base_url = self.BASE_URL
+        self.transport = get_http_transport()
+        self.rate_limiter = get_rate_limiter("kis")
+        self.credential = credential_id(app_key)  # 요청 한도는 앱 키 단위
+        self.breaker = get_circuit_breaker(name)  # 장애 차단은 계좌 단위
+        # 토큰은 생성 시 발급하지 않고 저장소가 첫 사용 시/만료 전에 발급
+        self.token_store = token_store or get_kis_token_store()
+        self.token_store.register(app_key, self._request_access_token)
+
+    def release_token(self):
+        """토큰 저장소에서 이 클라이언트의 발급 함수를 내립니다. (계좌 제거/교체 시)"""
+        self.token_store.unregister(self.app_key, self._request_access_token)
         
-    def _get_access_token(self):
-        """액세스 토큰을 발급받습니다."""
-        try:
-            url = f"{self.base_url}/oauth2/tokenP"
-            data = {
-                "grant_type": "client_credentials",
-                "appkey": self.app_key,
-                "appsecret": self.app_secret
-            }
-            
-            response = requests.post(url, json=data)
-            result = response.json()
-            
-            if result.get("access_token"):
-                self.access_token = result["access_token"]
-                logging.info("KIS access token obtained")
-            else:
-                logging.error(f"Failed to get KIS access token: {result}")
-        except Exception as e:
-            logging.error(f"Error getting KIS access token: {e}")
+    @property
+    def access_token(self) -> Optional[str]:
+        """유효한 액세스 토큰 (토큰 저장소에서 가져옴)"""
+        return self.token_store.get(self.app_key)
+        
+    def _request_access_token(self) -> Tuple[str, float]:
+        """액세스 토큰을 발급받아 (토큰, 만료 시각)을 반환합니다."""
+        url = f"{self.base_url}/oauth2/tokenP"
+        data = {
+            "grant_type": "client_credentials",
+            "appkey": self.app_key,
+            "appsecret": self.app_secret
+        }
+        
+        response = self.transport.request("POST", url, json=data)
+        result = response.json()
+        
+        if not result.get("access_token"):
+            raise RuntimeError(f"Failed to get KIS access token: {result}")
+        logging.info("KIS access token obtained")
+        return result["access_token"], time.time() + float(result.get("expires_in") or 86400)
             
-    def _request(self, method: str, endpoint: str, tr_id: str, data: Dict = None) -> Dict:
-        """API 요청을 보냅니다."""
-        url = f"{self.base_url}{endpoint}"
+    def _request(self, method: str, endpoint: str, tr_id: str, data: Dict = None,
+                 priority: int = PRIORITY_BALANCE, tr_cont: str = "") -> Dict:
+        """API 요청을 보냅니다. 계좌 회로가 열려 있으면 요청 한도를 기다리지 않고 바로 CircuitOpenError"""
+        return self.breaker.call(self._send, method, endpoint, tr_id, data, priority, tr_cont=tr_cont)
+        
+    def _send(self, method: str, endpoint: str, tr_id: str, data: Dict = None,
+              priority: int = PRIORITY_BALANCE, retry: bool = True, tr_cont: str = "") -> Dict:
+        """
+        앱 키별 요청 한도를 우선순위 순으로 지키며 요청을 보내고,
+        토큰 만료로 거부되면 토큰을 다시 받아 한 번 재시도합니다.
+        """
+        access_token = self.access_token
+        if not access_token:
+            return self._no_token_result()
+        self.rate_limiter.acquire(self.credential, "default", priority)
+        url, kwargs = self._prepare(method, endpoint, tr_id, data, access_token, tr_cont)
+        response = self.transport.request(method.upper(), url, **kwargs)
+        raise_for_venue_status(self.breaker.name, response)  # 점검/장애는 계좌 서킷 브레이커가 실패로 집계
         
+        result = response.json()
+        if retry and result.get("msg_cd") in self.EXPIRED_TOKEN_CODES:
+            self.token_store.invalidate(self.app_key)
+            return self._send(method, endpoint, tr_id, data, priority, retry=False, tr_cont=tr_cont)
+        result["tr_cont"] = response.headers.get("tr_cont", "")  # 연속 조회 여부 (F/M: 다음 페이지 있음)
+        return result
+        
+    def _no_token_result(self) -> Dict:
+        """토큰 발급에 실패해 요청을 보내지 않았을 때의 KIS 형식 오류 응답"""
+        logging.error("KIS access token unavailable, request not sent")
+        return {"rt_cd": "1", "msg_cd": self.NO_TOKEN_CODE, "msg1": "KIS access token unavailable"}
+        
+    def _prepare(self, method: str, endpoint: str, tr_id: str, data: Dict,
+                 access_token: Optional[str], tr_cont: str = "") -> Tuple[str, Dict[str, Any]]:
+        """인증 헤더를 붙인 요청 URL과 전송 인자를 만듭니다."""
+        url = f"{self.base_url}{endpoint}"
         headers = {
             "Content-Type": "application/json; charset=utf-8",
-            "authorization": f"Bearer {self.access_token}",
+            "authorization": f"Bearer {access_token}",
             "appkey": self.app_key,
             "appsecret": self.app_secret,
             "tr_id": tr_id,
         }
+        if tr_cont:
+            headers["tr_cont"] = tr_cont  # 연속 조회 요청
         
         if method.upper() == "GET":
-            response = requests.get(url, headers=headers, params=data)
-        else:
-            headers["custtype"] = "P"  # 개인
-            response = requests.post(url, headers=headers, json=data)
-            
-        return response.json()
+            return url, {"headers": headers, "params": data}
+        headers["custtype"] = "P"  # 개인
+        return url, {"headers": headers, "json": data}
         
     def get_balance(self) -> Dict:
         """잔고를 조회합니다."""
@@ -314,7 +502,58 @@ class KISClient:
         else:
             tr_id = "VTTC0801U"  # 주식 현금 매도 주문
             
-        return self._request("POST", "/uapi/domestic-stock/v1/trading/order-cash", tr_id, data)
+        return self._request("POST", "/uapi/domestic-stock/v1/trading/order-cash", tr_id, data,
+                             priority=PRIORITY_ORDER)
+        
+    def get_daily_orders(self) -> Dict:
+        """당일 주문/체결 내역을 조회합니다. (미체결, 체결, 취소 주문 전체)"""
+        today = datetime.now().strftime("%Y%m%d")
+        data = {
+            "CANO": self.account_number,
+            "ACNT_PRDT_CD": self.account_code,
+            "INQR_STRT_DT": today,
+            "INQR_END_DT": today,
+            "SLL_BUY_DVSN_CD": "00",
+            "INQR_DVSN": "00",
+            "PDNO": "",
+            "CCLD_DVSN": "00",
+            "ORD_GNO_BRNO": "",
+            "ODNO": "",
+            "INQR_DVSN_3": "00",
+            "INQR_DVSN_1": "",
+            "CTX_AREA_FK100": "",
+            "CTX_AREA_NK100": ""
+        }
+        
+        return self._request_pages("GET", "/uapi/domestic-stock/v1/trading/inquire-daily-ccld", "VTTC8001R", data)
+        
+    def _request_pages(self, method: str, endpoint: str, tr_id: str, data: Dict) -> Dict:
+        """연속 조회 키(ctx_area_fk100/nk100)를 따라 마지막 페이지까지 조회하고 output1을 합칩니다."""
+        result = self._request(method, endpoint, tr_id, data)
+        if result.get("rt_cd") != "0":
+            return result
+        rows = list(result.get("output1") or [])
+        for _ in range(self.MAX_PAGES - 1):
+            data = self._next_page(result, data)
+            if data is None:
+                break
+            result = self._request(method, endpoint, tr_id, data, tr_cont="N")
+            if result.get("rt_cd") != "0":
+                return result  # 중간 페이지 실패는 전체 실패로 처리
+            rows.extend(result.get("output1") or [])
+        result["output1"] = rows
+        return result
+        
+    @staticmethod
+    def _next_page(result: Dict, data: Dict) -> Optional[Dict]:
+        """다음 페이지 요청 데이터. 마지막 페이지이거나 연속 조회 키가 없으면 None"""
+        if result.get("rt_cd") != "0" or result.get("tr_cont") not in ("F", "M"):
+            return None
+        fk100 = (result.get("ctx_area_fk100") or "").strip()
+        nk100 = (result.get("ctx_area_nk100") or "").strip()
+        if not nk100 or (fk100, nk100) == (data.get("CTX_AREA_FK100"), data.get("CTX_AREA_NK100")):
+            return None
+        return {**data, "CTX_AREA_FK100": fk100, "CTX_AREA_NK100": nk100}
         
     def get_current_price(self, symbol: str) -> Dict:
         """현재가를 조회합니다."""
@@ -323,4 +562,5 @@ class KISClient:
             "FID_INPUT_ISCD": symbol,
         }
         
-        return self._request("GET", "/uapi/domestic-stock/v1/quotations/inquire-price", "FHKST01010100", data)
+        return self._request("GET", "/uapi/domestic-stock/v1/quotations/inquire-price", "FHKST01010100", data,
+                             priority=PRIORITY_QUOTE)
@@ -0,0 +1,301 @@
+"""
+Execution algorithms for the Trading Bot
+큰 주문(부모 주문)을 시간(TWAP) 또는 노출 수량(아이스버그) 기준으로 자식 주문으로 나누어 집행합니다.
+모든 부모 주문은 하나의 타이머 스레드(힙)에서 예약되며, 자식 주문 전송은 작은 스레드 풀에서 실행됩니다.
+지정가 자식 주문은 주문 추적기의 체결/종료 통지로 체결 수량을 갱신하며,
+체결되지 않고 취소된 수량은 다시 나누어 집행합니다.
+"""
+
+import heapq
+import math
+import time
+import uuid
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models import AlgoSpec, Order, OrderResult
+
+# 부모 주문 상태
+STATUS_WORKING = "working"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+# 자식 주문 상태
+CHILD_OPEN = "open"            # 거래소에 걸려 있음 (체결 대기)
+CHILD_FILLED = "filled"
+CHILD_CANCELLED = "cancelled"  # 일부만 체결되었거나 체결 없이 종료
+CHILD_FAILED = "failed"        # 전송 실패/거부
+
+# 최근 통지 중 아직 등록되지 않은 자식 주문의 것을 보관할 최대 개수
+MAX_UNCLAIMED_UPDATES = 1000
+
+
+class ParentOrder:
+    """분할 집행 중인 부모 주문과 자식 주문 상태"""
+
+    def __init__(self, order: Order, algo: AlgoSpec):
+        self.parent_id = uuid.uuid4().hex[:12]
+        self.order = order
+        self.algo = algo
+        self.whole_units = order.is_kis  # 주식은 정수 수량
+        self.children: List[Dict[str, Any]] = []
+        self.in_flight = False  # 자식 주문이 예약되었거나 전송 중
+        self.status = STATUS_WORKING
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.consecutive_failures = 0
+
+    @property
+    def sent_quantity(self) -> float:
+        """거래소가 접수한 자식 주문 수량 합계"""
+        return sum(child["quantity"] for child in self.children if child["success"])
+
+    @property
+    def filled_quantity(self) -> float:
+        """자식 주문 체결 수량 합계"""
+        return sum(child["filled"] for child in self.children)
+
+    @property
+    def open_quantity(self) -> float:
+        """걸려 있는 자식 주문의 미체결 수량"""
+        return sum(child["quantity"] - child["filled"] for child in self.children if child["status"] == CHILD_OPEN)
+
+    @property
+    def remaining(self) -> float:
+        """아직 자식 주문으로 보내지 않은 수량 (취소된 자식 주문의 미체결분 포함)"""
+        return max(0.0, self.order.quantity - self.filled_quantity - self.open_quantity)
+
+    def next_child_quantity(self) -> float:
+        """다음 자식 주문 수량을 계산합니다."""
+        remaining = self.remaining
+        if self.algo.kind == "twap":
+            slices_left = max(1, self.algo.slices - self._accepted_children())
+            quantity = remaining / slices_left
+        else:
+            quantity = min(self.algo.display_quantity, remaining)
+
+        if self.whole_units:
+            quantity = max(1, math.floor(quantity)) if remaining >= 1 else 0
+        return min(quantity, remaining)
+
+    def next_due(self, now: float) -> float:
+        """다음 자식 주문 예정 시각(time.monotonic 기준)을 계산합니다."""
+        if self.algo.kind == "twap":
+            interval = self.algo.duration / self.algo.slices
+            if self.consecutive_failures:
+                return now + interval  # 실패한 조각은 한 간격 뒤 재시도
+            return max(now, self.started + self._accepted_children() * interval)
+        return now + self.algo.interval
+
+    def _accepted_children(self) -> int:
+        return sum(1 for child in self.children if child["success"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "parent_id": self.parent_id,
+            "status": self.status,
+            "algo": self.algo.to_dict(),
+            "symbol": self.order.symbol,
+            "side": self.order.side,
+            "venue": self.order.venue,
+            "quantity": self.order.quantity,
+            "sent_quantity": self.sent_quantity,
+            "filled_quantity": self.filled_quantity,
+            "open_quantity": self.open_quantity,
+            "remaining_quantity": self.remaining,
+            "children": [dict(child) for child in self.children],
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+class ExecutionScheduler:
+    """여러 부모 주문을 하나의 타이머 루프에서 집행하는 스케줄러"""
+
+    def __init__(self, execute_child: Callable[[Order], OrderResult],
+                 on_finish: Optional[Callable[[ParentOrder], None]] = None,
+                 max_workers: int = 8, venue_interval: float = 0.2,
+                 max_child_failures: int = 3, keep_finished: int = 1000):
+        self.execute_child = execute_child
+        self.on_finish = on_finish
+        self.venue_interval = venue_interval  # 같은 계좌/거래소 자식 주문 간 최소 간격
+        self.max_child_failures = max_child_failures
+        self.keep_finished = keep_finished
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="exec-algo")
+        self._parents: "OrderedDict[str, ParentOrder]" = OrderedDict()
+        self._heap: List = []
+        self._sequence = 0
+        self._venue_next: Dict[str, float] = {}
+        # (계좌/거래소, 주문 ID) -> (부모 주문, 자식 주문) : 걸려 있는 지정가 자식 주문
+        self._open_children: Dict[Tuple[str, str], Tuple[ParentOrder, Dict[str, Any]]] = {}
+        self._unclaimed: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, order: Order, algo: AlgoSpec) -> ParentOrder:
+        """부모 주문을 등록하고 첫 자식 주문을 바로 예약합니다."""
+        parent = ParentOrder(order, algo)
+        with self._condition:
+            self._parents[parent.parent_id] = parent
+            self._evict_finished()
+            self._schedule(parent, time.monotonic())
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="exec-algo-timer", daemon=True)
+                self._thread.start()
+        logging.info(f"Execution {parent.parent_id} started: {algo.kind} {order.side} {order.quantity} "
+                     f"{order.symbol} on {order.venue}")
+        return parent
+
+    def get(self, parent_id: str) -> Optional[Dict[str, Any]]:
+        """부모 주문 상태를 반환합니다."""
+        parent = self._parents.get(parent_id)
+        return parent.to_dict() if parent else None
+
+    def active(self) -> List[Dict[str, Any]]:
+        """집행 중인 부모 주문 목록"""
+        return [parent.to_dict() for parent in list(self._parents.values()) if parent.status == STATUS_WORKING]
+
+    def cancel(self, parent_id: str) -> bool:
+        """남은 자식 주문을 취소합니다. (이미 전송된 자식 주문은 취소하지 않음)"""
+        with self._condition:
+            parent = self._parents.get(parent_id)
+            if parent is None or parent.status != STATUS_WORKING:
+                return False
+            self._finish(parent, STATUS_CANCELLED)
+        return True
+
+    def on_child_update(self, venue: str, order_id: str, filled: float, status: str):
+        """
+        주문 추적기가 알려 준 자식 주문의 누적 체결 수량과 상태(open/filled/cancelled)를 반영합니다.
+        체결 없이 끝난 수량은 다시 나누어 집행하고, 전량 체결되면 부모 주문을 완료합니다.
+        """
+        key = (venue, order_id)
+        with self._condition:
+            entry = self._open_children.get(key)
+            if entry is None:
+                # 자식 주문 등록 전에 도착한 통지 (추적 등록 직후 체결)
+                self._unclaimed[key] = (filled, status)
+                while len(self._unclaimed) > MAX_UNCLAIMED_UPDATES:
+                    self._unclaimed.popitem(last=False)
+                return
+            parent, child = entry
+            self._update_child(key, child, filled, status)
+            self._advance(parent)
+
+    def _update_child(self, key: Tuple[str, str], child: Dict[str, Any], filled: float, status: str):
+        """걸려 있는 자식 주문의 체결 상태를 갱신합니다. (락 보유)"""
+        child["filled"] = min(child["quantity"], max(child["filled"], filled))
+        if status != CHILD_OPEN:
+            child["status"] = CHILD_FILLED if child["filled"] >= child["quantity"] - 1e-12 else CHILD_CANCELLED
+            self._open_children.pop(key, None)
+
+    def _advance(self, parent: ParentOrder):
+        """체결/전송 결과에 따라 다음 자식 주문을 예약하거나 부모 주문을 종료합니다. (락 보유)"""
+        if parent.status != STATUS_WORKING or parent.in_flight:
+            return
+        if parent.order.quantity - parent.filled_quantity <= 1e-12:
+            self._finish(parent, STATUS_DONE)
+        elif parent.remaining > 1e-12 and parent.next_child_quantity() > 0:
+            self._schedule(parent, parent.next_due(time.monotonic()))
+        elif parent.open_quantity <= 1e-12:
+            self._finish(parent, STATUS_DONE)  # 더 나눌 수 없는 잔량만 남음
+        # 그 외에는 걸려 있는 자식 주문의 체결/취소 통지를 기다림
+
+    def _schedule(self, parent: ParentOrder, due: float):
+        """자식 주문을 예약합니다. 계좌/거래소별 간격을 지키도록 예약 시각을 미룹니다. (락 보유)"""
+        parent.in_flight = True
+        venue = parent.order.venue
+        due = max(due, self._venue_next.get(venue, 0.0))
+        self._venue_next[venue] = due + self.venue_interval
+        self._sequence += 1
+        heapq.heappush(self._heap, (due, self._sequence, parent))
+        self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    if self._heap and self._heap[0][0] <= now:
+                        _, _, parent = heapq.heappop(self._heap)
+                        break
+                    self._condition.wait(self._heap[0][0] - now if self._heap else None)
+
+            if parent.status == STATUS_WORKING:
+                self.executor.submit(self._run_child, parent)
+            else:
+                parent.in_flight = False
+
+    def _run_child(self, parent: ParentOrder):
+        """자식 주문 하나를 전송하고 다음 자식 주문을 예약합니다."""
+        quantity = parent.next_child_quantity()
+        index = len(parent.children)
+        child = parent.order.replace(quantity=quantity)
+
+        try:
+            result = self.execute_child(child)
+        except Exception as e:
+            result = OrderResult.failed(f"Child order error: {str(e)}", child)
+
+        sent = result.order if result.success and result.order is not None else child
+        resting = result.success and sent.order_type != "market"
+
+        with self._condition:
+            parent.in_flight = False
+            entry = {
+                "index": index,
+                "quantity": sent.quantity,  # 주문 규칙으로 반올림된 실제 전송 수량
+                "success": result.success,
+                "order_id": result.order_id,
+                "error": result.error,
+                "sent_at": time.time(),
+                # 시장가 자식 주문은 접수 즉시 체결로 봄, 지정가는 추적기 통지로 갱신
+                "status": CHILD_OPEN if resting else CHILD_FILLED if result.success else CHILD_FAILED,
+                "filled": sent.quantity if result.success and not resting else 0.0
+            }
+            parent.children.append(entry)
+            if resting:
+                key = (sent.venue, str(result.order_id))
+                self._open_children[key] = (parent, entry)
+                early = self._unclaimed.pop(key, None)
+                if early is not None:
+                    self._update_child(key, entry, *early)
+
+            if parent.status != STATUS_WORKING:
+                return  # 전송 중 취소됨
+
+            if result.success:
+                parent.consecutive_failures = 0
+            else:
+                parent.consecutive_failures += 1
+                if parent.consecutive_failures >= self.max_child_failures:
+                    parent.error = result.error
+                    self._finish(parent, STATUS_FAILED)
+                    return
+
+            self._advance(parent)
+
+    def _finish(self, parent: ParentOrder, status: str):
+        """부모 주문을 종료합니다. (락 보유)"""
+        parent.status = status
+        parent.finished_at = time.time()
+        logging.info(f"Execution {parent.parent_id} {status}: filled {parent.filled_quantity}/"
+                     f"{parent.order.quantity} (sent {parent.sent_quantity}) {parent.order.symbol}")
+        if self.on_finish is not None:
+            try:
+                self.on_finish(parent)
+            except Exception as e:
+                logging.error(f"Execution finish callback error: {e}")
+
+    def _evict_finished(self):
+        """오래된 완료 부모 주문을 제거합니다. (락 보유)"""
+        finished = [key for key, parent in self._parents.items() if parent.status != STATUS_WORKING]
+        for key in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._parents[key]
@@ -0,0 +1,50 @@
+"""
+Gunicorn configuration for the Trading Bot (production mode)
+웹 워커는 여러 개로 확장하고, TradingEngine은 별도 엔진 프로세스 하나만 실행합니다.
+
+실행: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+import shutil
+import multiprocessing
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = 5
+accesslog = "-"
+
+_engine_process = None
+
+
+def on_starting(server):
+    """워커 fork 전에 공유 엔진 프로세스를 시작합니다."""
+    global _engine_process
+    from engine_server import DEFAULT_SOCKET_PATH, start_engine_process
+
+    socket_path = os.getenv("ENGINE_SOCKET") or DEFAULT_SOCKET_PATH
+    _engine_process = start_engine_process(socket_path)
+
+    # 워커는 이 환경변수를 상속받아 엔진 프로세스에 연결합니다
+    os.environ["ENGINE_SOCKET"] = socket_path
+
+    # 워커별 메트릭 파일은 서버 시작마다 새로 모음 (카운터는 시작 이후 누적)
+    metrics_dir = os.getenv("METRICS_MULTIPROC_DIR") or "data/metrics"
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+    os.environ["METRICS_MULTIPROC_DIR"] = metrics_dir
+    server.log.info(f"Shared trading engine running (pid {_engine_process.pid}) at {socket_path}")
+
+
+def on_exit(server):
+    """gunicorn 종료 시 엔진 프로세스도 종료합니다."""
+    if _engine_process is not None and _engine_process.is_alive():
+        _engine_process.terminate()
+        _engine_process.join(timeout=10)
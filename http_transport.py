@@ -0,0 +1,136 @@
+"""
+HTTP transport for the Trading Bot
+KIS/업비트 REST 호출이 공유하는 호스트별 keep-alive 연결 풀입니다.
+주문마다 TCP/TLS 연결을 새로 맺지 않도록 호스트마다 requests.Session 하나를 재사용하고,
+연결/응답 타임아웃을 분리하여 응답 없는 소켓이 워커를 무한히 붙잡지 않게 합니다.
+시작 시 연결을 미리 맺어 두고(prewarm), 한동안 쓰지 않은 호스트는 주기적으로 연결을 유지합니다.
+"""
+
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class HttpTransport:
+    """호스트별 연결 풀과 요청 통계"""
+
+    def __init__(self, connect_timeout: float = 3.05, read_timeout: float = 10.0, pool_size: int = 32,
+                 keepalive_interval: float = 45.0):
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.keepalive_interval = keepalive_interval  # 이 시간 이상 쓰지 않은 호스트는 연결 유지 요청 (0이면 안 함)
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="http-prewarm")
+        self._thread: Optional[threading.Thread] = None
+
+    def session(self, url: str) -> requests.Session:
+        """URL 호스트의 세션을 반환합니다. (없으면 생성)"""
+        origin = _origin(url)
+        session = self._sessions.get(origin)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(origin)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[origin] = session
+                self._stats[origin] = {"requests": 0, "errors": 0, "total_seconds": 0.0}
+            return session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """풀의 연결로 요청을 보냅니다. timeout을 주지 않으면 (연결, 응답) 기본 타임아웃을 사용합니다."""
+        origin = _origin(url)
+        session = self.session(url)
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        stats = self._stats[origin]
+        try:
+            return session.request(method, url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                stats["errors"] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                stats["requests"] += 1
+                stats["total_seconds"] += elapsed
+            self._last_used[origin] = time.monotonic()
+
+    def prewarm(self, urls: Iterable[str]):
+        """호스트별로 연결을 미리 맺어 둡니다. (백그라운드, 응답 코드는 무시)"""
+        for origin in {_origin(url) for url in urls}:
+            self.session(origin)
+            self._executor.submit(self._touch, origin)
+        if self.keepalive_interval and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name="http-keepalive", daemon=True)
+            self._thread.start()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """호스트별 요청 수, 오류 수, 평균 지연시간, 연결 풀 상태"""
+        result = {}
+        for origin, session in list(self._sessions.items()):
+            stats = self._stats[origin]
+            opened = idle = 0
+            adapter = session.get_adapter(origin)
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            result[origin] = {
+                "requests": int(stats["requests"]),
+                "errors": int(stats["errors"]),
+                "avg_ms": round(stats["total_seconds"] / stats["requests"] * 1000, 1) if stats["requests"] else None,
+                "connections_opened": opened,
+                "idle_connections": idle,
+                "pool_size": self.pool_size
+            }
+        return result
+
+    def _touch(self, origin: str):
+        try:
+            self.request("HEAD", f"{origin}/", allow_redirects=False)
+        except Exception as e:
+            logging.warning(f"HTTP prewarm to {origin} failed: {e}")
+
+    def _run(self):
+        """오래 쓰지 않은 호스트의 연결이 서버 쪽에서 끊기기 전에 연결을 유지합니다."""
+        while True:
+            time.sleep(self.keepalive_interval)
+            cutoff = time.monotonic() - self.keepalive_interval
+            for origin in list(self._sessions):
+                if self._last_used.get(origin, 0.0) < cutoff:
+                    self._executor.submit(self._touch, origin)
+
+
+# KIS/업비트 클라이언트가 공유하는 전송 계층
+_transport_instance = None
+
+
+def get_http_transport(connect_timeout: float = 3.05, read_timeout: float = 10.0, pool_size: int = 32,
+                       keepalive_interval: float = 45.0) -> HttpTransport:
+    """HTTP 전송 계층 싱글톤 인스턴스 반환"""
+    global _transport_instance
+
+    if _transport_instance is None:
+        _transport_instance = HttpTransport(connect_timeout, read_timeout, pool_size, keepalive_interval)
+
+    return _transport_instance
@@ -0,0 +1,144 @@
+"""
+Idempotency cache for TradingView signals
+재전송되거나 중복된 웹훅 시그널이 다시 주문으로 이어지지 않도록 막습니다.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# 처리 중인 시그널 표시 (엔진 프로세스와 주고받을 수 있도록 문자열 사용)
+IN_PROGRESS = "__in_progress__"
+
+
+def signal_key(payload: Any) -> str:
+    """시그널의 중복 판별 키를 만듭니다. signal_id가 있으면 우선 사용합니다."""
+    if isinstance(payload, dict) and payload.get("signal_id"):
+        return f"id:{payload['signal_id']}"
+
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return "sha256:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SignalDeduplicator:
+    """TTL 만료와 최대 크기를 가진 중복 시그널 캐시"""
+
+    def __init__(self, ttl_seconds: float = 600, max_entries: int = 10000, store_path: str = ""):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.store_path = store_path
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._store_lines = 0
+
+        if store_path:
+            directory = os.path.dirname(store_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._load_store()
+
+    def begin(self, key: str) -> Tuple[bool, Optional[Any]]:
+        """
+        시그널 처리를 시작합니다.
+        처음 보는 키면 (True, None), 중복이면 (False, 기존 결과 또는 IN_PROGRESS)를 반환합니다.
+        """
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                return False, entry[1]
+
+            self._entries[key] = (now, IN_PROGRESS)
+            return True, None
+
+    def complete(self, key: str, result: Any):
+        """처리 결과를 저장합니다. 이후 중복 시그널은 이 결과를 그대로 받습니다."""
+        with self._lock:
+            entry = self._entries.get(key)
+            created = entry[0] if entry is not None else time.time()
+            self._entries[key] = (created, result)
+
+        if self.store_path:
+            self._append_store(key, created, result)
+
+    def release(self, key: str):
+        """처리에 실패한 키를 제거하여 재시도를 허용합니다."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == IN_PROGRESS:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float):
+        """만료되었거나 용량을 초과한 항목을 오래된 순서로 제거합니다."""
+        cutoff = now - self.ttl_seconds
+        entries = self._entries
+        while entries:
+            key, (created, _) = next(iter(entries.items()))
+            if created >= cutoff and len(entries) < self.max_entries:
+                break
+            entries.popitem(last=False)
+
+    def _load_store(self):
+        """파일에 저장된 최근 키를 복원합니다."""
+        if not os.path.exists(self.store_path):
+            return
+
+        cutoff = time.time() - self.ttl_seconds
+        try:
+            with open(self.store_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self._store_lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # 크래시로 잘린 마지막 줄은 무시
+                    if record["t"] >= cutoff:
+                        self._entries[record["k"]] = (record["t"], record["r"])
+                        self._entries.move_to_end(record["k"])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            logging.info(f"Loaded {len(self._entries)} recent signal IDs from {self.store_path}")
+        except Exception as e:
+            logging.error(f"Failed to load idempotency store {self.store_path}: {e}")
+
+        self._compact()
+
+    def _append_store(self, key: str, created: float, result: Any):
+        """결과를 파일 끝에 추가합니다."""
+        try:
+            line = json.dumps({"k": key, "t": created, "r": result}, ensure_ascii=False, default=str)
+            with self._lock:
+                with open(self.store_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                self._store_lines += 1
+                needs_compaction = self._store_lines > self.max_entries * 2
+            if needs_compaction:
+                self._compact()
+        except Exception as e:
+            logging.error(f"Failed to persist signal ID {key}: {e}")
+
+    def _compact(self):
+        """만료된 항목을 제외하고 파일을 다시 씁니다."""
+        try:
+            with self._lock:
+                self._evict(time.time())
+                records = [(key, created, result) for key, (created, result) in self._entries.items()
+                           if result != IN_PROGRESS]
+                temp_path = f"{self.store_path}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    for key, created, result in records:
+                        f.write(json.dumps({"k": key, "t": created, "r": result},
+                                           ensure_ascii=False, default=str) + "\n")
+                os.replace(temp_path, self.store_path)
+                self._store_lines = len(records)
+        except Exception as e:
+            logging.error(f"Failed to compact idempotency store {self.store_path}: {e}")
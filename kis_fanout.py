@@ -0,0 +1,91 @@
+"""
+KIS account fan-out for the Trading Bot
+하나의 시그널을 여러 KIS 계좌로 복제 주문하기 위한 계좌 지정 해석과 계좌별 주문 간격 제어
+
+account 필드 형식:
+    kis1                  단일 계좌 (기존 방식)
+    kis1,kis3,kis7        계좌 목록
+    kis*                  활성화된 모든 KIS 계좌
+    group:momentum        KIS_GROUP_MOMENTUM 환경변수에 정의된 계좌 그룹
+"""
+
+import re
+import time
+import threading
+from typing import Callable, Dict, Iterable, List
+
+GROUP_PREFIX = "group:"
+WILDCARD = "kis*"
+
+_ACCOUNT_NUMBER = re.compile(r"kis(\d+)$")
+
+
+def is_fanout_target(account: str) -> bool:
+    """여러 KIS 계좌를 대상으로 하는 account 값인지 확인합니다."""
+    return "," in account or account == WILDCARD or account.startswith(GROUP_PREFIX)
+
+
+def _account_sort_key(account: str):
+    match = _ACCOUNT_NUMBER.match(account)
+    return (0, int(match.group(1)), "") if match else (1, 0, account)
+
+
+def resolve_kis_accounts(account: str, available: Iterable[str],
+                         get_group: Callable[[str], List[str]]) -> List[str]:
+    """
+    account 값을 실제 KIS 계좌 이름 목록으로 펼칩니다.
+    목록에 없는 계좌도 그대로 반환하여 결과에 '계좌 없음' 실패로 나타나게 합니다.
+    """
+    resolved = []
+    seen = set()
+    pending = [part.strip() for part in account.split(",")]
+    expanded_groups = set()
+
+    while pending:
+        part = pending.pop(0)
+        if not part:
+            continue
+        if part == WILDCARD:
+            members = sorted(available, key=_account_sort_key)
+        elif part.startswith(GROUP_PREFIX):
+            name = part[len(GROUP_PREFIX):]
+            if name in expanded_groups:
+                continue  # 그룹 순환 참조 방지
+            expanded_groups.add(name)
+            pending[:0] = [member.strip().lower() for member in get_group(name)]
+            continue
+        else:
+            members = [part]
+
+        for member in members:
+            if member not in seen:
+                seen.add(member)
+                resolved.append(member)
+    return resolved
+
+
+class AccountPacer:
+    """
+    계좌별 최소 주문 간격을 지키는 페이서
+    다음 전송 가능 시각을 예약만 하고 락 밖에서 대기하므로 서로 다른 계좌는 서로를 막지 않습니다.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, account: str) -> float:
+        """계좌의 다음 주문 슬롯까지 대기하고 대기한 시간(초)을 반환합니다."""
+        if self.interval <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(account, 0.0))
+            self._next_slot[account] = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
@@ -0,0 +1,237 @@
+"""
+KIS access token store for the Trading Bot
+KIS 액세스 토큰과 만료 시각을 암호화된 파일에 보관하여 재시작/다른 프로세스에서도 재사용합니다.
+토큰은 처음 필요할 때 발급받고, 백그라운드 스레드가 만료 전에 미리 갱신하므로 주문이 /oauth2/tokenP를 기다리지 않습니다.
+KIS는 앱 키당 분당 1회 정도만 토큰 발급을 허용하므로 같은 앱 키는 최소 간격 안에 다시 요청하지 않습니다.
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # cryptography가 없으면 토큰을 메모리에만 보관
+    Fernet = None
+    InvalidToken = Exception
+
+try:
+    import fcntl
+except ImportError:  # Windows는 프로세스 간 파일 잠금 없이 동작
+    fcntl = None
+
+# 토큰 발급 함수: () -> (토큰, 만료 시각 epoch)
+TokenFetcher = Callable[[], Tuple[str, float]]
+
+
+def _key_id(app_key: str) -> str:
+    """앱 키 식별자 (파일에 앱 키를 그대로 저장하지 않음)"""
+    return hashlib.sha256(app_key.encode("utf-8")).hexdigest()[:32]
+
+
+def _fernet_key(secret: str) -> bytes:
+    return base64.urlsafe_b64encode(hashlib.sha256(secret.encode("utf-8")).digest())
+
+
+class KISTokenStore:
+    """앱 키별 KIS 액세스 토큰 저장소"""
+
+    def __init__(self, path: str = "data/kis_tokens.enc", secret: str = "", renew_before: float = 3600,
+                 check_interval: float = 60, min_request_interval: float = 61, auto_renew: bool = True):
+        self.path = path
+        self.auto_renew = auto_renew  # False면 백그라운드 갱신 없이 get()에서만 발급 (보조 프로세스용)
+        self.renew_before = renew_before  # 만료 이 시간(초) 전부터 백그라운드 갱신
+        self.check_interval = check_interval
+        self.min_request_interval = min_request_interval
+        self._fernet = Fernet(_fernet_key(secret)) if Fernet is not None and path and secret else None
+        self._tokens: Dict[str, Tuple[str, float]] = {}  # 키 ID -> (토큰, 만료 시각)
+        self._fetchers: Dict[str, List[TokenFetcher]] = {}  # 같은 앱 키를 쓰는 클라이언트마다 하나 (마지막 것을 사용)
+        self._last_request: Dict[str, float] = {}
+        self._rejected: Dict[str, str] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        if path and self._fernet is None:
+            logging.warning("KIS token store is memory-only (cryptography or KIS_TOKEN_KEY/SECRET_KEY missing)")
+        if self._fernet is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._tokens.update(self._read_file())
+
+    def register(self, app_key: str, fetch: TokenFetcher):
+        """앱 키의 토큰 발급 함수를 등록합니다. 토큰을 받은 뒤부터 백그라운드 갱신 대상이 됩니다. (네트워크 호출 없음)"""
+        key_id = _key_id(app_key)
+        with self._lock:
+            self._fetchers.setdefault(key_id, []).append(fetch)
+            self._key_locks.setdefault(key_id, threading.Lock())
+            if self.auto_renew and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="kis-token", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def unregister(self, app_key: str, fetch: Optional[TokenFetcher] = None):
+        """
+        클라이언트가 제거될 때 발급 함수 등록을 해제합니다. (fetch를 생략하면 가장 먼저 등록된 것)
+        같은 앱 키의 다른 클라이언트가 남아 있으면 그 발급 함수로 계속 갱신하고,
+        마지막 등록이 해제되면 메모리의 토큰도 버려서 더 이상 갱신하지 않습니다.
+        """
+        key_id = _key_id(app_key)
+        with self._lock:
+            fetchers = self._fetchers.get(key_id)
+            if not fetchers:
+                return
+            if fetch is None:
+                fetchers.pop(0)
+            elif fetch in fetchers:
+                fetchers.remove(fetch)
+            if not fetchers:
+                del self._fetchers[key_id]
+                self._tokens.pop(key_id, None)
+                self._rejected.pop(key_id, None)
+                self._last_request.pop(key_id, None)
+
+    def get(self, app_key: str) -> Optional[str]:
+        """유효한 토큰을 반환합니다. 없으면(최초 사용) 이 자리에서 발급받습니다."""
+        key_id = _key_id(app_key)
+        token = self._valid_token(key_id, 60)
+        if token:
+            return token
+        return self._renew(key_id, 60)
+
+    def peek(self, app_key: str) -> Optional[str]:
+        """발급 요청 없이 유효한 토큰만 반환합니다. (없으면 None)"""
+        return self._valid_token(_key_id(app_key), 60)
+
+    def invalidate(self, app_key: str):
+        """거래소가 만료로 거부한 토큰을 버립니다. (다음 get에서 다시 발급)"""
+        key_id = _key_id(app_key)
+        with self._lock:
+            entry = self._tokens.pop(key_id, None)
+            if entry:
+                self._rejected[key_id] = entry[0]  # 파일에 남은 같은 토큰을 다시 쓰지 않도록
+
+    def expires_in(self, app_key: str) -> Optional[float]:
+        """토큰 만료까지 남은 시간(초)"""
+        entry = self._tokens.get(_key_id(app_key))
+        return entry[1] - time.time() if entry else None
+
+    def _valid_token(self, key_id: str, min_validity: float) -> Optional[str]:
+        entry = self._tokens.get(key_id)
+        if entry and entry[1] - time.time() > min_validity:
+            return entry[0]
+        return None
+
+    def _renew(self, key_id: str, min_validity: float) -> Optional[str]:
+        """남은 유효 시간이 min_validity보다 짧으면 토큰을 새로 발급받습니다."""
+        fetchers = self._fetchers.get(key_id)
+        lock = self._key_locks.get(key_id)
+        if not fetchers or lock is None:
+            return None
+        fetch = fetchers[-1]
+
+        with lock:
+            token = self._valid_token(key_id, min_validity)
+            if token:
+                return token  # 다른 스레드가 먼저 갱신함
+
+            # 다른 프로세스가 이미 갱신했는지 파일에서 확인
+            if self._fernet is not None:
+                stored = self._read_file().get(key_id)
+                if stored and stored[1] - time.time() > min_validity and stored[0] != self._rejected.get(key_id):
+                    with self._lock:
+                        self._tokens[key_id] = stored
+                    return stored[0]
+
+            current = self._valid_token(key_id, 0)
+            if time.monotonic() - self._last_request.get(key_id, -self.min_request_interval) < self.min_request_interval:
+                return current  # 발급 간격 제한: 아직 유효한 토큰이 있으면 그대로 사용
+
+            self._last_request[key_id] = time.monotonic()
+            try:
+                token, expires_at = fetch()
+            except Exception as e:
+                logging.error(f"KIS token request failed: {e}")
+                return current
+
+            with self._lock:
+                self._tokens[key_id] = (token, expires_at)
+            self._write_file()
+            return token
+
+    def _run(self):
+        """
+        이미 토큰을 가진 앱 키만 만료 전에 미리 갱신합니다.
+        처음 발급은 get()에서 하므로 등록만 되고 쓰이지 않는 계좌는 토큰을 발급받지 않습니다.
+        """
+        while True:
+            for key_id in list(self._fetchers):
+                if key_id in self._tokens and not self._valid_token(key_id, self.renew_before):
+                    self._renew(key_id, self.renew_before)
+            self._wake.wait(self.check_interval)
+            self._wake.clear()
+
+    def _read_file(self) -> Dict[str, Tuple[str, float]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "rb") as f:
+                data = json.loads(self._fernet.decrypt(f.read()).decode("utf-8"))
+        except InvalidToken:
+            logging.error(f"Cannot decrypt KIS token store {self.path} (key changed?), ignoring it")
+            return {}
+        except Exception as e:
+            logging.error(f"Failed to read KIS token store {self.path}: {e}")
+            return {}
+        now = time.time()
+        return {key_id: (entry["token"], entry["expires_at"]) for key_id, entry in data.items()
+                if entry.get("expires_at", 0) > now}
+
+    def _write_file(self):
+        """파일의 다른 프로세스 토큰과 합쳐서(더 늦게 만료되는 쪽 유지) 원자적으로 저장합니다."""
+        if self._fernet is None:
+            return
+        lock_file = None
+        try:
+            if fcntl is not None:
+                lock_file = open(f"{self.path}.lock", "w")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            merged = self._read_file()
+            with self._lock:
+                for key_id, entry in self._tokens.items():
+                    if key_id not in merged or merged[key_id][1] < entry[1]:
+                        merged[key_id] = entry
+            payload = json.dumps({key_id: {"token": token, "expires_at": expires_at}
+                                  for key_id, (token, expires_at) in merged.items()})
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(self._fernet.encrypt(payload.encode("utf-8")))
+            os.chmod(temp_path, 0o600)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logging.error(f"Failed to write KIS token store {self.path}: {e}")
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+
+
+# 모든 KISClient가 공유하는 토큰 저장소
+_token_store_instance = None
+
+
+def get_kis_token_store(path: str = "data/kis_tokens.enc", secret: str = "",
+                        renew_before: float = 3600, auto_renew: bool = True) -> KISTokenStore:
+    """KIS 토큰 저장소 싱글톤 인스턴스 반환"""
+    global _token_store_instance
+
+    if _token_store_instance is None:
+        _token_store_instance = KISTokenStore(path, secret, renew_before, auto_renew=auto_renew)
+
+    return _token_store_instance
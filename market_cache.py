@@ -0,0 +1,156 @@
+"""
+Market metadata cache for the Trading Bot
+CCXT 거래소의 마켓 정보(load_markets)를 시작 시 동시에 미리 받아 두고,
+gzip JSON 파일과 메모리에 TTL과 함께 보관하여 모든 클라이언트 인스턴스가 공유합니다.
+첫 주문이 수 MB의 load_markets 호출을 기다리지 않도록 하기 위함입니다.
+"""
+
+import os
+import gzip
+import json
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class MarketCache:
+    """거래소별 마켓 메타데이터 캐시"""
+
+    def __init__(self, cache_dir: str = "data/markets", ttl_seconds: float = 43200, max_workers: int = 4):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-cache")
+        # 거래소 ID -> (받은 시각, markets, currencies)
+        self._entries: Dict[str, Tuple[float, Dict, Optional[Dict]]] = {}
+        self._clients: Dict[str, Any] = {}
+        self._runners: Dict[str, Callable[[Awaitable], Any]] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def attach(self, exchange_id: str, client: Any, runner: Optional[Callable[[Awaitable], Any]] = None) -> bool:
+        """
+        클라이언트에 캐시된 마켓 정보를 주입하고 이후 갱신 대상으로 등록합니다.
+        TTL이 지난 정보도 주입하며(백그라운드에서 갱신), 캐시가 없으면 False를 반환합니다.
+        비동기(ccxt.async_support) 클라이언트는 load_markets 코루틴을 실행할 runner를 함께 넘깁니다.
+        """
+        with self._lock:
+            self._clients[exchange_id] = client
+            if runner is not None:
+                self._runners[exchange_id] = runner
+            else:
+                self._runners.pop(exchange_id, None)
+            entry = self._entries.get(exchange_id)
+        if entry is None:
+            entry = self._load_disk(exchange_id)
+            if entry is None:
+                return False
+            with self._lock:
+                self._entries.setdefault(exchange_id, entry)
+
+        try:
+            client.set_markets(entry[1], entry[2])
+            return True
+        except Exception as e:
+            logging.error(f"Failed to apply cached markets to {exchange_id}: {e}")
+            return False
+
+    def prewarm(self):
+        """캐시가 없거나 만료된 거래소의 마켓 정보를 동시에 받고 백그라운드 갱신을 시작합니다."""
+        for exchange_id in list(self._clients):
+            if self._is_stale(exchange_id):
+                self._submit_refresh(exchange_id)
+
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="market-cache", daemon=True)
+            self._thread.start()
+
+    def age(self, exchange_id: str) -> Optional[float]:
+        """캐시된 마켓 정보의 경과 시간(초)"""
+        entry = self._entries.get(exchange_id)
+        return time.time() - entry[0] if entry else None
+
+    def _is_stale(self, exchange_id: str) -> bool:
+        age = self.age(exchange_id)
+        return age is None or age > self.ttl_seconds
+
+    def _submit_refresh(self, exchange_id: str):
+        with self._lock:
+            if exchange_id in self._refreshing:
+                return
+            self._refreshing.add(exchange_id)
+        self.executor.submit(self._refresh, exchange_id)
+
+    def _refresh(self, exchange_id: str):
+        """거래소에서 마켓 정보를 다시 받아 메모리와 파일을 갱신합니다."""
+        try:
+            client = self._clients.get(exchange_id)
+            if client is None:
+                return
+            started = time.perf_counter()
+            markets = client.load_markets(True)
+            runner = self._runners.get(exchange_id)
+            if runner is not None:
+                markets = runner(markets)
+            entry = (time.time(), markets, getattr(client, "currencies", None))
+            with self._lock:
+                self._entries[exchange_id] = entry
+            self._save_disk(exchange_id, entry)
+            logging.info(f"Loaded {len(markets)} {exchange_id} markets in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            logging.error(f"Failed to load {exchange_id} markets: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(exchange_id)
+
+    def _run(self):
+        interval = max(60.0, min(self.ttl_seconds / 4, 3600.0))
+        while True:
+            time.sleep(interval)
+            for exchange_id in list(self._clients):
+                if self._is_stale(exchange_id):
+                    self._submit_refresh(exchange_id)
+
+    def _path(self, exchange_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{exchange_id}.json.gz")
+
+    def _load_disk(self, exchange_id: str) -> Optional[Tuple[float, Dict, Optional[Dict]]]:
+        path = self._path(exchange_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["fetched_at"], data["markets"], data.get("currencies")
+        except Exception as e:
+            logging.error(f"Failed to read market cache {path}: {e}")
+            return None
+
+    def _save_disk(self, exchange_id: str, entry: Tuple[float, Dict, Optional[Dict]]):
+        path = self._path(exchange_id)
+        temp_path = f"{path}.tmp"
+        try:
+            with gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump({"fetched_at": entry[0], "markets": entry[1], "currencies": entry[2]},
+                          f, separators=(",", ":"), default=str)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logging.error(f"Failed to write market cache {path}: {e}")
+
+
+# 모든 ExchangeClients 인스턴스가 공유하는 캐시
+_market_cache_instance = None
+
+
+def get_market_cache(cache_dir: str = "data/markets", ttl_seconds: float = 43200) -> MarketCache:
+    """마켓 캐시 싱글톤 인스턴스 반환"""
+    global _market_cache_instance
+
+    if _market_cache_instance is None:
+        _market_cache_instance = MarketCache(cache_dir, ttl_seconds)
+
+    return _market_cache_instance
@@ -0,0 +1,697 @@
+"""
+WebSocket market-data feed for the Trading Bot
+업비트/바이낸스/바이비트/OKX/비트겟의 공개 WebSocket에서 거래하는 종목의 티커와 체결을 받아
+최신 시세를 배열 기반 저장소(TickerStore)에 보관하고, get_ticker를 REST 호출 없이 메모리에서 처리합니다.
+호가창을 구독한 종목은 스냅샷 + 증분으로 로컬 L2 호가창(order_book.OrderBook)을 유지하며,
+증분 시퀀스가 끊기면 스냅샷을 다시 받아 맞춥니다.
+연결이 끊기면 지수 백오프로 다시 연결하고 구독 중이던 종목을 모두 다시 구독합니다.
+거래소 주소는 설정으로 바꿀 수 있으므로 market_replay.py 로컬 재생 서버로 테스트할 수 있습니다.
+"""
+
+import json
+import time
+import uuid
+import random
+import asyncio
+import threading
+import logging
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import websockets
+except ImportError:  # websockets가 없으면 시세는 REST로만 조회
+    websockets = None
+
+from http_transport import get_http_transport
+from metrics import MARKET_FEED_MESSAGES, MARKET_FEED_RECONNECTS, ORDER_BOOK_RESYNCS
+from order_book import Levels, OrderBook
+from smart_router import canonical_symbol, venue_symbol
+
+NAN = float("nan")
+
+# 저장소 열 (거래소 시각은 ms epoch, 수신 시각은 monotonic 초)
+BID, ASK, LAST, BID_SIZE, ASK_SIZE, VOLUME, LAST_SIZE, TIMESTAMP, RECEIVED = range(9)
+FIELDS = ("bid", "ask", "last", "bid_size", "ask_size", "volume", "last_size", "timestamp", "received")
+
+# 파서가 만드는 갱신: (종류, 거래소 마켓 ID, 값들)
+#   QUOTE: (bid, ask, last, bid_size, ask_size, volume, timestamp)  None은 이전 값 유지
+#   TRADE: (price, size, timestamp)
+#   BOOK_SNAPSHOT: (bids, asks, sequence)
+#   BOOK_DELTA: (bids, asks, first, last, previous)  previous는 거래소가 알려 주는 직전 시퀀스 (없으면 None)
+QUOTE = 0
+TRADE = 1
+BOOK_SNAPSHOT = 2
+BOOK_DELTA = 3
+Update = Tuple[int, str, Tuple[Optional[float], ...]]
+
+
+def _float(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+class TickerStore:
+    """(거래소, 공통 심볼)별 최신 시세를 열마다 double 배열 하나로 보관하는 저장소"""
+
+    def __init__(self):
+        self._columns: List[array] = [array("d") for _ in FIELDS]
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._keys: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()  # 여러 열에 걸친 갱신/조회가 섞이지 않도록
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def row(self, venue: str, canonical: str) -> int:
+        """종목의 행 번호를 반환합니다. (없으면 빈 값으로 추가)"""
+        key = (venue, canonical)
+        row = self._index.get(key)
+        if row is not None:
+            return row
+        with self._lock:
+            row = self._index.get(key)
+            if row is None:
+                for column in self._columns:
+                    column.append(NAN)
+                row = len(self._keys)
+                self._keys.append(key)
+                self._index[key] = row
+            return row
+
+    def find(self, venue: str, canonical: str) -> Optional[int]:
+        return self._index.get((venue, canonical))
+
+    def update_quote(self, row: int, values: Tuple[Optional[float], ...]):
+        """티커 갱신 (bid, ask, last, bid_size, ask_size, volume, timestamp)"""
+        columns = self._columns
+        with self._lock:
+            for column, value in zip((BID, ASK, LAST, BID_SIZE, ASK_SIZE, VOLUME, TIMESTAMP), values):
+                if value is not None:
+                    columns[column][row] = value
+            columns[RECEIVED][row] = time.monotonic()
+
+    def update_trade(self, row: int, values: Tuple[Optional[float], ...]):
+        """체결 갱신 (price, size, timestamp)"""
+        price, size, timestamp = values
+        columns = self._columns
+        with self._lock:
+            if price is not None:
+                columns[LAST][row] = price
+            if size is not None:
+                columns[LAST_SIZE][row] = size
+            if timestamp is not None:
+                columns[TIMESTAMP][row] = timestamp
+            columns[RECEIVED][row] = time.monotonic()
+
+    def values(self, row: int) -> Tuple[float, ...]:
+        """행의 모든 열 값 (없는 값은 NaN)"""
+        with self._lock:
+            return tuple(column[row] for column in self._columns)
+
+    def age(self, row: int) -> float:
+        """마지막 수신 후 경과 시간(초), 받은 적이 없으면 inf"""
+        received = self._columns[RECEIVED][row]
+        return time.monotonic() - received if received == received else float("inf")
+
+
+class VenueAdapter:
+    """거래소별 WebSocket 주소, 구독 메시지, 메시지 파서"""
+
+    venue = ""
+    url = ""
+    rest_url = ""  # 호가창 REST 스냅샷이 필요한 거래소만 (바이낸스)
+    ping_message: Optional[str] = None  # 애플리케이션 수준 ping (프로토콜 ping은 websockets가 처리)
+    ping_interval = 20.0
+    batch_size = 50  # 구독 메시지 하나에 넣을 종목 수
+
+    def market_id(self, canonical: str) -> str:
+        base, _, quote = canonical.partition("/")
+        return f"{base}{quote}"
+
+    def subscribe_messages(self, tickers: List[str], books: List[str],
+                           all_tickers: List[str], all_books: List[str]) -> List[str]:
+        """새로 구독할 티커/호가창 종목의 구독 메시지 (all_*는 현재 전체 목록)"""
+        args = self._topics(tickers, books)
+        return [self._subscribe(args[start:start + self.batch_size]) for start in range(0, len(args), self.batch_size)]
+
+    def resync_messages(self, market_id: str) -> List[str]:
+        """호가창을 다시 받기 위한 메시지 (구독을 다시 하면 거래소가 스냅샷을 보냄)"""
+        topics = self._topics([], [market_id])
+        return [self._subscribe(topics, "unsubscribe"), self._subscribe(topics)]
+
+    def snapshot_path(self, market_id: str) -> str:
+        raise NotImplementedError
+
+    def parse_snapshot(self, data: Dict) -> Tuple[Levels, Levels, int]:
+        raise NotImplementedError
+
+    def _topics(self, tickers: List[str], books: List[str]) -> List[Any]:
+        raise NotImplementedError
+
+    def _subscribe(self, args: List[Any], op: str = "subscribe") -> str:
+        return json.dumps({"op": op, "args": args})
+
+    def parse(self, raw: Any) -> Iterable[Update]:
+        raise NotImplementedError
+
+
+class UpbitAdapter(VenueAdapter):
+    venue = "upbit"
+    url = "wss://api.upbit.com/websocket/v1"
+    ping_message = "PING"
+    ping_interval = 60.0
+
+    def market_id(self, canonical: str) -> str:
+        return venue_symbol(canonical, "upbit")
+
+    def subscribe_messages(self, tickers: List[str], books: List[str],
+                           all_tickers: List[str], all_books: List[str]) -> List[str]:
+        # 업비트는 새 구독 요청이 이전 요청을 대체하므로 항상 전체 목록을 보냄
+        request: List[Dict[str, Any]] = [{"ticket": f"tradingbot-{uuid.uuid4().hex[:12]}"}]
+        if all_tickers:
+            request += [{"type": "ticker", "codes": all_tickers}, {"type": "trade", "codes": all_tickers}]
+        if all_books:
+            request.append({"type": "orderbook", "codes": all_books})  # 매번 상위 15단계 전체를 보냄
+        return [json.dumps(request)]
+
+    def parse(self, raw: Any) -> Iterable[Update]:
+        message = json.loads(raw)
+        kind = message.get("type")
+        if kind == "ticker":
+            return [(QUOTE, message["code"], (None, None, _float(message.get("trade_price")), None, None,
+                                              _float(message.get("acc_trade_volume_24h")),
+                                              _float(message.get("timestamp"))))]
+        if kind == "trade":
+            return [(TRADE, message["code"], (_float(message.get("trade_price")), _float(message.get("trade_volume")),
+                                              _float(message.get("trade_timestamp") or message.get("timestamp"))))]
+        if kind == "orderbook":
+            units = message.get("orderbook_units") or []
+            return [(BOOK_SNAPSHOT, message["code"], ([(unit["bid_price"], unit["bid_size"]) for unit in units],
+                                                      [(unit["ask_price"], unit["ask_size"]) for unit in units], 0))]
+        return []
+
+
+class BinanceAdapter(VenueAdapter):
+    venue = "binance"
+    url = "wss://stream.binance.com:9443/ws"
+    rest_url = "https://api.binance.com"
+
+    def __init__(self):
+        self._request_id = 0
+
+    def _topics(self, tickers: List[str], books: List[str]) -> List[Any]:
+        return ([f"{market_id.lower()}@{channel}" for market_id in tickers for channel in ("ticker", "trade")]
+                + [f"{market_id.lower()}@depth@100ms" for market_id in books])
+
+    def _subscribe(self, args: List[Any], op: str = "subscribe") -> str:
+        self._request_id += 1
+        return json.dumps({"method": op.upper(), "params": args, "id": self._request_id})
+
+    def resync_messages(self, market_id: str) -> List[str]:
+        return []  # 증분 스트림은 그대로 두고 REST 스냅샷만 다시 받음
+
+    def snapshot_path(self, market_id: str) -> str:
+        return f"/api/v3/depth?symbol={market_id}&limit=1000"
+
+    def parse_snapshot(self, data: Dict) -> Tuple[Levels, Levels, int]:
+        return data["bids"], data["asks"], int(data["lastUpdateId"])
+
+    def parse(self, raw: Any) -> Iterable[Update]:
+        message = json.loads(raw)
+        event = message.get("e")
+        if event == "24hrTicker":
+            return [(QUOTE, message["s"], (_float(message.get("b")), _float(message.get("a")), _float(message.get("c")),
+                                           _float(message.get("B")), _float(message.get("A")),
+                                           _float(message.get("v")), _float(message.get("E"))))]
+        if event == "trade":
+            return [(TRADE, message["s"], (_float(message.get("p")), _float(message.get("q")), _float(message.get("T"))))]
+        if event == "depthUpdate":
+            return [(BOOK_DELTA, message["s"], (message["b"], message["a"], int(message["U"]), int(message["u"]), None))]
+        return []
+
+
+class BybitAdapter(VenueAdapter):
+    venue = "bybit"
+    url = "wss://stream.bybit.com/v5/public/spot"
+    ping_message = json.dumps({"op": "ping"})
+    batch_size = 10  # 요청당 최대 10개 토픽
+
+    def _topics(self, tickers: List[str], books: List[str]) -> List[Any]:
+        return ([f"{topic}.{market_id}" for market_id in tickers for topic in ("tickers", "publicTrade")]
+                + [f"orderbook.50.{market_id}" for market_id in books])
+
+    def parse(self, raw: Any) -> Iterable[Update]:
+        message = json.loads(raw)
+        topic = message.get("topic", "")
+        if topic.startswith("tickers."):
+            data = message["data"]
+            return [(QUOTE, data["symbol"], (_float(data.get("bid1Price")), _float(data.get("ask1Price")),
+                                             _float(data.get("lastPrice")), _float(data.get("bid1Size")),
+                                             _float(data.get("ask1Size")), _float(data.get("volume24h")),
+                                             _float(message.get("ts"))))]
+        if topic.startswith("publicTrade."):
+            return [(TRADE, trade["s"], (_float(trade.get("p")), _float(trade.get("v")), _float(trade.get("T"))))
+                    for trade in message["data"]]
+        if topic.startswith("orderbook."):
+            data = message["data"]
+            update_id = int(data["u"])
+            if message.get("type") == "snapshot" or update_id == 1:  # u=1은 거래소 재시작에 따른 스냅샷
+                return [(BOOK_SNAPSHOT, data["s"], (data["b"], data["a"], update_id))]
+            return [(BOOK_DELTA, data["s"], (data["b"], data["a"], update_id, update_id, None))]
+        return []
+
+
+class OKXAdapter(VenueAdapter):
+    venue = "okx"
+    url = "wss://ws.okx.com:8443/ws/v5/public"
+    ping_message = "ping"
+    ping_interval = 25.0
+
+    def market_id(self, canonical: str) -> str:
+        return canonical.replace("/", "-")
+
+    def _topics(self, tickers: List[str], books: List[str]) -> List[Any]:
+        return ([{"channel": channel, "instId": market_id} for market_id in tickers for channel in ("tickers", "trades")]
+                + [{"channel": "books", "instId": market_id} for market_id in books])
+
+    def parse(self, raw: Any) -> Iterable[Update]:
+        if raw == "pong":
+            return []
+        message = json.loads(raw)
+        arg = message.get("arg", {})
+        channel = arg.get("channel")
+        if "data" not in message:
+            return []
+        if channel == "tickers":
+            return [(QUOTE, data["instId"], (_float(data.get("bidPx")), _float(data.get("askPx")),
+                                             _float(data.get("last")), _float(data.get("bidSz")),
+                                             _float(data.get("askSz")), _float(data.get("vol24h")),
+                                             _float(data.get("ts"))))
+                    for data in message["data"]]
+        if channel == "trades":
+            return [(TRADE, trade["instId"], (_float(trade.get("px")), _float(trade.get("sz")), _float(trade.get("ts"))))
+                    for trade in message["data"]]
+        if channel == "books":
+            if message.get("action") == "snapshot":
+                return [(BOOK_SNAPSHOT, arg["instId"], (data["bids"], data["asks"], int(data.get("seqId", 0))))
+                        for data in message["data"]]
+            return [(BOOK_DELTA, arg["instId"], (data["bids"], data["asks"], int(data["seqId"]), int(data["seqId"]),
+                                                 int(data["prevSeqId"])))
+                    for data in message["data"]]
+        return []
+
+
+class BitgetAdapter(VenueAdapter):
+    venue = "bitget"
+    url = "wss://ws.bitget.com/v2/ws/public"
+    ping_message = "ping"
+    ping_interval = 30.0
+
+    def _topics(self, tickers: List[str], books: List[str]) -> List[Any]:
+        # 호가창은 매번 상위 15단계 전체를 보내는 books15 채널 사용 (증분 순서 검증 불필요)
+        return ([{"instType": "SPOT", "channel": channel, "instId": market_id}
+                 for market_id in tickers for channel in ("ticker", "trade")]
+                + [{"instType": "SPOT", "channel": "books15", "instId": market_id} for market_id in books])
+
+    def resync_messages(self, market_id: str) -> List[str]:
+        return []  # 스냅샷만 받으므로 다시 맞출 필요 없음
+
+    def parse(self, raw: Any) -> Iterable[Update]:
+        if raw == "pong":
+            return []
+        message = json.loads(raw)
+        arg = message.get("arg", {})
+        if "data" not in message:
+            return []
+        if arg.get("channel") == "ticker":
+            return [(QUOTE, data.get("instId") or arg["instId"],
+                     (_float(data.get("bidPr")), _float(data.get("askPr")), _float(data.get("lastPr")),
+                      _float(data.get("bidSz")), _float(data.get("askSz")), _float(data.get("baseVolume")),
+                      _float(data.get("ts"))))
+                    for data in message["data"]]
+        if arg.get("channel") == "trade":
+            return [(TRADE, arg["instId"], (_float(trade.get("price")), _float(trade.get("size")), _float(trade.get("ts"))))
+                    for trade in message["data"]]
+        if arg.get("channel") == "books15":
+            return [(BOOK_SNAPSHOT, arg["instId"], (data["bids"], data["asks"], 0)) for data in message["data"]]
+        return []
+
+
+ADAPTERS = {adapter.venue: adapter for adapter in
+            (UpbitAdapter, BinanceAdapter, BybitAdapter, OKXAdapter, BitgetAdapter)}
+
+# 시세 갱신 리스너: (거래소, 공통 심볼, bid, ask)
+QuoteListener = Callable[[str, str, float, float], None]
+
+
+class MarketFeed:
+    """거래소별 WebSocket 연결을 관리하고 수신한 시세를 TickerStore에 반영합니다."""
+
+    def __init__(self, urls: Optional[Dict[str, str]] = None, max_age: float = 10.0,
+                 min_backoff: float = 0.5, max_backoff: float = 30.0, record_path: str = ""):
+        self.urls = urls or {}  # 거래소 -> WebSocket 주소 (로컬 재생 서버 테스트용)
+        self.max_age = max_age  # 이보다 오래된 시세는 get_ticker에서 사용하지 않음 (REST로 조회)
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.record_path = record_path  # 받은 원본 메시지를 JSONL로 기록 (재생 서버 입력)
+        self.store = TickerStore()
+        self._adapters = {venue: adapter() for venue, adapter in ADAPTERS.items()}
+        self._wanted: Dict[str, Dict[str, int]] = {venue: {} for venue in ADAPTERS}  # 거래소 -> 마켓 ID -> 행
+        self._canonical: Dict[str, Dict[str, str]] = {venue: {} for venue in ADAPTERS}  # 마켓 ID -> 공통 심볼
+        self._subscribed: Dict[str, Set[str]] = {venue: set() for venue in ADAPTERS}
+        self._books: Dict[str, Dict[str, OrderBook]] = {venue: {} for venue in ADAPTERS}  # 마켓 ID -> 호가창
+        self._subscribed_books: Dict[str, Set[str]] = {venue: set() for venue in ADAPTERS}
+        self._resyncing: Set[Tuple[str, str]] = set()
+        self._sockets: Dict[str, Any] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, float]] = {
+            venue: {"messages": 0, "reconnects": 0, "last_message": 0.0} for venue in ADAPTERS}
+        self._listeners: List[QuoteListener] = []
+        self._record_file = None
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def add_listener(self, listener: QuoteListener):
+        """호가 갱신마다 호출할 함수를 등록합니다. (피드 스레드에서 호출됨)"""
+        self._listeners.append(listener)
+
+    def watch(self, venue: str, symbol: str) -> bool:
+        """종목 시세를 구독합니다. 지원하지 않는 거래소면 False"""
+        adapter = self._adapters.get(venue)
+        if adapter is None or websockets is None:
+            return False
+        canonical = canonical_symbol(symbol, venue)
+        if ":" in canonical:  # 웹소켓 어댑터는 현물 스트림만 구독
+            return False
+        market_id = adapter.market_id(canonical)
+        if market_id in self._wanted[venue]:
+            return True
+        with self._lock:
+            if market_id not in self._wanted[venue]:
+                self._canonical[venue][market_id] = canonical
+                self._wanted[venue][market_id] = self.store.row(venue, canonical)
+        self._ensure_loop()
+        self._loop.call_soon_threadsafe(self._on_watch, venue)
+        return True
+
+    def watch_book(self, venue: str, symbol: str) -> bool:
+        """종목 호가창을 구독합니다. 지원하지 않는 거래소면 False"""
+        adapter = self._adapters.get(venue)
+        if adapter is None or websockets is None:
+            return False
+        canonical = canonical_symbol(symbol, venue)
+        if ":" in canonical:  # 웹소켓 어댑터는 현물 스트림만 구독
+            return False
+        market_id = adapter.market_id(canonical)
+        if market_id in self._books[venue]:
+            return True
+        with self._lock:
+            if market_id not in self._books[venue]:
+                self._canonical[venue][market_id] = canonical
+                self._books[venue][market_id] = OrderBook(venue, canonical)
+        self._ensure_loop()
+        self._loop.call_soon_threadsafe(self._on_watch, venue)
+        return True
+
+    def get_book(self, venue: str, symbol: str) -> Optional[OrderBook]:
+        """동기화된 로컬 호가창을 반환합니다. 구독 전이거나 연결이 끊겨 동기화되지 않았으면 구독을 걸고 None"""
+        adapter = self._adapters.get(venue)
+        if adapter is None:
+            return None
+        canonical = canonical_symbol(symbol, venue)
+        if ":" in canonical:
+            return None
+        book = self._books[venue].get(adapter.market_id(canonical))
+        if book is None:
+            self.watch_book(venue, symbol)
+            return None
+        if not book.synced or venue not in self._sockets:
+            return None
+        return book
+
+    def get_ticker(self, venue: str, symbol: str) -> Optional[Any]:
+        """
+        메모리의 최신 시세를 ExchangeClients.get_ticker와 같은 형식으로 반환합니다.
+        (업비트: 현재가 목록, 그 외: CCXT 티커) 구독 전이거나 오래된 시세면 구독을 걸고 None을 반환합니다.
+        """
+        canonical = canonical_symbol(symbol, venue)
+        row = self.store.find(venue, canonical)
+        if row is None:
+            self.watch(venue, symbol)
+            return None
+        if self.store.age(row) > self.max_age:
+            return None
+
+        values = [None if value != value else value for value in self.store.values(row)]
+        timestamp = int(values[TIMESTAMP]) if values[TIMESTAMP] is not None else None
+        if venue == "upbit":
+            return [{
+                "market": venue_symbol(canonical, venue),
+                "trade_price": values[LAST],
+                "trade_volume": values[LAST_SIZE],
+                "acc_trade_volume_24h": values[VOLUME],
+                "timestamp": timestamp
+            }]
+        return {
+            "symbol": canonical,
+            "timestamp": timestamp,
+            "bid": values[BID],
+            "ask": values[ASK],
+            "bidVolume": values[BID_SIZE],
+            "askVolume": values[ASK_SIZE],
+            "last": values[LAST],
+            "close": values[LAST],
+            "baseVolume": values[VOLUME],
+            "info": {"source": "websocket"}
+        }
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """거래소별 연결 상태, 구독 종목 수, 수신 메시지 수, 재연결 횟수"""
+        now = time.monotonic()
+        return {
+            venue: {
+                "connected": venue in self._sockets,
+                "symbols": len(self._wanted[venue]),
+                "books": len(self._books[venue]),
+                "books_synced": sum(1 for book in list(self._books[venue].values()) if book.synced),
+                "messages": int(stats["messages"]),
+                "reconnects": int(stats["reconnects"]),
+                "last_message_age": round(now - stats["last_message"], 1) if stats["last_message"] else None
+            }
+            for venue, stats in self._stats.items() if self._wanted[venue] or self._books[venue]
+        }
+
+    def _ensure_loop(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="market-feed", daemon=True)
+                self._thread.start()
+
+    def _on_watch(self, venue: str):
+        """(루프 스레드) 연결 작업을 시작하거나, 연결되어 있으면 새 종목만 구독합니다."""
+        task = self._tasks.get(venue)
+        if task is None or task.done():
+            self._tasks[venue] = self._loop.create_task(self._run_venue(venue))
+        elif venue in self._sockets:
+            self._loop.create_task(self._subscribe_new(venue, self._sockets[venue]))
+
+    async def _subscribe_new(self, venue: str, socket: Any):
+        try:
+            await self._subscribe_missing(venue, socket)
+        except Exception as e:  # 연결이 끊긴 경우: 재연결 시 전체 재구독
+            logging.warning(f"Market feed {venue}: subscribe failed: {e}")
+
+    async def _subscribe_missing(self, venue: str, socket: Any):
+        adapter = self._adapters[venue]
+        subscribed, subscribed_books = self._subscribed[venue], self._subscribed_books[venue]
+        tickers = [market_id for market_id in list(self._wanted[venue]) if market_id not in subscribed]
+        books = [market_id for market_id in list(self._books[venue]) if market_id not in subscribed_books]
+        if not tickers and not books:
+            return
+        subscribed.update(tickers)
+        subscribed_books.update(books)
+        for message in adapter.subscribe_messages(tickers, books, list(self._wanted[venue]), list(self._books[venue])):
+            await socket.send(message)
+        logging.info(f"Market feed {venue}: subscribed {', '.join(tickers + [f'{book} (book)' for book in books])}")
+        if adapter.rest_url:
+            for market_id in books:
+                asyncio.ensure_future(self._fetch_snapshot(venue, market_id))
+
+    def _request_resync(self, venue: str, market_id: str):
+        """(루프 스레드) 시퀀스가 끊긴 호가창을 다시 맞춥니다."""
+        if (venue, market_id) in self._resyncing:
+            return
+        ORDER_BOOK_RESYNCS.labels(venue).inc()
+        logging.warning(f"Order book {venue} {market_id}: sequence gap, resyncing")
+        adapter = self._adapters[venue]
+        if adapter.rest_url:
+            asyncio.ensure_future(self._fetch_snapshot(venue, market_id))
+            return
+        socket = self._sockets.get(venue)
+        messages = adapter.resync_messages(market_id)
+        if socket is not None and messages:
+            self._resyncing.add((venue, market_id))
+            asyncio.ensure_future(self._send_resync(venue, market_id, socket, messages))
+
+    async def _send_resync(self, venue: str, market_id: str, socket: Any, messages: List[str]):
+        try:
+            for message in messages:
+                await socket.send(message)
+        except Exception as e:
+            logging.warning(f"Order book {venue} {market_id}: resync failed: {e}")
+        finally:
+            self._resyncing.discard((venue, market_id))
+
+    async def _fetch_snapshot(self, venue: str, market_id: str):
+        """REST 스냅샷을 받아 호가창에 적용합니다. (그동안 받은 증분은 호가창이 보관했다가 이어서 적용)"""
+        key = (venue, market_id)
+        if key in self._resyncing:
+            return
+        self._resyncing.add(key)
+        adapter = self._adapters[venue]
+        override = self.urls.get(venue)
+        # 재생 서버는 WebSocket과 같은 주소에서 REST 스냅샷도 제공
+        base = override.replace("ws", "http", 1) if override else adapter.rest_url
+        url = f"{base}{adapter.snapshot_path(market_id)}"
+        try:
+            for attempt in range(5):
+                book = self._books[venue].get(market_id)
+                if book is None or venue not in self._sockets:
+                    return
+                book.invalidate()
+                try:
+                    loop = asyncio.get_running_loop()
+                    response = await loop.run_in_executor(None, lambda: get_http_transport().request("GET", url))
+                    data = response.json()
+                    if self.record_path:
+                        self._record(venue, json.dumps(data), path=adapter.snapshot_path(market_id))
+                    if book.apply_snapshot(*adapter.parse_snapshot(data)):
+                        return
+                    logging.warning(f"Order book {venue} {market_id}: snapshot older than stream, retrying")
+                except Exception as e:
+                    logging.warning(f"Order book {venue} {market_id}: snapshot failed: {e}")
+                await asyncio.sleep(min(10.0, 0.5 * 2 ** attempt))
+        finally:
+            self._resyncing.discard(key)
+
+    async def _run_venue(self, venue: str):
+        """연결 -> 전체 재구독 -> 수신을 반복합니다. 끊기면 지수 백오프(지터 포함) 후 다시 연결합니다."""
+        adapter = self._adapters[venue]
+        url = self.urls.get(venue) or adapter.url
+        failures = 0
+        while True:
+            pinger = None
+            try:
+                async with websockets.connect(url, ping_interval=20, ping_timeout=20, open_timeout=10,
+                                              close_timeout=1, max_size=2 ** 23) as socket:
+                    self._sockets[venue] = socket
+                    self._subscribed[venue] = set()
+                    self._subscribed_books[venue] = set()
+                    for book in list(self._books[venue].values()):
+                        book.invalidate()  # 끊긴 동안의 증분을 놓쳤으므로 새 스냅샷부터 다시 시작
+                    await self._subscribe_missing(venue, socket)
+                    if adapter.ping_message:
+                        pinger = asyncio.ensure_future(self._ping(socket, adapter))
+                    async for raw in socket:
+                        failures = 0
+                        self._handle(venue, adapter, raw)
+                    logging.warning(f"Market feed {venue} closed by server")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Market feed {venue} disconnected: {e}")
+            finally:
+                self._sockets.pop(venue, None)
+                if pinger is not None:
+                    pinger.cancel()
+
+            failures += 1
+            self._stats[venue]["reconnects"] += 1
+            MARKET_FEED_RECONNECTS.labels(venue).inc()
+            delay = min(self.max_backoff, self.min_backoff * 2 ** (failures - 1))
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _ping(self, socket: Any, adapter: VenueAdapter):
+        while True:
+            await asyncio.sleep(adapter.ping_interval)
+            await socket.send(adapter.ping_message)
+
+    def _handle(self, venue: str, adapter: VenueAdapter, raw: Any):
+        """메시지 하나를 파싱해 저장소에 반영합니다. (파싱 실패는 연결을 끊지 않음)"""
+        stats = self._stats[venue]
+        stats["messages"] += 1
+        stats["last_message"] = time.monotonic()
+        MARKET_FEED_MESSAGES.labels(venue).inc()
+        if self.record_path:
+            self._record(venue, raw)
+        try:
+            updates = adapter.parse(raw)
+        except Exception as e:
+            logging.debug(f"Market feed {venue}: unparsed message ({e}): {str(raw)[:200]}")
+            return
+
+        rows = self._wanted[venue]
+        for kind, market_id, values in updates:
+            if kind >= BOOK_SNAPSHOT:
+                book = self._books[venue].get(market_id)
+                if book is None:
+                    continue
+                synced = book.apply_snapshot(*values) if kind == BOOK_SNAPSHOT else book.apply_delta(*values)
+                if not synced:
+                    self._request_resync(venue, market_id)
+                continue
+            row = rows.get(market_id)
+            if row is None:
+                continue
+            if kind == QUOTE:
+                self.store.update_quote(row, values)
+            else:
+                self.store.update_trade(row, values)
+            if self._listeners:
+                self._notify(venue, market_id, row)
+
+    def _notify(self, venue: str, market_id: str, row: int):
+        bid, ask, last = self.store.values(row)[:3]
+        if bid != bid or ask != ask:  # 호가가 없는 거래소(업비트)는 체결가 사용
+            if last != last:
+                return
+            bid = ask = last
+        canonical = self._canonical[venue][market_id]
+        for listener in self._listeners:
+            try:
+                listener(venue, canonical, bid, ask)
+            except Exception as e:
+                logging.error(f"Market feed listener error: {e}")
+
+    def _record(self, venue: str, raw: Any, path: str = ""):
+        """원본 메시지를 기록합니다. path가 있으면 REST 응답 (재생 서버가 같은 경로로 제공)"""
+        if self._record_file is None:
+            self._record_file = open(self.record_path, "a", encoding="utf-8")
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        entry = {"venue": venue, "time": time.time(), "message": raw}
+        if path:
+            entry["path"] = path
+        self._record_file.write(json.dumps(entry) + "\n")
+        self._record_file.flush()
+
+
+# 모든 클라이언트가 공유하는 시세 피드
+_feed_instance = None
+
+
+def get_market_feed(urls: Optional[Dict[str, str]] = None, max_age: float = 10.0,
+                    record_path: str = "") -> MarketFeed:
+    """시세 피드 싱글톤 인스턴스 반환"""
+    global _feed_instance
+
+    if _feed_instance is None:
+        _feed_instance = MarketFeed(urls, max_age, record_path=record_path)
+
+    return _feed_instance
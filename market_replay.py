@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+WebSocket 시세 재생 서버
+MARKET_FEED_RECORD로 기록한 JSONL(거래소별 원본 메시지)을 로컬 WebSocket으로 다시 보내
+실제 거래소에 연결하지 않고 시세 피드(market_feed.py)의 파싱, 재연결, 재구독을 테스트합니다.
+거래소마다 ws://호스트:포트/<거래소> 경로로 접속하며, 첫 구독 메시지를 받은 뒤 재생을 시작합니다.
+기록된 REST 호가창 스냅샷(바이낸스)은 같은 주소의 http://호스트:포트/<거래소>/<경로>로 제공합니다.
+
+사용 예:
+    python market_replay.py data/feed.jsonl --port 8765 --speed 10 --loop
+    MARKET_FEED_URL_BINANCE=ws://127.0.0.1:8765/binance python run.py
+
+    # 연결 끊김 테스트: 메시지 500개마다 서버가 연결을 끊음
+    python market_replay.py data/feed.jsonl --drop-after 500
+"""
+
+import json
+import asyncio
+import argparse
+import logging
+from http import HTTPStatus
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import websockets
+
+# 애플리케이션 수준 ping 응답
+PONGS = {"ping": "pong", "PING": json.dumps({"status": "UP"}), json.dumps({"op": "ping"}): json.dumps({"op": "pong"})}
+
+
+def load_recording(path: str) -> Tuple[Dict[str, List[Tuple[float, str]]], Dict[str, str]]:
+    """(거래소 -> [(기록 시각, 메시지)], "/거래소/REST 경로" -> 응답 본문)"""
+    messages: Dict[str, List[Tuple[float, str]]] = defaultdict(list)
+    responses: Dict[str, str] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            message = entry["message"]
+            if not isinstance(message, str):
+                message = json.dumps(message)
+            if entry.get("path"):
+                responses[f"/{entry['venue']}{entry['path']}"] = message
+            else:
+                messages[entry["venue"]].append((float(entry.get("time", 0)), message))
+    return messages, responses
+
+
+class ReplayServer:
+    def __init__(self, recording: Dict[str, List[Tuple[float, str]]], responses: Dict[str, str],
+                 speed: float = 1.0, loop: bool = False, drop_after: int = 0):
+        self.recording = recording
+        self.responses = responses
+        self.speed = speed  # 0이면 기다리지 않고 바로 전송
+        self.loop = loop
+        self.drop_after = drop_after
+        self.connections = 0
+
+    async def process_request(self, path: str, headers):
+        """WebSocket 업그레이드가 아닌 요청은 기록된 REST 응답으로 처리합니다."""
+        if headers.get("Upgrade", "").lower() == "websocket":
+            return None
+        body = self.responses.get(path)
+        if body is None:
+            return HTTPStatus.NOT_FOUND, [("Content-Type", "text/plain")], b"not recorded\n"
+        logging.info(f"REST {path}")
+        return HTTPStatus.OK, [("Content-Type", "application/json")], body.encode("utf-8")
+
+    async def handle(self, socket):
+        venue = socket.path.strip("/").split("/")[0]
+        messages = self.recording.get(venue)
+        if not messages:
+            await socket.close(code=4004, reason=f"no recording for {venue}")
+            return
+        self.connections += 1
+        logging.info(f"{venue}: client connected ({self.connections} connections so far)")
+
+        subscribed = asyncio.Event()
+        reader = asyncio.ensure_future(self._read(socket, venue, subscribed))
+        try:
+            await subscribed.wait()
+            sent = 0
+            while True:
+                previous = messages[0][0]
+                for recorded_at, message in messages:
+                    if self.speed > 0 and recorded_at > previous:
+                        await asyncio.sleep((recorded_at - previous) / self.speed)
+                    previous = recorded_at
+                    # 업비트는 바이너리 프레임으로 전송
+                    await socket.send(message.encode("utf-8") if venue == "upbit" else message)
+                    sent += 1
+                    if self.drop_after and sent % self.drop_after == 0:
+                        logging.info(f"{venue}: dropping connection after {sent} messages")
+                        await socket.close(code=1011, reason="replay drop")
+                        return
+                if not self.loop:
+                    break
+            await socket.wait_closed()
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            reader.cancel()
+
+    async def _read(self, socket, venue: str, subscribed: asyncio.Event):
+        async for message in socket:
+            if message in PONGS:
+                await socket.send(PONGS[message])
+                continue
+            logging.info(f"{venue}: received {str(message)[:200]}")
+            subscribed.set()
+
+
+async def serve(args):
+    server = ReplayServer(*load_recording(args.recording), args.speed, args.loop, args.drop_after)
+    logging.info(f"Replaying {', '.join(server.recording)} on ws://{args.host}:{args.port}/<venue>")
+    async with websockets.serve(server.handle, args.host, args.port, process_request=server.process_request):
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trading Bot WebSocket 시세 재생 서버")
+    parser.add_argument("recording", help="MARKET_FEED_RECORD로 기록한 JSONL 경로")
+    parser.add_argument("--host", default="127.0.0.1", help="바인드 주소")
+    parser.add_argument("--port", type=int, default=8765, help="포트")
+    parser.add_argument("--speed", type=float, default=1.0, help="재생 배속 (0이면 대기 없이 전송)")
+    parser.add_argument("--loop", action="store_true", help="끝까지 재생하면 처음부터 반복")
+    parser.add_argument("--drop-after", type=int, default=0, help="메시지 N개마다 연결 끊기 (재연결 테스트)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
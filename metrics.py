@@ -0,0 +1,375 @@
+"""
+In-process metrics for the Trading Bot
+Prometheus 텍스트 형식으로 노출하는 저비용 카운터/게이지/히스토그램
+
+핫패스에서는 labels()로 얻은 자식 객체를 미리 받아 두고 inc()/observe()만 호출하세요.
+기록은 미리 할당된 리스트의 값만 갱신하며, 경합이 없는 자식별 락 하나만 사용합니다.
+
+멀티 워커(gunicorn) 모드에서는 워커마다 스냅샷을 공유 디렉터리(METRICS_MULTIPROC_DIR)에 주기적으로 기록하고
+/metrics는 모든 워커 파일을 합쳐 노출하므로 어느 워커가 응답해도 카운터가 줄어들지 않습니다.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import functools
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 기본 지연시간 버킷 (초)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = [0.0]
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value[0] += amount
+
+    def get(self) -> float:
+        return self._value[0]
+
+
+class _GaugeChild:
+    __slots__ = ("_value", "_lock", "_function")
+
+    def __init__(self):
+        self._value = [0.0]
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value[0] = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value[0] += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value[0] -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """수집 시점에 값을 계산하는 함수를 지정합니다. (예: 큐 길이)"""
+        self._function = function
+
+    def get(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return float("nan")
+        return self._value[0]
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_counts", "_sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # 마지막 칸은 +Inf
+        self._sum = [0.0]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum[0] += value
+
+    def time(self):
+        """with 블록 또는 데코레이터로 소요시간을 기록합니다."""
+        return _Timer(self)
+
+    def get(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum[0]
+
+
+class _Timer:
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._child.observe(time.perf_counter() - self._started)
+        return False
+
+    def __call__(self, func):
+        child = self._child
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - started)
+        return wrapper
+
+
+class _Metric:
+    """라벨별 자식 객체를 관리하는 메트릭 기반 클래스"""
+
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._new_child()
+            self._children[()] = self._default
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """라벨 값에 해당하는 자식 객체를 반환합니다. (없으면 생성)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def samples(self) -> Dict[Tuple[str, ...], object]:
+        """라벨별 현재 값을 반환합니다."""
+        return {labels: child.get() for labels, child in list(self._children.items())}
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+
+class Registry:
+    """메트릭 모음 및 Prometheus 텍스트 렌더러"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """다른 프로세스로 전달할 수 있는 현재 값 스냅샷을 만듭니다."""
+        return {
+            name: {
+                "type": metric.metric_type,
+                "help": metric.documentation,
+                "labelnames": metric.labelnames,
+                "buckets": getattr(metric, "buckets", None),
+                "samples": metric.samples()
+            }
+            for name, metric in self._metrics.items()
+        }
+
+    def render(self, *extra_snapshots: Dict[str, Dict]) -> str:
+        """이 레지스트리와 다른 프로세스 스냅샷을 합쳐 Prometheus 텍스트로 변환합니다."""
+        return render_snapshots([self.snapshot()] + list(extra_snapshots))
+
+
+class WorkerSnapshotWriter:
+    """워커 레지스트리 스냅샷을 공유 디렉터리의 워커별 파일로 주기적으로 기록합니다."""
+
+    def __init__(self, registry: Registry, directory: str, interval: float = 5.0):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self.path = os.path.join(directory, f"worker-{os.getpid()}.json")
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, name="metrics-writer", daemon=True).start()
+
+    def flush(self):
+        """현재 값을 파일에 기록합니다. (임시 파일 후 교체하므로 읽는 쪽은 항상 완전한 파일을 봄)"""
+        data = {
+            name: {**family, "samples": [[list(labels), value] for labels, value in family["samples"].items()]}
+            for name, family in self.registry.snapshot().items()
+        }
+        with self._lock:
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temporary, self.path)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.warning(f"Failed to write worker metrics: {e}")
+
+
+def read_worker_snapshots(directory: str) -> List[Dict[str, Dict]]:
+    """공유 디렉터리의 모든 워커 스냅샷을 읽습니다. (종료된 워커의 마지막 값도 포함)"""
+    snapshots = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Skipping worker metrics {filename}: {e}")
+            continue
+        snapshots.append({
+            name: {**family, "samples": {tuple(labels): value for labels, value in family["samples"]}}
+            for name, family in data.items()
+        })
+    return snapshots
+
+
+def render_snapshots(snapshots: List[Dict[str, Dict]]) -> str:
+    """여러 프로세스의 스냅샷을 합쳐 Prometheus 텍스트로 변환합니다."""
+    merged = _merge_snapshots(snapshots)
+    lines = []
+    for name, family in merged.items():
+        if not family["samples"]:
+            continue
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        labelnames = family["labelnames"]
+        for labels, value in sorted(family["samples"].items()):
+            label_pairs = [f'{key}="{_escape(val)}"' for key, val in zip(labelnames, labels)]
+            if family["type"] == "histogram":
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(list(family["buckets"]) + ["+Inf"], counts):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else repr(float(bound))
+                    pairs = ",".join(label_pairs + [f'le="{le}"'])
+                    lines.append(f"{name}_bucket{{{pairs}}} {cumulative}")
+                suffix = "{" + ",".join(label_pairs) + "}" if label_pairs else ""
+                lines.append(f"{name}_sum{suffix} {total}")
+                lines.append(f"{name}_count{suffix} {cumulative}")
+            else:
+                suffix = "{" + ",".join(label_pairs) + "}" if label_pairs else ""
+                lines.append(f"{name}{suffix} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _merge_snapshots(snapshots: List[Dict[str, Dict]]) -> Dict[str, Dict]:
+    """카운터와 히스토그램은 합산하고, 게이지는 값이 있는 쪽을 사용합니다."""
+    merged: Dict[str, Dict] = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            target = merged.setdefault(name, {**family, "samples": {}})
+            for labels, value in family["samples"].items():
+                labels = tuple(labels)
+                if labels not in target["samples"]:
+                    target["samples"][labels] = value
+                elif family["type"] == "counter":
+                    target["samples"][labels] += value
+                elif family["type"] == "histogram":
+                    counts, total = target["samples"][labels]
+                    target["samples"][labels] = ([a + b for a, b in zip(counts, value[0])], total + value[1])
+                elif value == value and value != 0:  # 게이지: NaN/0이 아닌 최신 값
+                    target["samples"][labels] = value
+    return merged
+
+
+REGISTRY = Registry()
+
+# 시그널 핫패스 메트릭
+WEBHOOK_LATENCY = REGISTRY.register(Histogram(
+    "tradingbot_webhook_latency_seconds", "Webhook request handling time", ["endpoint"]))
+WEBHOOK_REQUESTS = REGISTRY.register(Counter(
+    "tradingbot_webhook_requests_total", "Webhook requests by endpoint and status", ["endpoint", "status"]))
+SIGNATURE_CHECK_LATENCY = REGISTRY.register(Histogram(
+    "tradingbot_signature_check_seconds", "Webhook HMAC verification time"))
+SIGNAL_PROCESS_LATENCY = REGISTRY.register(Histogram(
+    "tradingbot_signal_process_seconds", "process_tradingview_signal duration"))
+ORDER_LATENCY = REGISTRY.register(Histogram(
+    "tradingbot_order_roundtrip_seconds", "Order round-trip time per venue (exchange or KIS account)", ["venue"]))
+ORDER_RESULTS = REGISTRY.register(Counter(
+    "tradingbot_orders_total", "Orders by venue and outcome", ["venue", "outcome"]))
+RISK_REJECTIONS = REGISTRY.register(Counter(
+    "tradingbot_risk_rejections_total", "Orders rejected by the pre-trade risk check", ["venue"]))
+RATE_LIMIT_WAIT = REGISTRY.register(Histogram(
+    "tradingbot_rate_limit_wait_seconds", "Time spent waiting for a client-side rate limit token",
+    ["venue", "lane"]))
+RATE_LIMIT_THROTTLED = REGISTRY.register(Counter(
+    "tradingbot_rate_limit_throttled_total", "Requests delayed by the client-side rate limiter", ["venue", "lane"]))
+MARKET_FEED_MESSAGES = REGISTRY.register(Counter(
+    "tradingbot_market_feed_messages_total", "WebSocket market-data messages received", ["venue"]))
+MARKET_FEED_RECONNECTS = REGISTRY.register(Counter(
+    "tradingbot_market_feed_reconnects_total", "WebSocket market-data reconnects", ["venue"]))
+ORDER_BOOK_RESYNCS = REGISTRY.register(Counter(
+    "tradingbot_order_book_resyncs_total", "Local order books resynced after a sequence gap", ["venue"]))
+CIRCUIT_TRANSITIONS = REGISTRY.register(Counter(
+    "tradingbot_circuit_transitions_total", "Circuit breaker state changes", ["venue", "state"]))
+CIRCUIT_REJECTIONS = REGISTRY.register(Counter(
+    "tradingbot_circuit_rejections_total", "Calls rejected by an open circuit", ["venue"]))
+DISCORD_SEND_LATENCY = REGISTRY.register(Histogram(
+    "tradingbot_discord_send_seconds", "Discord webhook send time"))
+DISCORD_SEND_FAILURES = REGISTRY.register(Counter(
+    "tradingbot_discord_send_failures_total", "Failed Discord webhook sends"))
+DISCORD_OUTBOX_DEPTH = REGISTRY.register(Gauge(
+    "tradingbot_discord_outbox_depth", "Notifications waiting in the Discord outbox"))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "tradingbot_signal_queue_depth", "Pending and in-flight signals in the durable queue"))
+SCHEDULER_JOB_LATENCY = REGISTRY.register(Histogram(
+    "tradingbot_scheduler_job_seconds", "Scheduled job duration", ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)))
@@ -0,0 +1,155 @@
+"""
+Typed trading objects for the Trading Bot
+시그널, 주문, 주문 결과를 표현하는 __slots__ 기반 객체들
+"""
+
+from typing import Any, Dict, Optional
+
+
+class _Frozen:
+    """생성 후 변경할 수 없는 __slots__ 객체의 기반 클래스"""
+
+    __slots__ = ()
+
+    def __init__(self, **values):
+        setter = object.__setattr__
+        for name in self.__slots__:
+            setter(self, name, values.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__ if name != "payload"))
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__ if name != "payload")
+        return f"{type(self).__name__}({fields})"
+
+    def __reduce__(self):
+        # 엔진 프로세스로 전달할 수 있도록 생성자 인자로 피클링
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+    def replace(self, **changes):
+        """일부 필드만 바꾼 새 객체를 반환합니다."""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return type(self)(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """딕셔너리로 변환합니다."""
+        return {name: getattr(self, name) for name in self.__slots__ if name != "payload"}
+
+
+class Signal(_Frozen):
+    """검증 및 정규화가 끝난 트레이딩뷰 시그널"""
+
+    __slots__ = ("ticker", "action", "quantity", "price", "exchange", "account",
+                 "order_type", "strategy", "signal_id", "payload", "algo")
+
+    def __init__(self, ticker: str, action: str, quantity: float, price: float, exchange: str,
+                 account: str, order_type: str, strategy: str, signal_id: Optional[str] = None,
+                 payload: Optional[Dict] = None, algo: Optional["AlgoSpec"] = None):
+        setter = object.__setattr__
+        setter(self, "ticker", ticker)
+        setter(self, "action", action)
+        setter(self, "quantity", quantity)
+        setter(self, "price", price)
+        setter(self, "exchange", exchange)
+        setter(self, "account", account)
+        setter(self, "order_type", order_type)
+        setter(self, "strategy", strategy)
+        setter(self, "signal_id", signal_id)
+        setter(self, "payload", payload)  # 원본 JSON (큐 저장 및 중복 판별용)
+        setter(self, "algo", algo)  # 분할 집행 방식 (없으면 단일 주문)
+
+    def to_order(self) -> "Order":
+        """매수/매도 시그널을 주문 객체로 변환합니다."""
+        return Order(self.ticker, self.action, self.quantity, self.price, self.order_type,
+                     self.exchange, self.account, self.strategy)
+
+
+class AlgoSpec(_Frozen):
+    """TWAP/아이스버그 분할 집행 설정"""
+
+    __slots__ = ("kind", "duration", "slices", "display_quantity", "interval")
+
+    def __init__(self, kind: str, duration: float = 0.0, slices: int = 0,
+                 display_quantity: float = 0.0, interval: float = 0.0):
+        setter = object.__setattr__
+        setter(self, "kind", kind)                          # "twap" 또는 "iceberg"
+        setter(self, "duration", duration)                  # TWAP 전체 집행 시간(초)
+        setter(self, "slices", slices)                      # TWAP 분할 횟수
+        setter(self, "display_quantity", display_quantity)  # 아이스버그 노출 수량
+        setter(self, "interval", interval)                  # 아이스버그 자식 주문 간격(초)
+
+
+class Order(_Frozen):
+    """거래소 또는 KIS 계좌로 보낼 주문"""
+
+    __slots__ = ("symbol", "side", "quantity", "price", "order_type", "exchange", "account", "strategy")
+
+    def __init__(self, symbol: str, side: str, quantity: float, price: float, order_type: str,
+                 exchange: str, account: str, strategy: str):
+        setter = object.__setattr__
+        setter(self, "symbol", symbol)
+        setter(self, "side", side)
+        setter(self, "quantity", quantity)
+        setter(self, "price", price)
+        setter(self, "order_type", order_type)
+        setter(self, "exchange", exchange)
+        setter(self, "account", account)
+        setter(self, "strategy", strategy)
+
+    @property
+    def is_kis(self) -> bool:
+        """KIS 계좌 주문 여부"""
+        return self.account.startswith("kis")
+
+    @property
+    def venue(self) -> str:
+        """주문이 실행될 계좌 또는 거래소 이름"""
+        return self.account if self.is_kis else self.exchange
+
+
+class OrderResult:
+    """주문 실행 결과"""
+
+    __slots__ = ("success", "order_id", "error", "raw", "order", "retry_after")
+
+    def __init__(self, success: bool, order_id: Optional[str] = None, error: Optional[str] = None,
+                 raw: Any = None, order: Optional[Order] = None, retry_after: Optional[float] = None):
+        self.success = success
+        self.order_id = order_id
+        self.error = error
+        self.raw = raw
+        self.order = order
+        self.retry_after = retry_after  # 주문을 보내지 않고 거부되어 나중에 다시 시도할 수 있으면 대기 시간(초)
+
+    @classmethod
+    def failed(cls, error: str, order: Optional[Order] = None, retry_after: Optional[float] = None) -> "OrderResult":
+        """실패 결과를 만듭니다."""
+        return cls(False, error=error, order=order, retry_after=retry_after)
+
+    def __repr__(self):
+        if self.success:
+            return f"OrderResult(success=True, order_id={self.order_id!r})"
+        return f"OrderResult(success=False, error={self.error!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """기존 API 응답 형식의 딕셔너리로 변환합니다."""
+        if self.success:
+            return {"success": True, "order_id": self.order_id, "result": self.raw}
+        if self.raw is not None:  # 다계좌 주문의 부분 실패 등 상세 결과 포함
+            return {"success": False, "error": self.error, "result": self.raw}
+        if self.retry_after is not None:
+            return {"success": False, "error": self.error, "retry_after": round(self.retry_after, 1)}
+        return {"success": False, "error": self.error}
@@ -0,0 +1,190 @@
+"""
+Local L2 order book for the Trading Bot
+거래소 WebSocket의 스냅샷과 증분(diff) 갱신으로 종목별 호가창을 메모리에 유지합니다.
+가격 단계는 정렬된 double 배열에 보관하며 최우선 호가가 배열 끝에 오도록 하여(매도는 가격 부호 반전)
+대부분 최우선 근처에서 일어나는 갱신의 삽입/삭제 비용을 줄입니다.
+증분의 시퀀스가 끊기면 호가창을 무효화하고 다시 동기화(resync)를 요청합니다.
+"""
+
+import time
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 가격 단계 입력: [(가격, 수량)] (거래소 문자열 그대로여도 됨, 수량 0은 삭제)
+Levels = Iterable[Sequence]
+
+# 동기화 전에 받은 증분을 보관할 최대 개수 (바이낸스 REST 스냅샷 대기 중)
+MAX_BUFFERED = 2000
+
+
+class BookSide:
+    """한쪽(매수/매도) 가격 단계. keys는 오름차순이며 최우선 호가가 마지막 원소"""
+
+    __slots__ = ("sign", "keys", "sizes")
+
+    def __init__(self, sign: float):
+        self.sign = sign  # 매수 1.0, 매도 -1.0 (매도는 -가격으로 저장)
+        self.keys = array("d")
+        self.sizes = array("d")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def clear(self):
+        del self.keys[:]
+        del self.sizes[:]
+
+    def load(self, levels: Levels):
+        """스냅샷으로 교체합니다."""
+        pairs = sorted((float(level[0]) * self.sign, float(level[1])) for level in levels if float(level[1]) > 0)
+        self.keys = array("d", (key for key, _ in pairs))
+        self.sizes = array("d", (size for _, size in pairs))
+
+    def update(self, price: float, size: float):
+        key = price * self.sign
+        keys = self.keys
+        index = bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            if size > 0:
+                self.sizes[index] = size
+            else:
+                del keys[index]
+                del self.sizes[index]
+        elif size > 0:
+            keys.insert(index, key)
+            self.sizes.insert(index, size)
+
+    def best(self) -> Optional[float]:
+        return self.keys[-1] * self.sign if self.keys else None
+
+    def top(self, depth: int) -> List[Tuple[float, float]]:
+        keys, sizes, sign = self.keys, self.sizes, self.sign
+        end = len(keys)
+        return [(keys[index] * sign, sizes[index]) for index in range(end - 1, max(end - depth, 0) - 1, -1)]
+
+    def fill(self, quantity: float) -> Optional[Tuple[float, float]]:
+        """최우선 호가부터 quantity를 채울 때 (평균 가격, 마지막 체결 가격). 깊이가 부족하면 None"""
+        keys, sizes, sign = self.keys, self.sizes, self.sign
+        remaining = quantity
+        cost = 0.0
+        for index in range(len(keys) - 1, -1, -1):
+            price = keys[index] * sign
+            take = sizes[index] if sizes[index] < remaining else remaining
+            cost += take * price
+            remaining -= take
+            if remaining <= 1e-12:
+                return cost / quantity, price
+        return None
+
+    def depth_until(self, limit_price: float) -> float:
+        """limit_price까지(포함) 누적 수량"""
+        keys, sizes = self.keys, self.sizes
+        limit_key = limit_price * self.sign
+        total = 0.0
+        for index in range(len(keys) - 1, -1, -1):
+            if keys[index] < limit_key:
+                break
+            total += sizes[index]
+        return total
+
+
+class OrderBook:
+    """종목 하나의 L2 호가창과 시퀀스 상태"""
+
+    def __init__(self, venue: str, symbol: str):
+        self.venue = venue
+        self.symbol = symbol
+        self.bids = BookSide(1.0)
+        self.asks = BookSide(-1.0)
+        self.sequence = 0
+        self.synced = False
+        self.updated = 0.0  # 마지막 반영 시각 (monotonic)
+        self._buffer: List[Tuple[Levels, Levels, int, int, Optional[int]]] = []
+        self._lock = threading.RLock()  # _apply_delta가 락을 잡은 채 invalidate를 호출함
+
+    def apply_snapshot(self, bids: Levels, asks: Levels, sequence: int = 0) -> bool:
+        """
+        스냅샷으로 호가창을 교체하고, 기다리던 증분 중 스냅샷 이후 것을 이어서 적용합니다.
+        이어지지 않는 증분이 있으면 False (다시 동기화 필요)
+        """
+        with self._lock:
+            self.bids.load(bids)
+            self.asks.load(asks)
+            self.sequence = sequence
+            self.synced = True
+            self.updated = time.monotonic()
+            buffered, self._buffer = self._buffer, []
+            for delta in buffered:
+                if not self._apply_delta(*delta):
+                    return False
+            return True
+
+    def apply_delta(self, bids: Levels, asks: Levels, first: int, last: int, previous: Optional[int] = None) -> bool:
+        """
+        증분을 적용합니다. first..last는 증분이 포함하는 시퀀스 범위, previous는 거래소가 알려 주는 직전 시퀀스(OKX)입니다.
+        시퀀스가 끊기면 호가창을 무효화하고 False를 반환합니다. 동기화 전에는 증분을 보관합니다.
+        """
+        with self._lock:
+            if not self.synced:
+                if len(self._buffer) < MAX_BUFFERED:
+                    self._buffer.append((bids, asks, first, last, previous))
+                return True
+            return self._apply_delta(bids, asks, first, last, previous)
+
+    def _apply_delta(self, bids: Levels, asks: Levels, first: int, last: int, previous: Optional[int]) -> bool:
+        if last <= self.sequence:
+            return True  # 스냅샷에 이미 포함된 증분
+        if (previous != self.sequence) if previous is not None else (first > self.sequence + 1):
+            self.invalidate()
+            return False
+        for price, size, *_ in bids:
+            self.bids.update(float(price), float(size))
+        for price, size, *_ in asks:
+            self.asks.update(float(price), float(size))
+        self.sequence = last
+        self.updated = time.monotonic()
+        return True
+
+    def invalidate(self):
+        """시퀀스 불일치/재연결 시 호가창을 비우고 다음 스냅샷을 기다립니다."""
+        with self._lock:
+            self.synced = False
+            self.bids.clear()
+            self.asks.clear()
+            self._buffer = []
+
+    def age(self) -> float:
+        return time.monotonic() - self.updated if self.updated else float("inf")
+
+    def best(self) -> Tuple[Optional[float], Optional[float]]:
+        """(최우선 매수 호가, 최우선 매도 호가)"""
+        with self._lock:
+            return self.bids.best(), self.asks.best()
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.best()
+        return (bid + ask) / 2 if bid is not None and ask is not None else None
+
+    def top(self, depth: int = 10) -> Dict[str, List[Tuple[float, float]]]:
+        """상위 depth개 가격 단계 {"bids": [(가격, 수량)], "asks": [...]} (최우선부터)"""
+        with self._lock:
+            return {"bids": self.bids.top(depth), "asks": self.asks.top(depth)}
+
+    def fill_price(self, side: str, quantity: float) -> Optional[Tuple[float, float]]:
+        """
+        지금 시장가로 quantity를 체결하면 (평균 가격, 마지막 체결 가격)이 얼마인지 계산합니다.
+        매수는 매도 호가를, 매도는 매수 호가를 소진합니다. 깊이가 부족하거나 동기화 전이면 None
+        """
+        if quantity <= 0:
+            return None
+        with self._lock:
+            if not self.synced:
+                return None
+            return (self.asks if side == "buy" else self.bids).fill(quantity)
+
+    def available(self, side: str, limit_price: float) -> float:
+        """limit_price 이내에서 바로 체결 가능한 수량"""
+        with self._lock:
+            return (self.asks if side == "buy" else self.bids).depth_until(limit_price)
@@ -0,0 +1,251 @@
+"""
+Order rules for the Trading Bot
+주문 수량/가격을 거래소 규칙(수량 단위, 호가 단위, 최소 주문 금액)에 맞게 로컬에서 보정하고 검증합니다.
+CCXT 거래소 규칙은 캐시된 마켓 정보에서 미리 계산하고, KIS는 KRX 호가 가격 단위를 사용합니다.
+거절될 주문을 보내 왕복 시간을 낭비하지 않기 위함입니다.
+"""
+
+import math
+import threading
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import Order
+from smart_router import canonical_symbol
+
+try:
+    import numpy as np
+except ImportError:  # numpy가 없으면 바스켓도 순수 파이썬 경로 사용
+    np = None
+
+# 이보다 작은 바스켓은 배열 생성 비용이 더 커서 순수 파이썬 경로가 빠름 (30건 기준 약 370us vs 280us)
+VECTORIZE_MIN_ORDERS = 256
+
+# CCXT precisionMode 값
+DECIMAL_PLACES = 2
+SIGNIFICANT_DIGITS = 3
+TICK_SIZE = 4
+
+# KRX 호가 가격 단위 (2023.01.25 개편, 코스피/코스닥 공통): (가격 상한 미만, 호가 단위)
+KRX_TICK_BANDS = (
+    (2000, 1),
+    (5000, 5),
+    (20000, 10),
+    (50000, 50),
+    (200000, 100),
+    (500000, 500),
+    (float("inf"), 1000),
+)
+
+
+def krx_tick_size(price: float) -> int:
+    """KRX 가격대별 호가 단위를 반환합니다."""
+    for upper, tick in KRX_TICK_BANDS:
+        if price < upper:
+            return tick
+    return 1000
+
+
+class SymbolRule:
+    """종목별 주문 규칙 (0이면 제한 없음)"""
+
+    __slots__ = ("lot_step", "min_quantity", "max_quantity", "tick_size", "min_notional")
+
+    def __init__(self, lot_step: float = 0.0, min_quantity: float = 0.0, max_quantity: float = 0.0,
+                 tick_size: float = 0.0, min_notional: float = 0.0):
+        self.lot_step = lot_step
+        self.min_quantity = min_quantity
+        self.max_quantity = max_quantity
+        self.tick_size = tick_size
+        self.min_notional = min_notional
+
+    def __repr__(self):
+        return (f"SymbolRule(lot_step={self.lot_step}, min_quantity={self.min_quantity}, "
+                f"tick_size={self.tick_size}, min_notional={self.min_notional})")
+
+
+def _step_from_precision(value: Any, precision_mode: int) -> float:
+    """CCXT precision 값을 단위 크기로 변환합니다."""
+    if value is None:
+        return 0.0
+    if precision_mode == TICK_SIZE:
+        return float(value)
+    if precision_mode == DECIMAL_PLACES:
+        return 10.0 ** -int(value)
+    return 0.0  # 유효숫자 방식은 단위가 가격에 따라 달라지므로 보정하지 않음
+
+
+def rule_from_market(market: Dict, precision_mode: int = TICK_SIZE) -> SymbolRule:
+    """CCXT 마켓 정보에서 주문 규칙을 계산합니다."""
+    precision = market.get("precision") or {}
+    limits = market.get("limits") or {}
+    amount_limits = limits.get("amount") or {}
+    cost_limits = limits.get("cost") or {}
+    return SymbolRule(
+        lot_step=_step_from_precision(precision.get("amount"), precision_mode),
+        min_quantity=float(amount_limits.get("min") or 0),
+        max_quantity=float(amount_limits.get("max") or 0),
+        tick_size=_step_from_precision(precision.get("price"), precision_mode),
+        min_notional=float(cost_limits.get("min") or 0)
+    )
+
+
+@lru_cache(maxsize=1024)
+def _step_decimals(step: float) -> int:
+    """단위 크기의 소수점 자릿수 (0.001 -> 3, 0.25 -> 2, 5 -> 0)"""
+    return max(0, -Decimal(repr(step)).normalize().as_tuple().exponent)
+
+
+def _round_to_step(value: float, step: float, up: bool = False) -> float:
+    """단위 크기의 배수로 내림(또는 올림)합니다."""
+    if not step:
+        return value
+    units = value / step
+    units = math.ceil(units - 1e-9) if up else math.floor(units + 1e-9)
+    return round(units * step, _step_decimals(step))
+
+
+class OrderRules:
+    """거래소/종목별 규칙으로 주문을 보정하고 검증합니다."""
+
+    def __init__(self, exchange_clients: Any):
+        self.exchange_clients = exchange_clients
+        self._rules: Dict[str, Dict[str, SymbolRule]] = {}
+        self._ids: Dict[str, Dict[str, str]] = {}  # 거래소 -> {거래소 마켓 ID: CCXT 통합 심볼}
+        self._built_from: Dict[str, int] = {}  # 거래소 -> 규칙을 만든 markets 객체 id
+        self._lock = threading.Lock()
+
+    def rule_for(self, order: Order) -> Optional[SymbolRule]:
+        """주문에 적용할 규칙을 반환합니다. 규칙을 알 수 없으면 None"""
+        if order.is_kis:
+            return SymbolRule(lot_step=1, min_quantity=1, tick_size=krx_tick_size(order.price))
+        rules = self._exchange_rules(order.exchange)
+        rule = rules.get(order.symbol)
+        if rule is None and rules:
+            # 거래소 고유 심볼(BTCUSDT, KRW-BTC 등)로 들어온 주문은 마켓 ID나 공통 심볼로 다시 찾음
+            symbol = (self._ids.get(order.exchange, {}).get(order.symbol)
+                      or canonical_symbol(order.symbol, order.exchange))
+            rule = rules.get(symbol)
+        return rule
+
+    def _exchange_rules(self, exchange: str) -> Dict[str, SymbolRule]:
+        """거래소 전체 규칙표. 마켓 정보가 바뀐 경우에만 다시 계산합니다."""
+        client = self.exchange_clients.get_client(exchange)
+        markets = getattr(client, "markets", None) if client else None
+        if not markets:
+            return {}
+
+        if self._built_from.get(exchange) != id(markets):
+            precision_mode = getattr(client, "precisionMode", TICK_SIZE)
+            rules = {}
+            for symbol, market in markets.items():
+                try:
+                    rules[symbol] = rule_from_market(market, precision_mode)
+                except (TypeError, ValueError):
+                    continue
+            ids = {}
+            for market_id, entry in (getattr(client, "markets_by_id", None) or {}).items():
+                market = entry[0] if isinstance(entry, list) and entry else entry  # CCXT 4는 ID별 마켓 목록
+                if isinstance(market, dict) and market.get("symbol"):
+                    ids[market_id] = market["symbol"]
+            with self._lock:
+                self._rules[exchange] = rules
+                self._ids[exchange] = ids
+                self._built_from[exchange] = id(markets)
+        return self._rules.get(exchange, {})
+
+    def normalize(self, order: Order, reference_price: float = 0.0) -> Tuple[Order, Optional[str]]:
+        """
+        수량은 수량 단위로 내림, 지정가는 매수 내림/매도 올림으로 호가 단위에 맞춥니다.
+        규칙 위반이면 (원래 주문, 사유), 정상이면 (보정된 주문, None)을 반환합니다.
+        """
+        rule = self.rule_for(order)
+        if rule is None:
+            return order, None
+
+        quantity = _round_to_step(order.quantity, rule.lot_step)
+        price = order.price
+        if order.order_type == "limit" and price:
+            price = _round_to_step(price, rule.tick_size, up=order.side == "sell")
+
+        error = self._violation(rule, quantity, price or reference_price)
+        if error:
+            return order, f"{order.symbol}: {error}"
+        if quantity == order.quantity and price == order.price:
+            return order, None
+        return order.replace(quantity=quantity, price=price), None
+
+    @staticmethod
+    def _violation(rule: SymbolRule, quantity: float, price: float) -> Optional[str]:
+        if quantity <= 0:
+            return f"quantity rounds to 0 with lot size {rule.lot_step:g}"
+        if rule.min_quantity and quantity < rule.min_quantity:
+            return f"quantity {quantity:g} below minimum {rule.min_quantity:g}"
+        if rule.max_quantity and quantity > rule.max_quantity:
+            return f"quantity {quantity:g} above maximum {rule.max_quantity:g}"
+        if rule.min_notional and price and quantity * price < rule.min_notional:
+            return f"notional {quantity * price:g} below minimum {rule.min_notional:g}"
+        return None
+
+    def normalize_batch(self, orders: List[Order],
+                        reference_prices: List[float] = None) -> List[Tuple[Order, Optional[str]]]:
+        """
+        바스켓 주문 전체를 한 번에 보정합니다.
+        numpy가 있고 주문 수가 충분히 많으면 수량/가격 반올림과 한도 비교를 배열 연산으로 처리합니다.
+        """
+        if np is None or len(orders) < VECTORIZE_MIN_ORDERS:
+            prices = reference_prices or [0.0] * len(orders)
+            return [self.normalize(order, price) for order, price in zip(orders, prices)]
+
+        rules = [self.rule_for(order) for order in orders]
+        empty = SymbolRule()
+        rules_or_empty = [rule or empty for rule in rules]
+
+        quantity = np.array([order.quantity for order in orders], dtype=float)
+        price = np.array([order.price for order in orders], dtype=float)
+        reference = np.array(reference_prices or [0.0] * len(orders), dtype=float)
+        lot = np.array([rule.lot_step for rule in rules_or_empty], dtype=float)
+        tick = np.array([rule.tick_size for rule in rules_or_empty], dtype=float)
+        min_quantity = np.array([rule.min_quantity for rule in rules_or_empty], dtype=float)
+        max_quantity = np.array([rule.max_quantity for rule in rules_or_empty], dtype=float)
+        min_notional = np.array([rule.min_notional for rule in rules_or_empty], dtype=float)
+        is_limit = np.array([order.order_type == "limit" for order in orders])
+        is_sell = np.array([order.side == "sell" for order in orders])
+
+        safe_lot = np.where(lot > 0, lot, 1.0)
+        rounded_quantity = np.where(lot > 0, np.floor(quantity / safe_lot + 1e-9) * safe_lot, quantity)
+
+        safe_tick = np.where(tick > 0, tick, 1.0)
+        units = price / safe_tick
+        units = np.where(is_sell, np.ceil(units - 1e-9), np.floor(units + 1e-9))
+        rounded_price = np.where(is_limit & (tick > 0) & (price > 0), units * safe_tick, price)
+
+        check_price = np.where(rounded_price > 0, rounded_price, reference)
+        notional = rounded_quantity * check_price
+        invalid = ((rounded_quantity <= 0)
+                   | ((min_quantity > 0) & (rounded_quantity < min_quantity))
+                   | ((max_quantity > 0) & (rounded_quantity > max_quantity))
+                   | ((min_notional > 0) & (check_price > 0) & (notional < min_notional)))
+
+        results = []
+        for index, order in enumerate(orders):
+            rule = rules[index]
+            if rule is None:
+                results.append((order, None))
+                continue
+            if invalid[index]:
+                error = self._violation(rule, float(rounded_quantity[index]), float(check_price[index]))
+                results.append((order, f"{order.symbol}: {error}"))
+                continue
+
+            # 배열 연산의 부동소수점 오차를 단위 자릿수로 정리
+            new_quantity = (round(float(rounded_quantity[index]), _step_decimals(rule.lot_step))
+                            if rule.lot_step else order.quantity)
+            new_price = (round(float(rounded_price[index]), _step_decimals(rule.tick_size))
+                         if rule.tick_size and order.order_type == "limit" and order.price else order.price)
+            if new_quantity == order.quantity and new_price == order.price:
+                results.append((order, None))
+            else:
+                results.append((order.replace(quantity=new_quantity, price=new_price), None))
+        return results
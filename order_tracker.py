@@ -0,0 +1,216 @@
+"""
+Order tracker for the Trading Bot
+전송된 지정가 주문을 미체결 상태로 보관하고, 계좌/거래소별로 한 번의 조회로 일괄 대조합니다.
+(주문마다 조회하지 않음) 제출 직후에는 짧은 간격으로, 오래 걸려 있는 주문일수록 긴 간격으로 조회하며,
+새 체결 수량은 체결 콜백으로 엔진의 포지션 원장/리스크 카운터에 전달됩니다.
+"""
+
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models import Order
+
+# 주문 상태
+STATUS_OPEN = "open"
+STATUS_FILLED = "filled"
+STATUS_CANCELLED = "cancelled"
+
+# 거래소 조회 결과: 주문 ID -> (누적 체결 수량, 상태, 평균 체결가)
+OrderStatus = Tuple[float, str, float]
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parse_order_status(raw: Dict) -> Optional[OrderStatus]:
+    """CCXT 주문 또는 업비트 주문 응답을 (누적 체결 수량, 상태, 평균 체결가)로 변환합니다."""
+    if not isinstance(raw, dict):
+        return None
+    if "uuid" in raw:  # 업비트
+        state = raw.get("state")
+        status = (STATUS_FILLED if state == "done"
+                  else STATUS_CANCELLED if state == "cancel" else STATUS_OPEN)
+        return _number(raw.get("executed_volume")), status, 0.0
+    state = raw.get("status")
+    if state is None:
+        return None
+    status = (STATUS_OPEN if state == "open"
+              else STATUS_FILLED if state == "closed" else STATUS_CANCELLED)
+    return _number(raw.get("filled")), status, _number(raw.get("average"))
+
+
+def parse_kis_order(row: Dict) -> OrderStatus:
+    """KIS 일별 주문체결 조회(output1) 행을 (누적 체결 수량, 상태, 평균 체결가)로 변환합니다."""
+    filled = _number(row.get("tot_ccld_qty"))
+    if filled >= _number(row.get("ord_qty")):
+        status = STATUS_FILLED
+    elif _number(row.get("rmn_qty")) <= 0:
+        status = STATUS_CANCELLED  # 잔량 없이 미체결 수량이 남음 = 취소/거부
+    else:
+        status = STATUS_OPEN
+    return filled, status, _number(row.get("avg_prvs"))
+
+
+class TrackedOrder:
+    """추적 중인 주문"""
+
+    __slots__ = ("order_id", "order", "filled", "status", "average_price", "submitted_at",
+                 "next_poll", "interval", "updated_at")
+
+    def __init__(self, order_id: str, order: Order, interval: float):
+        self.order_id = order_id
+        self.order = order
+        self.filled = 0.0
+        self.status = STATUS_OPEN
+        self.average_price = 0.0
+        self.submitted_at = time.time()
+        self.interval = interval
+        self.next_poll = time.monotonic() + interval
+        self.updated_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "order_id": self.order_id,
+            "venue": self.order.venue,
+            "symbol": self.order.symbol,
+            "side": self.order.side,
+            "quantity": self.order.quantity,
+            "price": self.order.price,
+            "filled": self.filled,
+            "average_price": self.average_price,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "updated_at": self.updated_at
+        }
+
+
+class OrderTracker:
+    """미체결 주문을 계좌/거래소 단위로 일괄 조회하는 추적기"""
+
+    def __init__(self, fetch_statuses: Callable[[str, List[TrackedOrder]], Optional[Dict[str, OrderStatus]]],
+                 on_fill: Optional[Callable[[Order, float, float], None]] = None,
+                 on_done: Optional[Callable[[TrackedOrder], None]] = None,
+                 on_update: Optional[Callable[[TrackedOrder], None]] = None,
+                 fast_interval: float = 1.0, slow_interval: float = 30.0, max_workers: int = 4):
+        self.fetch_statuses = fetch_statuses  # (계좌/거래소, 추적 주문 목록) -> 주문별 상태 (조회 실패 시 None)
+        self.on_fill = on_fill
+        self.on_done = on_done
+        self.on_update = on_update  # 체결 수량이나 상태가 바뀔 때마다 (분할 집행 자식 주문 갱신 등)
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order-tracker")
+        self._orders: Dict[str, Dict[str, TrackedOrder]] = {}  # 계좌/거래소 -> {주문 ID: 주문}
+        self._polling = set()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, order_id: str, order: Order):
+        """전송된 주문을 추적 대상에 추가합니다."""
+        if not order_id:
+            return
+        with self._condition:
+            self._orders.setdefault(order.venue, {})[order_id] = TrackedOrder(order_id, order, self.fast_interval)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="order-tracker", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def open_orders(self) -> List[Dict[str, Any]]:
+        """추적 중인 미체결 주문 목록"""
+        with self._condition:
+            return [tracked.to_dict() for orders in self._orders.values() for tracked in orders.values()]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    due = [venue for venue, orders in self._orders.items()
+                           if venue not in self._polling
+                           and any(tracked.next_poll <= now for tracked in orders.values())]
+                    if due:
+                        self._polling.update(due)
+                        break
+                    pending = [tracked.next_poll for venue, orders in self._orders.items()
+                               if venue not in self._polling for tracked in orders.values()]
+                    self._condition.wait(max(0.0, min(pending) - now) if pending else None)
+
+            for venue in due:
+                self.executor.submit(self._poll_venue, venue)
+
+    def _poll_venue(self, venue: str):
+        """계좌/거래소의 추적 주문 전체를 한 번의 조회로 대조합니다."""
+        try:
+            with self._condition:
+                orders = list(self._orders.get(venue, {}).values())
+            if not orders:
+                return
+            try:
+                statuses = self.fetch_statuses(venue, orders)
+            except Exception as e:
+                logging.error(f"Order status poll error for {venue}: {e}")
+                statuses = None
+
+            now = time.monotonic()
+            updated = []
+            for tracked in orders:
+                status = statuses.get(tracked.order_id) if statuses is not None else None
+                changed = status is not None and self._apply(tracked, status)
+                if changed:
+                    updated.append(tracked)
+                # 변화가 있으면 빠른 간격으로, 없으면 간격을 두 배씩 늘림
+                tracked.interval = (self.fast_interval if changed
+                                    else min(self.slow_interval, tracked.interval * 2))
+                tracked.next_poll = now + tracked.interval
+
+            with self._condition:
+                venue_orders = self._orders.get(venue, {})
+                for tracked in orders:
+                    if tracked.status != STATUS_OPEN:
+                        venue_orders.pop(tracked.order_id, None)
+                if not venue_orders:
+                    self._orders.pop(venue, None)
+        finally:
+            with self._condition:
+                self._polling.discard(venue)
+                self._condition.notify()
+
+        if self.on_update is not None:
+            for tracked in updated:
+                try:
+                    self.on_update(tracked)
+                except Exception as e:
+                    logging.error(f"Order update callback error: {e}")
+
+        for tracked in orders:
+            if tracked.status != STATUS_OPEN and self.on_done is not None:
+                try:
+                    self.on_done(tracked)
+                except Exception as e:
+                    logging.error(f"Order done callback error: {e}")
+
+    def _apply(self, tracked: TrackedOrder, status: OrderStatus) -> bool:
+        """조회 결과를 반영하고 새 체결이 있으면 체결 콜백을 호출합니다. 변화가 있었는지 반환합니다."""
+        filled, state, average_price = status
+        delta = filled - tracked.filled
+        if delta <= 1e-12 and state == tracked.status:
+            return False
+
+        tracked.updated_at = time.time()
+        if delta > 1e-12:
+            tracked.filled = filled
+            tracked.average_price = average_price or tracked.average_price
+            if self.on_fill is not None:
+                try:
+                    self.on_fill(tracked.order, delta, average_price or tracked.order.price)
+                except Exception as e:
+                    logging.error(f"Order fill callback error: {e}")
+        tracked.status = state
+        return True
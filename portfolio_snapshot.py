@@ -0,0 +1,141 @@
+"""
+Portfolio snapshot service for the Trading Bot
+계좌/거래소 잔고를 백그라운드에서 동시에 조회하고 마지막 스냅샷을 보관합니다.
+대시보드, /api/status, 리포트는 보관된 스냅샷을 즉시 읽으며 거래소를 직접 호출하지 않습니다.
+"""
+
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# (구분, 이름) -> 잔고 조회 함수. 구분은 "kis_accounts" 또는 "exchanges"
+BalanceJobs = Dict[Tuple[str, str], Optional[Callable[[], Any]]]
+
+
+class PortfolioSnapshotService:
+    """stale-while-revalidate 방식의 포트폴리오 스냅샷"""
+
+    def __init__(self, job_provider: Callable[[], BalanceJobs], refresh_interval: float = 60.0,
+                 call_timeout: float = 10.0, max_workers: int = 16,
+                 on_result: Optional[Callable[[str, str, Any, float], None]] = None):
+        self.job_provider = job_provider
+        self.on_result = on_result  # (구분, 이름, 잔고, 조회 시작 시각) - 포지션 원장 보정 등에 사용
+        self.refresh_interval = refresh_interval
+        self.call_timeout = call_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="portfolio")
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._refreshed_at = 0.0
+        self._in_flight: Dict[Tuple[str, str], Tuple[Future, float]] = {}
+        self._refresh_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """백그라운드 갱신 스레드를 시작합니다."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="portfolio-snapshot", daemon=True)
+            self._thread.start()
+
+    def get(self) -> Dict[str, Any]:
+        """
+        마지막 스냅샷을 반환합니다.
+        오래된 스냅샷도 그대로 반환하되 백그라운드 갱신을 앞당깁니다.
+        최초 스냅샷이 아직 없으면 첫 갱신을 최대 call_timeout 동안 기다립니다.
+        """
+        if self._snapshot is None:
+            self.start()
+            self._ready.wait(self.call_timeout + 1)
+
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {
+                "timestamp": None,
+                "kis_accounts": {},
+                "exchanges": {},
+                "total_active_accounts": 0,
+                "refreshing": True
+            }
+
+        age = time.time() - self._refreshed_at
+        if age > self.refresh_interval:
+            self._wakeup.set()
+
+        status = dict(snapshot)
+        status["age_seconds"] = round(age, 1)
+        status["stale"] = age > self.refresh_interval
+        return status
+
+    def invalidate(self):
+        """클라이언트 구성이 바뀌었을 때 백그라운드 갱신을 즉시 요청합니다."""
+        self._wakeup.set()
+
+    def refresh(self) -> Dict[str, Any]:
+        """모든 잔고를 동시에 조회하여 스냅샷을 갱신합니다. (블로킹, 최대 call_timeout)"""
+        with self._refresh_lock:
+            jobs = self.job_provider()
+            previous = self._snapshot or {}
+            started = {}
+
+            for key, fetch in jobs.items():
+                if fetch is None:
+                    continue
+                in_flight = self._in_flight.get(key)
+                if in_flight is None or in_flight[0].done():
+                    # 이전 호출이 아직 끝나지 않은 계좌는 새로 요청하지 않음
+                    in_flight = (self.executor.submit(fetch), time.monotonic())
+                    self._in_flight[key] = in_flight
+                started[key] = in_flight
+
+            wait([future for future, _ in started.values()], timeout=self.call_timeout)
+
+            snapshot = {
+                "timestamp": datetime.now().isoformat(),
+                "kis_accounts": {},
+                "exchanges": {},
+                "total_active_accounts": 0
+            }
+            for (group, name), fetch in jobs.items():
+                if fetch is None:
+                    snapshot[group][name] = {"status": "not_configured"}
+                    continue
+
+                future, submitted_at = started[(group, name)]
+                if not future.done():
+                    entry = previous.get(group, {}).get(name)
+                    if entry is not None and entry.get("status") == "active":
+                        entry = dict(entry, stale=True)  # 마지막 정상 값 유지
+                    else:
+                        entry = {"status": "timeout", "error": f"No response within {self.call_timeout}s"}
+                elif future.exception() is not None:
+                    entry = {"status": "error", "error": str(future.exception())}
+                else:
+                    entry = {"status": "active", "balance_retrieved": future.result() is not None}
+                    if self.on_result is not None and future.result() is not None:
+                        try:
+                            self.on_result(group, name, future.result(), submitted_at)
+                        except Exception as e:
+                            logging.error(f"Portfolio snapshot listener error for {name}: {e}")
+
+                snapshot[group][name] = entry
+                if entry["status"] == "active":
+                    snapshot["total_active_accounts"] += 1
+
+            self._in_flight = {key: in_flight for key, in_flight in self._in_flight.items()
+                               if key in jobs and not in_flight[0].done()}
+            self._snapshot = snapshot
+            self._refreshed_at = time.time()
+            self._ready.set()
+            return snapshot
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Portfolio snapshot refresh error: {e}")
+            self._wakeup.wait(self.refresh_interval)
+            self._wakeup.clear()
@@ -0,0 +1,216 @@
+"""
+Position ledger for the Trading Bot
+(계좌/거래소, 종목)별 보유 수량을 메모리에 유지하고 파일에 저장합니다.
+자체 체결로 갱신되고 주기적인 잔고 조회 결과로 보정되므로,
+청산 시그널은 잔고 조회 없이 바로 청산 주문을 만들 수 있습니다.
+체결 경로에서는 변경 표시만 하고, 파일 저장은 백그라운드 스레드가 모아서 수행합니다.
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+# 거래소 잔고에서 포지션으로 보지 않는 호가 통화
+_QUOTE_CURRENCIES = frozenset(("KRW", "USDT", "USDC", "BUSD", "USD"))
+
+
+def position_symbol(venue_is_kis: bool, ticker: str) -> str:
+    """
+    원장 키로 사용할 종목 이름을 만듭니다.
+    KIS는 종목코드, 거래소는 잔고가 자산 단위이므로 기초 자산(BTC/USDT, KRW-BTC -> BTC)을 사용합니다.
+    """
+    if venue_is_kis:
+        return ticker
+    if "/" in ticker:
+        return ticker.split("/")[0].upper()
+    if "-" in ticker:
+        return ticker.split("-")[-1].upper()
+    return ticker.upper()
+
+
+def parse_holdings(venue_is_kis: bool, balance: Any, available: bool = False) -> Optional[Dict[str, float]]:
+    """
+    KIS/업비트/CCXT 잔고 응답을 {종목: 수량}으로 변환합니다. 알 수 없는 형식이면 None
+    available이면 미체결 주문에 묶이지 않은 수량(KIS 주문가능수량, 업비트 balance, CCXT free)을 반환합니다.
+    """
+    holdings = {}
+    try:
+        if venue_is_kis:
+            if not isinstance(balance, dict) or balance.get("rt_cd") not in (None, "0"):
+                return None
+            for item in balance.get("output1") or []:
+                quantity = float(item.get("ord_psbl_qty" if available else "hldg_qty") or 0)
+                if quantity:
+                    holdings[item["pdno"]] = quantity
+        elif isinstance(balance, list):  # 업비트
+            for item in balance:
+                quantity = float(item.get("balance") or 0)
+                if not available:
+                    quantity += float(item.get("locked") or 0)
+                if quantity and item.get("currency") not in _QUOTE_CURRENCIES:
+                    holdings[item["currency"].upper()] = quantity
+        elif isinstance(balance, dict) and isinstance(balance.get("free" if available else "total"), dict):  # CCXT
+            for currency, quantity in balance["free" if available else "total"].items():
+                if quantity and currency.upper() not in _QUOTE_CURRENCIES:
+                    holdings[currency.upper()] = float(quantity)
+        else:
+            return None
+    except (KeyError, TypeError, ValueError) as e:
+        logging.error(f"Failed to parse balance for position reconciliation: {e}")
+        return None
+    return holdings
+
+
+class PositionLedger:
+    """파일로 유지되는 포지션 원장"""
+
+    def __init__(self, path: str = "data/positions.json", flush_interval: float = 0.5):
+        self.path = path
+        self.flush_interval = flush_interval  # 변경 후 저장까지 모으는 시간(초)
+        self._positions: Dict[Tuple[str, str], float] = {}
+        self._reconciled = set()  # 잔고로 한 번 이상 보정된 계좌/거래소
+        # 계좌/거래소 -> {종목: 주문 가능 수량} (메모리에만 보관, 잔고 보정 때 교체)
+        self._available: Dict[str, Dict[str, float]] = {}
+        self._last_fill: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()  # 백그라운드 저장과 종료 시 저장의 동시 쓰기 방지
+        self._thread: Optional[threading.Thread] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._load()
+        atexit.register(self.flush)
+
+    def get(self, venue: str, symbol: str) -> float:
+        """보유 수량을 반환합니다. (없으면 0)"""
+        return self._positions.get((venue, symbol), 0.0)
+
+    def knows(self, venue: str) -> bool:
+        """해당 계좌/거래소의 포지션을 신뢰할 수 있는지 (보정 이력 또는 저장된 포지션 존재)"""
+        return venue in self._reconciled
+
+    def available(self, venue: str, symbol: str) -> Optional[float]:
+        """미체결 주문에 묶이지 않은 주문 가능 수량. 잔고로 보정된 적이 없으면 None"""
+        available = self._available.get(venue)
+        return None if available is None else available.get(symbol, 0.0)
+
+    def reserve(self, venue: str, symbol: str, quantity: float):
+        """미체결 매도 주문에 묶인 수량을 주문 가능 수량에서 뺍니다."""
+        with self._lock:
+            available = self._available.get(venue)
+            if available is not None:
+                available[symbol] = max(0.0, available.get(symbol, 0.0) - quantity)
+
+    def apply_fill(self, venue: str, symbol: str, side: str, quantity: float, resting: bool = False):
+        """체결을 반영합니다. resting은 reserve로 이미 묶어 둔 미체결 주문의 체결인지 여부"""
+        delta = quantity if side == "buy" else -quantity
+        with self._lock:
+            self._last_fill[venue] = time.monotonic()
+            available = self._available.get(venue)
+            if available is not None and (delta > 0 or not resting):
+                available[symbol] = max(0.0, available.get(symbol, 0.0) + delta)
+            key = (venue, symbol)
+            position = self._positions.get(key, 0.0) + delta
+            if abs(position) < 1e-12:
+                self._positions.pop(key, None)
+            else:
+                self._positions[key] = position
+            self._mark_dirty()
+
+    def reconcile(self, venue: str, holdings: Dict[str, float], as_of: float = None,
+                  available: Optional[Dict[str, float]] = None) -> int:
+        """
+        잔고 조회 결과로 계좌/거래소의 포지션을 교체하고 달라진 종목 수를 반환합니다.
+        available(주문 가능 수량)이 있으면 함께 교체합니다.
+        as_of(time.monotonic 기준 조회 시작 시각) 이후 체결이 있었다면 오래된 잔고이므로 건너뜁니다.
+        """
+        with self._lock:
+            if as_of is not None and self._last_fill.get(venue, 0.0) > as_of:
+                return 0
+            if available is not None:
+                self._available[venue] = dict(available)
+            current = {symbol: quantity for (owner, symbol), quantity in self._positions.items()
+                       if owner == venue}
+            changed = [symbol for symbol in set(current) | set(holdings)
+                       if abs(current.get(symbol, 0.0) - holdings.get(symbol, 0.0)) > 1e-9]
+            self._reconciled.add(venue)
+            if not changed:
+                return 0
+
+            for symbol in current:
+                del self._positions[(venue, symbol)]
+            for symbol, quantity in holdings.items():
+                self._positions[(venue, symbol)] = quantity
+            self._mark_dirty()
+
+        logging.info(f"Position ledger reconciled {venue}: {len(changed)} symbol(s) corrected")
+        return len(changed)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """{계좌/거래소: {종목: 수량}} 형태의 복사본을 반환합니다."""
+        result: Dict[str, Dict[str, float]] = {}
+        for (venue, symbol), quantity in list(self._positions.items()):
+            result.setdefault(venue, {})[symbol] = quantity
+        return result
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for venue, positions in data.items():
+                for symbol, quantity in positions.items():
+                    self._positions[(venue, symbol)] = float(quantity)
+                self._reconciled.add(venue)
+            logging.info(f"Loaded {len(self._positions)} positions from {self.path}")
+        except Exception as e:
+            logging.error(f"Failed to load position ledger {self.path}: {e}")
+
+    def flush(self):
+        """변경된 원장을 바로 저장합니다. (종료 시 사용)"""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                data: Dict[str, Dict[str, float]] = {}
+                for (venue, symbol), quantity in self._positions.items():
+                    data.setdefault(venue, {})[symbol] = quantity
+            if not self._save(data):
+                with self._lock:
+                    self._dirty = True  # 다음 저장 때 다시 시도
+
+    def _mark_dirty(self):
+        """변경을 표시하고 백그라운드 저장을 깨웁니다. (호출 측에서 락 보유)"""
+        self._dirty = True
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="position-ledger", daemon=True)
+            self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            time.sleep(self.flush_interval)  # 연속 체결을 한 번의 저장으로 합침
+            self._wakeup.clear()
+            self.flush()
+
+    def _save(self, data: Dict[str, Dict[str, float]]) -> bool:
+        """원장을 임시 파일에 쓴 뒤 교체합니다."""
+        try:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to save position ledger {self.path}: {e}")
+            return False
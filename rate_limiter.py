@@ -0,0 +1,186 @@
+"""
+Client-side rate limiter for the Trading Bot
+KIS(앱 키별)와 업비트(API 키별, 엔드포인트 그룹별) 요청 한도를 토큰 버킷으로 지킵니다.
+토큰을 기다리는 요청은 우선순위 대기열에서 주문 > 취소 > 시세 > 잔고 순으로 처리되므로
+대시보드 잔고 조회가 주문 직전에 한도를 소진해도 주문이 먼저 전송됩니다.
+스레드(동기)와 코루틴(비동기) 요청은 같은 대기열에 서며, 코루틴은 차례가 오면 퓨처로 깨어납니다.
+"""
+
+import heapq
+import asyncio
+import hashlib
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from metrics import RATE_LIMIT_WAIT, RATE_LIMIT_THROTTLED
+
+# 우선순위 (작을수록 먼저)
+PRIORITY_ORDER = 0
+PRIORITY_CANCEL = 1
+PRIORITY_QUOTE = 2
+PRIORITY_BALANCE = 3
+LANES = ("order", "cancel", "quote", "balance")
+
+# 거래소별 엔드포인트 그룹 한도: 그룹 -> (초당 요청 수, 버스트)
+DEFAULT_LIMITS: Dict[str, Dict[str, Tuple[float, float]]] = {
+    "kis": {"default": (18.0, 18.0)},  # 실전 20건/초 (모의투자는 2건/초)
+    "upbit": {
+        "order": (8.0, 8.0),           # 주문 생성/취소
+        "exchange": (30.0, 30.0),      # 그 외 Exchange API (잔고, 주문 조회)
+        "quotation": (10.0, 10.0),     # 시세 조회
+    },
+}
+
+
+class TokenBucket:
+    """우선순위 대기열이 있는 토큰 버킷"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int]] = []
+        self._futures: Dict[Tuple[int, int], asyncio.Future] = {}  # 비동기 대기자 -> 깨울 퓨처
+        self._sequence = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, priority: int = PRIORITY_BALANCE) -> float:
+        """토큰 하나를 얻을 때까지 대기하고 대기한 시간(초)을 반환합니다."""
+        started = time.monotonic()
+        with self._condition:
+            self._sequence += 1
+            entry = (priority, self._sequence)
+            heapq.heappush(self._waiters, entry)
+            acquired = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._waiters[0] == entry:
+                        if self._tokens >= 1:
+                            self._tokens -= 1
+                            acquired = True
+                            return now - started
+                        self._condition.wait((1 - self._tokens) / self.rate)
+                    else:
+                        self._condition.wait()  # 앞선 요청이 토큰을 얻으면 깨어남
+            finally:
+                if acquired:
+                    heapq.heappop(self._waiters)
+                else:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                self._wake()
+
+    async def acquire_async(self, priority: int = PRIORITY_BALANCE) -> float:
+        """
+        acquire의 비동기 버전. 동기 요청과 같은 우선순위 대기열에 서서
+        이벤트 루프를 막지 않고 차례와 토큰을 기다립니다.
+        """
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        with self._condition:
+            self._sequence += 1
+            entry = (priority, self._sequence)
+            heapq.heappush(self._waiters, entry)
+        acquired = False
+        try:
+            while True:
+                with self._condition:
+                    now = time.monotonic()
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._waiters[0] == entry:
+                        if self._tokens >= 1:
+                            self._tokens -= 1
+                            acquired = True
+                            return now - started
+                        timeout = (1 - self._tokens) / self.rate
+                    else:
+                        timeout = None  # 앞선 요청이 토큰을 얻으면 깨어남
+                    wakeup = self._futures[entry] = loop.create_future()
+                await asyncio.wait((wakeup,), timeout=timeout)
+        finally:
+            with self._condition:
+                self._futures.pop(entry, None)
+                if acquired:
+                    heapq.heappop(self._waiters)
+                else:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                self._wake()
+
+    def _wake(self):
+        """대기열 맨 앞 요청을 깨웁니다. (락을 잡은 상태에서 호출)"""
+        self._condition.notify_all()
+        if not self._waiters:
+            return
+        wakeup = self._futures.get(self._waiters[0])
+        if wakeup is not None and not wakeup.done():
+            try:
+                wakeup.get_loop().call_soon_threadsafe(_resolve, wakeup)
+            except RuntimeError:
+                pass  # 이벤트 루프가 이미 닫힘
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class RateLimiter:
+    """키(자격 증명)와 엔드포인트 그룹별 토큰 버킷 모음"""
+
+    def __init__(self, venue: str, limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.venue = venue
+        self.limits = limits or DEFAULT_LIMITS[venue]
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, credential: str, group: str = "default", priority: int = PRIORITY_BALANCE) -> float:
+        """요청 전에 호출합니다. 대기한 시간(초)을 반환합니다."""
+        waited = self._bucket(credential, group).acquire(priority)
+        self._observe(priority, waited)
+        return waited
+
+    async def acquire_async(self, credential: str, group: str = "default",
+                            priority: int = PRIORITY_BALANCE) -> float:
+        """acquire의 비동기 버전. 이벤트 루프를 막지 않고 우선순위 대기열에서 차례를 기다립니다."""
+        waited = await self._bucket(credential, group).acquire_async(priority)
+        self._observe(priority, waited)
+        return waited
+
+    def _bucket(self, credential: str, group: str) -> TokenBucket:
+        key = (credential, group)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate, burst = self.limits.get(group) or self.limits["default"]
+            with self._lock:
+                bucket = self._buckets.setdefault(key, TokenBucket(rate, burst))
+        return bucket
+
+    def _observe(self, priority: int, waited: float):
+        lane = LANES[priority]
+        RATE_LIMIT_WAIT.labels(self.venue, lane).observe(waited)
+        if waited > 0.0005:
+            RATE_LIMIT_THROTTLED.labels(self.venue, lane).inc()
+
+
+def credential_id(key: str) -> str:
+    """버킷 구분용 키 식별자 (API 키를 그대로 보관하지 않음)"""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+# 같은 키를 쓰는 모든 클라이언트가 버킷을 공유하도록 거래소별 하나씩 사용
+_limiters: Dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(venue: str, limits: Optional[Dict[str, Tuple[float, float]]] = None) -> RateLimiter:
+    """거래소별 레이트 리미터 싱글톤 인스턴스 반환"""
+    limiter = _limiters.get(venue)
+    if limiter is None:
+        limiter = _limiters[venue] = RateLimiter(venue, limits)
+    return limiter
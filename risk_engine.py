@@ -0,0 +1,182 @@
+"""
+Pre-trade risk engine for the Trading Bot
+주문이 프로세스를 떠나기 전에 계좌/종목/전략별 한도를 메모리 카운터로 확인합니다.
+모든 검사는 딕셔너리 조회와 덧셈만으로 이루어지며 API를 호출하지 않습니다.
+카운터는 체결 시 증분으로 갱신됩니다.
+"""
+
+import time
+import threading
+from collections import deque
+from datetime import date
+from typing import Deque, Dict, Optional, Tuple
+
+from models import Order
+
+# 한도 이름 (값이 0이면 해당 검사를 하지 않음)
+LIMIT_NAMES = (
+    "max_order_quantity",       # 주문당 최대 수량
+    "max_order_notional",       # 주문당 최대 금액
+    "max_account_notional",     # 계좌/거래소별 최대 노출 금액
+    "max_symbol_notional",      # 계좌별 종목 최대 노출 금액
+    "max_strategy_notional",    # 전략별 최대 노출 금액
+    "max_orders_per_window",    # 계좌/전략별 시간창 내 최대 주문 수
+    "order_window_seconds",     # 주문 수 시간창(초)
+    "max_daily_loss",           # 계좌/전략별 일일 최대 실현 손실
+)
+
+# 노출 금액 한도 (기준 가격이 필요함)
+EXPOSURE_LIMITS = ("max_account_notional", "max_symbol_notional", "max_strategy_notional")
+
+
+class RiskEngine:
+    """계좌, 종목, 전략 단위 인메모리 리스크 카운터"""
+
+    def __init__(self, limits: Dict[str, float]):
+        self.limits = {name: float(limits.get(name) or 0) for name in LIMIT_NAMES}
+        self._lock = threading.Lock()
+        # (전략, 계좌, 종목) -> [수량, 평균단가]
+        self._positions: Dict[Tuple[str, str, str], list] = {}
+        # (계좌, 종목) -> 순수량
+        self._net_quantity: Dict[Tuple[str, str], float] = {}
+        # 범위 키 -> 노출 금액 / 당일 실현 손익
+        self._exposure: Dict[Tuple[str, str], float] = {}
+        self._daily_pnl: Dict[Tuple[str, str], float] = {}
+        self._pnl_date = date.today()
+        # 범위 키 -> 최근 주문 시각
+        self._order_times: Dict[Tuple[str, str], Deque[float]] = {}
+        self._last_price: Dict[Tuple[str, str], float] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return any(value for name, value in self.limits.items() if name != "order_window_seconds")
+
+    def reference_price(self, order: Order) -> float:
+        """주문 가격, 없으면(시장가) 마지막 체결 가격을 사용합니다."""
+        return order.price or self._last_price.get((order.venue, order.symbol), 0.0)
+
+    def check(self, order: Order, quantity: float = None, price: float = None,
+              record: bool = True) -> Optional[str]:
+        """
+        주문을 한도와 비교합니다. 통과하면 주문 수 카운터에 반영하고 None,
+        거부하면 사유 문자열을 반환합니다.
+        price는 호가창 예상 체결가처럼 주문 가격 대신 쓸 기준 가격이며,
+        기준 가격을 알 수 없으면 금액 한도가 설정된 경우 주문을 거부합니다.
+        record가 False이면 실제로 전송하지 않는 주문(분할 집행 부모 주문)이므로 주문 수 한도를 세지 않습니다.
+        """
+        if not self.enabled:
+            return None
+
+        limits = self.limits
+        venue = order.venue
+        quantity = order.quantity if quantity is None else quantity
+        price = price or self.reference_price(order)
+        notional = quantity * price
+        account_key = ("account", venue)
+        symbol_key = ("symbol", f"{venue}:{order.symbol}")
+        strategy_key = ("strategy", order.strategy)
+
+        if limits["max_order_quantity"] and quantity > limits["max_order_quantity"]:
+            return f"Order quantity {quantity} exceeds limit {limits['max_order_quantity']:g}"
+        if limits["max_order_notional"] and price <= 0:
+            return f"Cannot determine price of {order.symbol} for order notional limit"
+        if limits["max_order_notional"] and notional > limits["max_order_notional"]:
+            return f"Order notional {notional:,.0f} exceeds limit {limits['max_order_notional']:,.0f}"
+
+        with self._lock:
+            self._roll_day()
+
+            # 보유 포지션을 줄이는 주문(청산)은 노출/손실 한도와 무관하게 허용
+            net = self._net_quantity.get((venue, order.symbol), 0.0)
+            reducing = (net > 0 and order.side == "sell") or (net < 0 and order.side == "buy")
+
+            if not reducing:
+                if price <= 0 and any(limits[name] for name in EXPOSURE_LIMITS):
+                    return f"Cannot determine price of {order.symbol} for exposure limits"
+                for key, limit_name in zip((account_key, symbol_key, strategy_key), EXPOSURE_LIMITS):
+                    limit = limits[limit_name]
+                    if limit and self._exposure.get(key, 0.0) + notional > limit:
+                        return f"{key[0].capitalize()} exposure limit {limit:,.0f} reached for {key[1]}"
+
+                max_loss = limits["max_daily_loss"]
+                if max_loss:
+                    for key in (account_key, strategy_key):
+                        if self._daily_pnl.get(key, 0.0) <= -max_loss:
+                            return f"Daily loss limit {max_loss:,.0f} reached for {key[1]}"
+
+            max_orders = limits["max_orders_per_window"]
+            if max_orders and record:
+                now = time.monotonic()
+                cutoff = now - (limits["order_window_seconds"] or 60.0)
+                windows = []
+                for key in (account_key, strategy_key):
+                    times = self._order_times.get(key)
+                    if times is None:
+                        times = self._order_times[key] = deque()
+                    while times and times[0] < cutoff:
+                        times.popleft()
+                    if len(times) >= max_orders:
+                        return f"Order rate limit {max_orders:g} per window reached for {key[1]}"
+                    windows.append(times)
+                for times in windows:
+                    times.append(now)
+
+        return None
+
+    def record_fill(self, order: Order, quantity: float, price: float = None):
+        """체결을 반영하여 노출 금액과 실현 손익을 증분 갱신합니다."""
+        venue = order.venue
+        price = price or self.reference_price(order)
+        signed = quantity if order.side == "buy" else -quantity
+
+        with self._lock:
+            self._roll_day()
+            if price:
+                self._last_price[(venue, order.symbol)] = price
+
+            net_key = (venue, order.symbol)
+            self._net_quantity[net_key] = self._net_quantity.get(net_key, 0.0) + signed
+
+            position = self._positions.setdefault((order.strategy, venue, order.symbol), [0.0, 0.0])
+            held, average = position
+            old_exposure = abs(held) * average
+            realized = 0.0
+
+            if held == 0 or (held > 0) == (signed > 0):
+                # 포지션 증가 - 평균단가 갱신
+                new_held = held + signed
+                position[1] = (abs(held) * average + quantity * price) / abs(new_held) if new_held else 0.0
+                position[0] = new_held
+            else:
+                # 포지션 감소 - 실현 손익 계산
+                closed = min(abs(held), quantity)
+                realized = closed * (price - average) * (1 if held > 0 else -1) if price else 0.0
+                new_held = held + signed
+                position[0] = new_held
+                if abs(new_held) < 1e-12:
+                    position[0] = position[1] = 0.0
+                elif (new_held > 0) != (held > 0):
+                    position[1] = price  # 반대 방향으로 전환된 잔량
+
+            delta = abs(position[0]) * position[1] - old_exposure
+            for key in (("account", venue), ("symbol", f"{venue}:{order.symbol}"), ("strategy", order.strategy)):
+                self._exposure[key] = max(0.0, self._exposure.get(key, 0.0) + delta)
+                if realized:
+                    self._daily_pnl[key] = self._daily_pnl.get(key, 0.0) + realized
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """현재 노출 금액과 당일 실현 손익을 반환합니다."""
+        with self._lock:
+            self._roll_day()
+            return {
+                "limits": dict(self.limits),
+                "exposure": {f"{scope}:{name}": round(value, 2) for (scope, name), value in self._exposure.items()},
+                "daily_pnl": {f"{scope}:{name}": round(value, 2) for (scope, name), value in self._daily_pnl.items()}
+            }
+
+    def _roll_day(self):
+        """날짜가 바뀌면 일일 손익을 초기화합니다. (락 보유 상태에서 호출)"""
+        today = date.today()
+        if today != self._pnl_date:
+            self._pnl_date = today
+            self._daily_pnl.clear()
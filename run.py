@@ -12,6 +12,7 @@ import time
 import logging
 from multiprocessing import Process
 from dotenv import load_dotenv
+from config_manager import ConfigManager
 
 # 환경변수 로드
 load_dotenv()
@@ -26,9 +27,13 @@ logging.basicConfig(
 processes = []
 
 def run_web_server():
-    """Flask 웹 서버 실행"""
-    logging.info("Starting web server...")
-    subprocess.run([sys.executable, "app.py"])
+    """웹 서버 실행 (SERVING_MODE=production이면 gunicorn 멀티 워커)"""
+    if ConfigManager().get_serving_mode() == 'production':
+        logging.info("Starting web server (gunicorn, production mode)...")
+        subprocess.run([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"])
+    else:
+        logging.info("Starting web server...")
+        subprocess.run([sys.executable, "app.py"])
 
 def run_discord_bot():
     """디스코드 봇 실행"""
@@ -6,12 +6,14 @@ Scheduler for Trading Bot
 import schedule
 import time
 import threading
+import functools
 import logging
 from datetime import datetime, timedelta
 from typing import Callable, Dict, List, Optional
 from config_manager import ConfigManager
 from discord_webhook import DiscordWebhook
 from trading_engine import TradingEngine
+from metrics import SCHEDULER_JOB_LATENCY
 
 class TradingScheduler:
     def __init__(self, config_manager: ConfigManager, discord_webhook: DiscordWebhook, 
@@ -28,25 +30,38 @@ class TradingScheduler:
     def setup_schedules(self):
         """스케줄 설정"""
         # 매일 오전 9시 일일 리포트
-        schedule.every().day.at("09:00").do(self.daily_report)
+        schedule.every().day.at("09:00").do(self._timed(self.daily_report))
         
         # 매일 오후 6시 일일 리포트
-        schedule.every().day.at("18:00").do(self.daily_report)
+        schedule.every().day.at("18:00").do(self._timed(self.daily_report))
         
         # 매시간 계좌 상태 확인
-        schedule.every().hour.do(self.hourly_health_check)
+        schedule.every().hour.do(self._timed(self.hourly_health_check))
         
         # 매 5분마다 시스템 상태 확인
-        schedule.every(5).minutes.do(self.system_health_check)
+        schedule.every(5).minutes.do(self._timed(self.system_health_check))
         
         # 매주 월요일 오전 9시 주간 리포트
-        schedule.every().monday.at("09:00").do(self.weekly_report)
+        schedule.every().monday.at("09:00").do(self._timed(self.weekly_report))
         
         # 매일 자정 로그 정리
-        schedule.every().day.at("00:00").do(self.cleanup_logs)
+        schedule.every().day.at("00:00").do(self._timed(self.cleanup_logs))
         
         logging.info("Scheduler initialized with all tasks")
         
+    def _timed(self, job: Callable) -> Callable:
+        """작업 실행 시간을 메트릭으로 기록하는 래퍼"""
+        latency = SCHEDULER_JOB_LATENCY.labels(job.__name__)
+        
+        @functools.wraps(job)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return job(*args, **kwargs)
+            finally:
+                latency.observe(time.perf_counter() - started)
+        return wrapper
+        
     def start(self):
         """스케줄러 시작"""
         if self.running:
@@ -0,0 +1,182 @@
+"""
+Signal decoder for the Trading Bot
+웹훅 원본 바이트의 서명 검증, JSON 파싱, 필드 검증/정규화를 한 번에 처리합니다.
+"""
+
+import hmac
+import json
+import time
+import hashlib
+import logging
+from typing import Any, List
+
+from models import AlgoSpec, Signal
+from metrics import SIGNATURE_CHECK_LATENCY
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson이 없으면 표준 json 사용
+    _loads = json.loads
+
+_ACTIONS = frozenset(("buy", "sell", "close"))
+_ORDER_TYPES = frozenset(("market", "limit"))
+_ALGOS = frozenset(("twap", "iceberg"))
+
+
+class SignalDecodeError(ValueError):
+    """시그널 디코딩 실패"""
+
+    def __init__(self, message: str, status_code: int = 400, errors: List = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.errors = errors or []
+
+
+def verify_signature(payload: bytes, signature: str, secret: str) -> bool:
+    """웹훅 HMAC-SHA256 시그니처를 검증합니다. ('sha256=' 접두사 허용)"""
+    if not signature or not secret:
+        return True  # 시크릿이 설정되지 않은 경우 통과
+
+    try:
+        expected_signature = hmac.new(secret.encode("utf-8"), payload, hashlib.sha256).hexdigest()
+        if signature.startswith("sha256="):
+            signature = signature[7:]
+        return hmac.compare_digest(expected_signature, signature)
+    except Exception as e:
+        logging.error(f"Signature verification error: {e}")
+        return False
+
+
+def decode_payload(raw: bytes, signature: str = "", secret: str = "") -> Any:
+    """서명을 확인하고 원본 바이트를 JSON으로 파싱합니다."""
+    if secret:
+        started = time.perf_counter()
+        valid = verify_signature(raw, signature, secret)
+        SIGNATURE_CHECK_LATENCY.observe(time.perf_counter() - started)
+        if not valid:
+            raise SignalDecodeError("Invalid signature", status_code=401)
+    if not raw:
+        raise SignalDecodeError("No JSON data")
+
+    try:
+        data = _loads(raw)
+    except ValueError:
+        raise SignalDecodeError("Invalid JSON data")
+
+    if not data:
+        raise SignalDecodeError("No JSON data")
+    return data
+
+
+def _to_float(value: Any, field: str) -> float:
+    """숫자 필드를 float로 변환합니다."""
+    if value is None or value == "":
+        return 0.0
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        raise SignalDecodeError(f"Invalid {field} format")
+
+
+def decode_signal(data: Any) -> Signal:
+    """파싱된 JSON 객체를 검증하고 정규화된 Signal로 변환합니다."""
+    if isinstance(data, Signal):
+        return data
+    if not isinstance(data, dict):
+        raise SignalDecodeError("Signal must be a JSON object")
+
+    get = data.get
+
+    ticker = get("ticker")
+    if not ticker:
+        raise SignalDecodeError("Missing required field: ticker")
+
+    raw_action = get("action")
+    if not raw_action:
+        raise SignalDecodeError("Missing required field: action")
+    action = str(raw_action).lower()
+    if action not in _ACTIONS:
+        raise SignalDecodeError(f"Invalid action: {raw_action}")
+
+    quantity = _to_float(get("quantity"), "quantity")
+    if action != "close":
+        if not quantity:
+            raise SignalDecodeError("Missing required field: quantity")
+        if quantity < 0:
+            raise SignalDecodeError("Quantity must be positive")
+
+    order_type = str(get("order_type") or "market").lower()
+    if order_type not in _ORDER_TYPES:
+        raise SignalDecodeError(f"Invalid order_type: {order_type}")
+
+    price = _to_float(get("price"), "price")
+    if price < 0 or (order_type == "limit" and price == 0):
+        raise SignalDecodeError("Price must be positive for limit orders")
+
+    account = get("account") or ""
+    if isinstance(account, (list, tuple)):  # ["kis1", "kis2"] 형식의 계좌 목록
+        account = ",".join(str(item).strip() for item in account)
+
+    algo = _decode_algo(data, quantity) if get("algo") else None
+
+    signal_id = get("signal_id")
+
+    return Signal(
+        str(ticker).strip(),
+        action,
+        quantity,
+        price,
+        str(get("exchange") or "").lower(),
+        str(account).replace(" ", "").lower(),
+        order_type,
+        get("strategy") or "Unknown Strategy",
+        str(signal_id) if signal_id else None,
+        data,
+        algo
+    )
+
+
+def _decode_algo(data: dict, quantity: float) -> AlgoSpec:
+    """분할 집행 설정(algo, duration, slices, display_quantity, interval)을 검증합니다."""
+    get = data.get
+    kind = str(get("algo")).lower()
+    if kind not in _ALGOS:
+        raise SignalDecodeError(f"Invalid algo: {get('algo')}")
+
+    if kind == "twap":
+        duration = _to_float(get("duration"), "duration")
+        if duration <= 0:
+            raise SignalDecodeError("TWAP requires a positive duration (seconds)")
+        slices = int(_to_float(get("slices"), "slices") or 10)
+        if slices < 1:
+            raise SignalDecodeError("TWAP slices must be at least 1")
+        return AlgoSpec("twap", duration=duration, slices=slices)
+
+    display_quantity = _to_float(get("display_quantity"), "display_quantity")
+    if display_quantity <= 0:
+        raise SignalDecodeError("Iceberg requires a positive display_quantity")
+    if quantity and display_quantity > quantity:
+        raise SignalDecodeError("display_quantity must not exceed quantity")
+    interval = _to_float(get("interval"), "interval") or 1.0
+    if interval < 0:
+        raise SignalDecodeError("Iceberg interval must be positive")
+    return AlgoSpec("iceberg", display_quantity=display_quantity, interval=interval)
+
+
+def decode_batch(signals: Any) -> List[Signal]:
+    """시그널 배열 전체를 검증합니다. 하나라도 잘못되면 인덱스별 오류와 함께 실패합니다."""
+    if not isinstance(signals, list) or not signals:
+        raise SignalDecodeError("Expected a non-empty list of signals")
+
+    decoded = []
+    errors = []
+    for index, data in enumerate(signals):
+        try:
+            decoded.append(decode_signal(data))
+        except SignalDecodeError as e:
+            errors.append({"index": index, "error": str(e)})
+
+    if errors:
+        raise SignalDecodeError("Batch validation failed", errors=errors)
+    return decoded
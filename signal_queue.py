@@ -0,0 +1,245 @@
+"""
+Durable signal queue for the Trading Bot
+웹훅 시그널을 SQLite(WAL) 파일에 저장하고 워커 풀이 비동기로 처리합니다.
+회로가 열린 거래소로 가는 시그널처럼 주문을 보내지 않고 거부된 시그널은 잠시 뒤 다시 처리하도록 미뤄 둡니다.
+처리 중에 멈춘 시그널은 주문이 이미 나갔을 수 있으므로 재시작 시 다시 실행하지 않고 확인 필요 상태로 둡니다.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+# 시그널 상태
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_NEEDS_REVIEW = "needs_review"  # 처리 중 크래시 - 거래소에서 주문 여부를 확인해야 함
+
+
+class SignalQueue:
+    """크래시 이후에도 유지되는 SQLite WAL 기반 시그널 큐"""
+
+    def __init__(self, db_path: str = "data/signal_queue.db", poll_interval: float = 0.05):
+        self.db_path = db_path
+        self.poll_interval = poll_interval  # 다른 프로세스가 넣은 시그널 확인 주기
+        self._local = threading.local()
+        self._not_empty = threading.Condition()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._initialize_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        """스레드별 커넥션을 반환합니다."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _initialize_schema(self):
+        """테이블을 생성합니다."""
+        self._connection().execute(
+            """
+            CREATE TABLE IF NOT EXISTS signals (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                received_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                not_before REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = {row[1] for row in self._connection().execute("PRAGMA table_info(signals)")}
+        if "not_before" not in columns:  # 이전 버전에서 만든 큐 파일
+            self._connection().execute("ALTER TABLE signals ADD COLUMN not_before REAL NOT NULL DEFAULT 0")
+        self._connection().execute(
+            "CREATE INDEX IF NOT EXISTS idx_signals_status ON signals (status, id)"
+        )
+
+    def enqueue(self, payload: Dict) -> int:
+        """시그널을 큐에 저장하고 ID를 반환합니다."""
+        now = time.time()
+        cursor = self._connection().execute(
+            "INSERT INTO signals (payload, status, received_at, updated_at) VALUES (?, ?, ?, ?)",
+            (json.dumps(payload, ensure_ascii=False), STATUS_PENDING, now, now)
+        )
+        with self._not_empty:
+            self._not_empty.notify()
+        return cursor.lastrowid
+
+    def claim(self, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        """대기 중인 시그널 하나를 가져와 처리 중으로 표시합니다."""
+        deadline = time.monotonic() + timeout
+        while True:
+            item = self._claim_next()
+            if item is not None:
+                return item
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            with self._not_empty:
+                self._not_empty.wait(min(remaining, self.poll_interval))
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """다음 대기 시그널을 원자적으로 선점합니다."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, payload, attempts FROM signals WHERE status = ? AND not_before <= ? ORDER BY id LIMIT 1",
+                (STATUS_PENDING, time.time())
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                "UPDATE signals SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (STATUS_PROCESSING, time.time(), row[0])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return {"id": row[0], "payload": json.loads(row[1]), "attempts": row[2] + 1}
+
+    def complete(self, signal_id: int, result: Dict[str, Any]):
+        """처리 결과를 기록합니다."""
+        status = STATUS_DONE if result.get("success") else STATUS_FAILED
+        self._connection().execute(
+            "UPDATE signals SET status = ?, result = ?, updated_at = ? WHERE id = ?",
+            (status, json.dumps(result, ensure_ascii=False, default=str), time.time(), signal_id)
+        )
+
+    def defer(self, signal_id: int, delay: float, result: Dict[str, Any]):
+        """시그널을 delay초 뒤에 다시 처리하도록 대기 상태로 되돌립니다. (마지막 결과는 조회용으로 기록)"""
+        now = time.time()
+        self._connection().execute(
+            "UPDATE signals SET status = ?, result = ?, updated_at = ?, not_before = ? WHERE id = ?",
+            (STATUS_PENDING, json.dumps(result, ensure_ascii=False, default=str), now, now + delay, signal_id)
+        )
+
+    def recover(self) -> int:
+        """
+        크래시로 처리 중에 멈춘 시그널을 확인 필요 상태로 표시합니다.
+        선점된 시그널은 바로 엔진에 넘어가므로 주문이 이미 나갔을 수 있어 다시 실행하지 않습니다. (중복 주문 방지)
+        대기 중이던 시그널(미뤄 둔 시그널 포함)은 주문을 보내기 전이므로 그대로 처리됩니다.
+        """
+        result = {"success": False,
+                  "error": "Interrupted while processing; check the exchange before resending this signal"}
+        cursor = self._connection().execute(
+            "UPDATE signals SET status = ?, result = ?, updated_at = ? WHERE status = ?",
+            (STATUS_NEEDS_REVIEW, json.dumps(result), time.time(), STATUS_PROCESSING)
+        )
+        if cursor.rowcount:
+            logging.error(f"{cursor.rowcount} signals were interrupted while processing and need review "
+                          f"(not replayed to avoid duplicate orders)")
+        return cursor.rowcount
+
+    def get(self, signal_id: int) -> Optional[Dict[str, Any]]:
+        """시그널 상태를 조회합니다."""
+        row = self._connection().execute(
+            "SELECT id, status, attempts, result, received_at, updated_at FROM signals WHERE id = ?",
+            (signal_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "status": row[1],
+            "attempts": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "received_at": row[4],
+            "updated_at": row[5]
+        }
+
+    def depth(self) -> int:
+        """대기 및 처리 중인 시그널 수를 반환합니다."""
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM signals WHERE status IN (?, ?)",
+            (STATUS_PENDING, STATUS_PROCESSING)
+        ).fetchone()
+        return row[0]
+
+    def purge(self, older_than_seconds: float = 7 * 86400) -> int:
+        """오래된 처리 완료 시그널을 삭제합니다."""
+        cutoff = time.time() - older_than_seconds
+        cursor = self._connection().execute(
+            "DELETE FROM signals WHERE status IN (?, ?, ?) AND updated_at < ?",
+            (STATUS_DONE, STATUS_FAILED, STATUS_NEEDS_REVIEW, cutoff)
+        )
+        return cursor.rowcount
+
+
+class SignalWorkerPool:
+    """시그널 큐를 비우는 워커 스레드 풀"""
+
+    def __init__(self, signal_queue: SignalQueue, handler: Callable[[Dict], Dict[str, Any]],
+                 worker_count: int = 4, park_attempts: int = 0):
+        self.signal_queue = signal_queue
+        self.handler = handler
+        self.worker_count = worker_count
+        self.park_attempts = park_attempts  # 결과에 retry_after가 있는 시그널을 다시 시도할 최대 횟수
+        self.running = False
+        self.threads: List[threading.Thread] = []
+
+    def start(self):
+        """워커를 시작합니다. 시작 전에 미처리 시그널을 복구합니다."""
+        if self.running:
+            logging.warning("Signal worker pool is already running")
+            return
+
+        self.signal_queue.recover()
+        self.running = True
+        for i in range(self.worker_count):
+            thread = threading.Thread(target=self._run_worker, name=f"signal-worker-{i + 1}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logging.info(f"Signal worker pool started with {self.worker_count} workers")
+
+    def stop(self):
+        """워커를 중지합니다."""
+        self.running = False
+        for thread in self.threads:
+            thread.join(timeout=5)
+        self.threads.clear()
+        logging.info("Signal worker pool stopped")
+
+    def _run_worker(self):
+        """큐에서 시그널을 꺼내 처리하는 루프"""
+        while self.running:
+            try:
+                item = self.signal_queue.claim(timeout=1.0)
+                if item is None:
+                    continue
+
+                try:
+                    result = self.handler(item["payload"])
+                except Exception as e:
+                    logging.error(f"Signal {item['id']} handler error: {e}")
+                    result = {"success": False, "error": str(e)}
+
+                retry_after = result.get("retry_after")
+                if retry_after is not None and item["attempts"] <= self.park_attempts:
+                    logging.info(f"Signal {item['id']} parked for {retry_after:.1f}s: {result.get('error')}")
+                    self.signal_queue.defer(item["id"], retry_after, result)
+                else:
+                    self.signal_queue.complete(item["id"], result)
+            except Exception as e:
+                logging.error(f"Signal worker error: {e}")
+                time.sleep(1)
@@ -0,0 +1,282 @@
+"""
+Smart order router for the Trading Bot
+exchange가 "auto"(최적 거래소 하나) 또는 "split"(여러 거래소에 분할)인 시그널의 거래소를 고릅니다.
+결정은 메모리에 캐시된 최우선 호가, 수수료, 가용 잔고만 사용하며 결정 시점에 REST 호출을 하지 않습니다.
+WebSocket 로컬 호가창이 동기화되어 있으면 최우선 호가 대신 주문 수량만큼 호가를 소진한 평균 체결가로 비교합니다.
+호가는 백그라운드에서 관심 종목만 주기적으로 갱신합니다.
+
+exchange 형식:
+    auto                  설정된 모든 거래소 중 최적 거래소 하나
+    split                 가용 잔고 한도 내에서 유리한 거래소부터 분할
+    auto:binance,okx      후보 거래소 제한 (split도 동일)
+"""
+
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from circuit_breaker import get_circuit_breaker
+
+ROUTE_BEST = "auto"
+ROUTE_SPLIT = "split"
+
+# 수수료 정보가 없을 때 사용하는 기본 테이커 수수료
+DEFAULT_TAKER_FEES = {
+    "binance": 0.001,
+    "bybit": 0.001,
+    "okx": 0.001,
+    "bitget": 0.001,
+    "upbit": 0.0005,
+}
+
+# 붙어 있는 심볼(BTCUSDT)에서 찾을 호가 통화 (긴 것부터)
+_QUOTES = ("USDT", "USDC", "BUSD", "FDUSD", "KRW", "USD", "BTC", "ETH")
+
+# 업비트 마켓(호가 통화)
+_UPBIT_MARKETS = ("KRW", "BTC", "USDT")
+
+# BASE-QUOTE 형식에서 호가 통화로만 쓰이는 법정화폐/스테이블코인 (업비트 QUOTE-BASE와 구분)
+_FIAT_QUOTES = ("USDT", "USDC", "BUSD", "FDUSD", "USD", "EUR", "GBP", "JPY", "TRY", "BRL", "KRW")
+
+# 비트겟 선물 심볼 접미사 -> 정산 통화 (빈 값이면 기초 자산으로 정산되는 인버스 계약)
+_BITGET_SETTLE = {"UMCBL": "USDT", "CMCBL": "USDC", "DMCBL": ""}
+
+
+def is_routed(exchange: str) -> bool:
+    """라우팅 대상 시그널인지 확인합니다."""
+    mode = exchange.split(":", 1)[0]
+    return mode == ROUTE_BEST or mode == ROUTE_SPLIT
+
+
+def canonical_symbol(symbol: str, venue: str = "") -> str:
+    """
+    거래소별 심볼을 CCXT 통합 심볼(BASE/QUOTE, 선물은 BASE/QUOTE:SETTLE)로 변환합니다.
+    BTC/USDT -> BTC/USDT, KRW-BTC(업비트) -> BTC/KRW, BTC-USDT(OKX) -> BTC/USDT,
+    BTC-USDT-SWAP -> BTC/USDT:USDT, BTCUSDT -> BTC/USDT, BTCUSDT_UMCBL -> BTC/USDT:USDT
+    venue를 모르면 KRW로 시작하거나 BTC/USDT 뒤에 법정화폐/스테이블코인이 아닌 통화가 오는 경우만 업비트 형식으로 봅니다.
+    """
+    symbol = symbol.upper().strip()
+    if "/" in symbol:
+        return symbol
+    if "-" in symbol:
+        parts = symbol.split("-")
+        first, second = parts[0], parts[1]
+        if venue == "upbit" or (not venue and (first == "KRW" or (
+                first in _UPBIT_MARKETS and second not in _FIAT_QUOTES))):
+            return f"{second}/{first}"  # 업비트 QUOTE-BASE
+        if len(parts) > 2:  # OKX 선물: BASE-QUOTE-SWAP, BASE-QUOTE-만기일
+            settle = first if second == "USD" else second
+            expiry = "" if parts[2] == "SWAP" else f"-{parts[2]}"
+            return f"{first}/{second}:{settle}{expiry}"
+        return f"{first}/{second}"
+    symbol, _, suffix = symbol.partition("_")
+    for quote in _QUOTES:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            base = symbol[:-len(quote)]
+            if suffix in _BITGET_SETTLE:
+                return f"{base}/{quote}:{_BITGET_SETTLE[suffix] or base}"
+            return f"{base}/{quote}"
+    return symbol
+
+
+def venue_symbol(canonical: str, venue: str) -> str:
+    """공통 심볼을 거래소 주문용 심볼로 변환합니다. (CCXT는 공통 심볼 그대로 사용)"""
+    if venue == "upbit" and "/" in canonical:
+        base, quote = canonical.split("/", 1)
+        return f"{quote}-{base}"
+    return canonical
+
+
+class QuoteCache:
+    """거래소별 최우선 매수/매도 호가 캐시"""
+
+    def __init__(self):
+        # (거래소, 공통 심볼) -> (bid, ask, 갱신 시각)
+        self._quotes: Dict[Tuple[str, str], Tuple[float, float, float]] = {}
+
+    def update(self, venue: str, canonical: str, bid: float, ask: float):
+        self._quotes[(venue, canonical)] = (bid, ask, time.monotonic())
+
+    def get(self, venue: str, canonical: str, max_age: float) -> Optional[Tuple[float, float]]:
+        quote = self._quotes.get((venue, canonical))
+        if quote is None or time.monotonic() - quote[2] > max_age:
+            return None
+        return quote[0], quote[1]
+
+
+class SmartRouter:
+    """캐시된 호가/수수료/잔고로 거래소를 선택하고 주문 수량을 나눕니다."""
+
+    def __init__(self, exchange_clients: Any, venues: Tuple[str, ...], max_quote_age: float = 5.0,
+                 refresh_interval: float = 2.0, default_venue: str = ""):
+        self.exchange_clients = exchange_clients
+        self.venues = venues
+        self.max_quote_age = max_quote_age
+        self.refresh_interval = refresh_interval
+        self.default_venue = default_venue
+        self.quotes = QuoteCache()
+        # 거래소 -> {통화: 가용 수량} (잔고 스냅샷에서 갱신)
+        self._free_balances: Dict[str, Dict[str, float]] = {}
+        self._watched: Dict[str, float] = {}  # 공통 심볼 -> 마지막 라우팅 시각
+        self._executor = ThreadPoolExecutor(max_workers=len(venues) or 1, thread_name_prefix="router-quotes")
+        self._thread: Optional[threading.Thread] = None
+
+    def candidates(self, exchange: str) -> List[str]:
+        """라우팅 후보 거래소 (설정된 클라이언트가 있고 회로가 열리지 않은 거래소만)"""
+        restricted = exchange.split(":", 1)[1].split(",") if ":" in exchange else self.venues
+        return [venue for venue in restricted
+                if venue in self.venues and self.exchange_clients.get_client(venue) is not None
+                and not get_circuit_breaker(venue).blocked_for()]
+
+    def route(self, exchange: str, symbol: str, side: str, quantity: float,
+              order_type: str = "market") -> List[Tuple[str, str, float]]:
+        """
+        [(거래소, 거래소 심볼, 수량)] 목록을 반환합니다. 메모리 조회만 수행합니다.
+        유효한 호가가 없으면 기본 거래소(또는 첫 후보)로 보내고 해당 종목을 호가 갱신 대상에 추가합니다.
+        업비트 시장가 매수는 수량이 아닌 KRW 금액으로 주문하므로 시장가 매수 후보에서 제외합니다.
+        업비트는 현물만 거래하므로 선물 심볼(BASE/QUOTE:SETTLE)도 후보에서 제외합니다.
+        """
+        canonical = canonical_symbol(symbol)
+        self._watch(canonical)
+        candidates = self.candidates(exchange)
+        if ":" in canonical or (side == "buy" and order_type == "market"):
+            candidates = [venue for venue in candidates if venue != "upbit"]
+        if not candidates:
+            return []
+
+        base, _, quote = canonical.partition("/")
+        ranked = []
+        for venue in candidates:
+            if not self._lists(venue, canonical):
+                continue
+            book = self.quotes.get(venue, canonical, self.max_quote_age)
+            if book is None:
+                continue
+            bid, ask = book
+            fill = self._fill_price(venue, canonical, side, quantity)
+            if fill is not None:
+                if side == "buy":
+                    ask = fill
+                else:
+                    bid = fill
+            fee = self._taker_fee(venue, canonical)
+            if side == "buy":
+                if not ask:
+                    continue
+                cost = ask * (1 + fee)
+                capacity = self._free(venue, quote) / cost
+            else:
+                if not bid:
+                    continue
+                cost = -bid * (1 - fee)  # 매도는 받는 금액이 클수록 유리
+                capacity = self._free(venue, base)
+            ranked.append((cost, venue, capacity))
+
+        if not ranked:
+            fallback = self.default_venue if self.default_venue in candidates else candidates[0]
+            return [(fallback, venue_symbol(canonical, fallback), quantity)]
+
+        ranked.sort()
+        if exchange.split(":", 1)[0] == ROUTE_BEST:
+            for _, venue, capacity in ranked:
+                if capacity >= quantity:
+                    return [(venue, venue_symbol(canonical, venue), quantity)]
+            venue = ranked[0][1]  # 전량 가능한 거래소가 없으면 최우선 가격 거래소
+            return [(venue, venue_symbol(canonical, venue), quantity)]
+
+        # 분할: 유리한 거래소부터 가용 잔고만큼 배정, 남은 수량은 최우선 거래소에 추가
+        plan: Dict[str, float] = {}
+        remaining = quantity
+        for _, venue, capacity in ranked:
+            if remaining <= 0:
+                break
+            take = min(remaining, capacity)
+            if take > 0:
+                plan[venue] = take
+                remaining -= take
+        if remaining > 0:
+            best = ranked[0][1]
+            plan[best] = plan.get(best, 0.0) + remaining
+        return [(venue, venue_symbol(canonical, venue), amount) for venue, amount in plan.items()]
+
+    def _fill_price(self, venue: str, canonical: str, side: str, quantity: float) -> Optional[float]:
+        """로컬 호가창 기준 quantity 전량의 평균 체결가. 호가창이 없거나 깊이가 부족하면 None"""
+        get_order_book = getattr(self.exchange_clients, "get_order_book", None)
+        order_book = get_order_book(venue, venue_symbol(canonical, venue)) if get_order_book else None
+        if order_book is None:
+            return None
+        fill = order_book.fill_price(side, quantity)
+        return fill[0] if fill else None
+
+    def update_balance(self, venue: str, balance: Any):
+        """잔고 스냅샷에서 통화별 가용 수량을 갱신합니다. (CCXT free / 업비트 balance)"""
+        free: Dict[str, float] = {}
+        if isinstance(balance, dict) and isinstance(balance.get("free"), dict):
+            free = {currency.upper(): float(amount or 0) for currency, amount in balance["free"].items()}
+        elif isinstance(balance, list):
+            for item in balance:
+                try:
+                    free[item["currency"].upper()] = float(item.get("balance") or 0)
+                except (KeyError, TypeError, ValueError):
+                    continue
+        else:
+            return
+        self._free_balances[venue] = free
+
+    def _free(self, venue: str, currency: str) -> float:
+        balances = self._free_balances.get(venue)
+        if balances is None:
+            return float("inf")  # 아직 잔고를 모르는 거래소는 제한하지 않음
+        return balances.get(currency, 0.0)
+
+    def _lists(self, venue: str, canonical: str) -> bool:
+        """거래소에 해당 종목이 있는지 (마켓 정보가 없으면 있다고 간주)"""
+        markets = getattr(self.exchange_clients.get_client(venue), "markets", None)
+        return not markets or canonical in markets
+
+    def _taker_fee(self, venue: str, canonical: str) -> float:
+        markets = getattr(self.exchange_clients.get_client(venue), "markets", None)
+        market = markets.get(canonical) if markets else None
+        if market and market.get("taker") is not None:
+            return float(market["taker"])
+        return DEFAULT_TAKER_FEES.get(venue, 0.001)
+
+    def _watch(self, canonical: str):
+        self._watched[canonical] = time.monotonic()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="router-quotes", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """관심 종목의 호가를 거래소별로 동시에 갱신합니다. 1시간 동안 라우팅되지 않은 종목은 제외합니다."""
+        while True:
+            cutoff = time.monotonic() - 3600
+            for canonical, last_routed in list(self._watched.items()):
+                if last_routed < cutoff:
+                    self._watched.pop(canonical, None)
+            symbols = list(self._watched)
+            futures = [self._executor.submit(self._refresh_venue, venue, symbols) for venue in self.venues]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Quote refresh error: {e}")
+            time.sleep(self.refresh_interval)
+
+    def _refresh_venue(self, venue: str, symbols: List[str]):
+        if self.exchange_clients.get_client(venue) is None:
+            return
+        for canonical in symbols:
+            if not self._lists(venue, canonical):
+                continue
+            ticker = self.exchange_clients.get_ticker(venue, venue_symbol(canonical, venue))
+            if isinstance(ticker, list):  # 업비트 현재가 (호가 대신 체결가 사용)
+                ticker = ticker[0] if ticker else None
+                if ticker:
+                    price = float(ticker.get("trade_price") or 0)
+                    self.quotes.update(venue, canonical, price, price)
+            elif isinstance(ticker, dict):
+                last = float(ticker.get("last") or 0)
+                self.quotes.update(venue, canonical, float(ticker.get("bid") or last), float(ticker.get("ask") or last))
@@ -1,216 +1,768 @@
 import json
 import time
 import logging
-from typing import Dict, Optional, List, Any
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, List, Any, Union, Tuple, Callable
 from datetime import datetime
 from config_manager import ConfigManager
 from exchange_clients import ExchangeClients, KISClient
+from async_backend import AsyncExchangeClients
+from client_registry import ClientRegistry
+from kis_token_store import get_kis_token_store
 from discord_webhook import DiscordWebhook
+from models import AlgoSpec, Signal, Order, OrderResult
+from signal_decoder import SignalDecodeError, decode_signal, decode_batch
+from kis_fanout import AccountPacer, is_fanout_target, resolve_kis_accounts
+from portfolio_snapshot import PortfolioSnapshotService
+from position_ledger import PositionLedger, parse_holdings, position_symbol
+from risk_engine import RiskEngine
+from execution_algos import ExecutionScheduler, ParentOrder
+from order_rules import OrderRules
+from smart_router import SmartRouter, canonical_symbol, is_routed, venue_symbol
+from order_tracker import OrderTracker, TrackedOrder, OrderStatus, parse_kis_order, parse_order_status
+from circuit_breaker import circuit_status, get_circuit_breaker
+from metrics import SIGNAL_PROCESS_LATENCY, ORDER_LATENCY, ORDER_RESULTS, RISK_REJECTIONS
+
+SUPPORTED_EXCHANGES = ("binance", "upbit", "bybit", "okx", "bitget")
 
 class TradingEngine:
-    def __init__(self, config_manager: ConfigManager, discord_webhook: DiscordWebhook):
+    def __init__(self, config_manager: ConfigManager, discord_webhook: DiscordWebhook,
+                 background_services: bool = True):
+        """
+        background_services가 False이면 시세 피드, 토큰 자동 갱신, 포트폴리오 주기 조회와 원장 보정을 시작하지 않습니다.
+        (엔진 프로세스 없이 별도로 실행되는 디스코드 봇처럼 주 엔진이 따로 있는 보조 프로세스용)
+        """
         self.config_manager = config_manager
         self.discord_webhook = discord_webhook
-        self.exchange_clients = ExchangeClients(config_manager)
-        self.kis_clients = {}
+        self.background_services = background_services
+        self.exchange_clients = self._create_exchange_clients(config_manager, background_services)
+        self.kis_token_store = get_kis_token_store(
+            config_manager.get_kis_token_store_path(),
+            config_manager.get_kis_token_key(),
+            config_manager.get_kis_token_renew_before(),
+            auto_renew=background_services
+        )
+        self.kis_registry = ClientRegistry(self._build_kis_client, label="KIS",
+                                           on_discard=self._discard_kis_client)
         self._initialize_kis_clients()
+        self.batch_executor = ThreadPoolExecutor(
+            max_workers=config_manager.get_batch_max_workers(),
+            thread_name_prefix="batch-order"
+        )
+        # 바스켓 레그 안에서 다계좌/분할 라우팅 주문을 기다리므로 바스켓과 별도의 풀을 사용
+        self.fanout_executor = ThreadPoolExecutor(
+            max_workers=config_manager.get_kis_fanout_workers(),
+            thread_name_prefix="kis-fanout"
+        )
+        self.kis_pacer = AccountPacer(config_manager.get_kis_order_interval())
+        self.position_ledger = PositionLedger(config_manager.get_position_ledger_path())
+        self.risk_engine = RiskEngine(config_manager.get_risk_limits())
+        self.market_order_protection_bps = config_manager.get_market_order_protection_bps()
+        self.order_rules = OrderRules(self.exchange_clients)
+        self.smart_router = SmartRouter(
+            self.exchange_clients, SUPPORTED_EXCHANGES,
+            max_quote_age=config_manager.get_router_max_quote_age(),
+            refresh_interval=config_manager.get_router_refresh_interval(),
+            default_venue=config_manager.get_router_default_venue()
+        )
+        if self.exchange_clients.market_feed is not None:
+            # WebSocket 호가가 들어올 때마다 라우터 호가 캐시도 갱신
+            self.exchange_clients.market_feed.add_listener(self.smart_router.quotes.update)
+        self.execution_scheduler = ExecutionScheduler(
+            lambda order: self._execute_trade(order, notify=False),
+            on_finish=self._on_execution_finished,
+            max_workers=config_manager.get_algo_max_workers(),
+            venue_interval=config_manager.get_algo_venue_interval()
+        )
+        self.order_tracker = OrderTracker(
+            self._order_statuses,
+            on_fill=self._record_fill,
+            on_done=self._on_order_done,
+            on_update=self._on_order_update,
+            fast_interval=config_manager.get_order_track_fast_interval(),
+            slow_interval=config_manager.get_order_track_slow_interval()
+        )
+        self.portfolio_snapshot = PortfolioSnapshotService(
+            self._portfolio_balance_jobs,
+            refresh_interval=config_manager.get_portfolio_refresh_interval(),
+            call_timeout=config_manager.get_portfolio_call_timeout(),
+            max_workers=config_manager.get_portfolio_max_workers(),
+            # 스냅샷 갱신 때마다 원장 보정 (원장은 주 엔진만 기록)
+            on_result=self._reconcile_positions if background_services else None
+        )
+        if background_services:
+            self.portfolio_snapshot.start()
+        
+    @staticmethod
+    def _create_exchange_clients(config_manager: ConfigManager, market_feed: bool = True) -> ExchangeClients:
+        """설정(EXCHANGE_BACKEND)에 따라 동기 또는 비동기(asyncio) 거래소 백엔드를 만듭니다."""
+        if config_manager.get_exchange_backend() == "async":
+            try:
+                return AsyncExchangeClients(config_manager, market_feed=market_feed)
+            except ImportError as e:
+                logging.error(f"Async exchange backend unavailable, falling back to sync: {e}")
+        return ExchangeClients(config_manager, market_feed)
         
-    def _initialize_kis_clients(self):
-        """KIS 클라이언트들을 초기화합니다."""
+    @property
+    def kis_clients(self):
+        """KIS 계좌 이름 -> 클라이언트 읽기 전용 뷰"""
+        return self.kis_registry.view
+        
+    def _initialize_kis_clients(self) -> Dict[str, List[str]]:
+        """설정이 바뀐 KIS 계좌 클라이언트만 (다시) 생성하고 KIS 호스트 연결을 미리 맺어 둡니다."""
         accounts = self.config_manager.get_kis_accounts()
-        for account in accounts:
-            if account["active"]:
-                try:
-                    client = KISClient(
-                        account["key"],
-                        account["secret"],
-                        account["account_number"],
-                        account["account_code"]
-                    )
-                    self.kis_clients[f"kis{account['number']}"] = client
-                    logging.info(f"KIS{account['number']} client initialized")
-                except Exception as e:
-                    logging.error(f"Failed to initialize KIS{account['number']}: {e}")
-                    
-    def refresh_clients(self):
-        """모든 클라이언트를 새로고침합니다."""
-        self.exchange_clients.refresh_clients()
-        self.kis_clients.clear()
-        self._initialize_kis_clients()
+        changes = self.kis_registry.sync({
+            f"kis{account['number']}": {
+                "key": account["key"],
+                "secret": account["secret"],
+                "account_number": account["account_number"],
+                "account_code": account["account_code"]
+            }
+            for account in accounts if account["active"]
+        })
+        if changes["added"]:
+            self.exchange_clients.transport.prewarm(
+                [self.kis_clients[name].base_url for name in changes["added"] if name in self.kis_clients])
+        return changes
+        
+    def _build_kis_client(self, name: str, config: Dict[str, str]) -> KISClient:
+        """KIS 계좌 클라이언트를 생성합니다. (거래소 백엔드의 전송 계층 사용)"""
+        client = self.exchange_clients.create_kis_client(
+            config["key"], config["secret"], config["account_number"], config["account_code"],
+            token_store=self.kis_token_store, name=name
+        )
+        logging.info(f"{name.upper()} client initialized")
+        return client
+
+    def _discard_kis_client(self, name: str, client: KISClient):
+        """제거/교체된 KIS 계좌의 토큰 발급 함수를 저장소에서 내립니다. (이전 키의 토큰을 계속 갱신하지 않도록)"""
+        client.release_token()
         
-    def process_tradingview_signal(self, webhook_data: Dict) -> Dict[str, Any]:
+    def reload_config(self):
+        """
+        .env를 다시 읽어 웹 워커가 저장한 설정을 이 프로세스에 반영합니다.
+        (프로덕션 모드에서는 설정을 저장하는 웹 워커와 주문을 보내는 엔진 프로세스가 다름)
+        """
+        self.config_manager.load_config(override=True)
+        self.discord_webhook.webhook_url = self.config_manager.get_discord_webhook_url()
+        
+    def refresh_clients(self) -> Dict[str, Dict[str, List[str]]]:
+        """설정 파일을 다시 읽고, 설정이 바뀐 클라이언트만 다시 만들어 거래소/KIS별 변경 내역을 반환합니다."""
+        self.reload_config()
+        changes = {
+            "exchanges": self.exchange_clients.refresh_clients(),
+            "kis_accounts": self._initialize_kis_clients()
+        }
+        if any(names for group in changes.values() for names in group.values()):
+            self.portfolio_snapshot.invalidate()
+        return changes
+        
+    def process_tradingview_signal(self, webhook_data: Union[Dict, Signal]) -> Dict[str, Any]:
         """트레이딩뷰 시그널을 처리합니다."""
+        started = time.perf_counter()
+        try:
+            return self._process_signal(webhook_data)
+        finally:
+            SIGNAL_PROCESS_LATENCY.observe(time.perf_counter() - started)
+            
+    def _process_signal(self, webhook_data: Union[Dict, Signal]) -> Dict[str, Any]:
+        """시그널을 디코딩하고 액션에 따라 실행합니다."""
+        try:
+            signal = decode_signal(webhook_data)
+        except SignalDecodeError as e:
+            error_msg = str(e)
+            self.discord_webhook.send_error_alert("Invalid Signal", error_msg, str(webhook_data)[:1000])
+            return {"success": False, "error": error_msg}
+            
         try:
-            # 웹훅 데이터 파싱
-            symbol = webhook_data.get("ticker", "")
-            action = webhook_data.get("action", "").lower()  # buy, sell, close
-            quantity = float(webhook_data.get("quantity", 0))
-            price = float(webhook_data.get("price", 0))
-            exchange = webhook_data.get("exchange", "").lower()
-            account = webhook_data.get("account", "")  # kis1, kis2, binance 등
-            order_type = webhook_data.get("order_type", "market").lower()
-            strategy = webhook_data.get("strategy", "Unknown Strategy")
-            
-            logging.info(f"Processing signal: {action} {quantity} {symbol} on {exchange}")
+            logging.info(f"Processing signal: {signal.action} {signal.quantity} {signal.ticker} on {signal.exchange}")
             
             # 디스코드로 시그널 수신 알림
             self.discord_webhook.send_message(
                 f"📥 **트레이딩뷰 시그널 수신**\n"
-                f"• 전략: {strategy}\n"
-                f"• 종목: {symbol}\n"
-                f"• 액션: {action.upper()}\n"
-                f"• 수량: {quantity}\n"
-                f"• 가격: {price}\n"
-                f"• 거래소: {exchange.upper()}\n"
-                f"• 계좌: {account.upper()}"
+                f"• 전략: {signal.strategy}\n"
+                f"• 종목: {signal.ticker}\n"
+                f"• 액션: {signal.action.upper()}\n"
+                f"• 수량: {signal.quantity}\n"
+                f"• 가격: {signal.price}\n"
+                f"• 거래소: {signal.exchange.upper()}\n"
+                f"• 계좌: {signal.account.upper()}"
             )
             
             # 액션에 따른 처리
-            if action in ["buy", "sell"]:
-                return self._execute_trade(symbol, action, quantity, price, exchange, account, order_type, strategy)
-            elif action == "close":
-                return self._close_position(symbol, exchange, account, strategy)
-            else:
-                error_msg = f"Unknown action: {action}"
-                self.discord_webhook.send_error_alert("Invalid Action", error_msg)
-                return {"success": False, "error": error_msg}
+            return self._dispatch(signal).to_dict()
                 
         except Exception as e:
             error_msg = f"Error processing TradingView signal: {str(e)}"
             logging.error(error_msg)
-            self.discord_webhook.send_error_alert("Signal Processing Error", error_msg, str(webhook_data))
+            self.discord_webhook.send_error_alert("Signal Processing Error", error_msg, str(signal.payload))
             return {"success": False, "error": error_msg}
             
-    def _execute_trade(self, symbol: str, action: str, quantity: float, price: float,
-                      exchange: str, account: str, order_type: str, strategy: str) -> Dict[str, Any]:
-        """거래를 실행합니다."""
+    def process_tradingview_batch(self, signals: List[Union[Dict, Signal]]) -> Dict[str, Any]:
+        """여러 시그널(바스켓)을 한 번에 검증하고 동시에 실행합니다."""
+        # 전체 검증 - 하나라도 잘못되면 어떤 주문도 보내지 않음
         try:
-            result = None
+            decoded = decode_batch(signals)
+        except SignalDecodeError as e:
+            return {"success": False, "error": str(e), "errors": e.errors}
             
+        # 수량/호가 단위와 최소 주문 금액을 바스켓 전체에 대해 한 번에 확인
+        legs = [index for index, signal in enumerate(decoded)
+                if signal.action != "close" and not is_fanout_target(signal.account)]
+        orders = [decoded[index].to_order() for index in legs]
+        checked = self.order_rules.normalize_batch(orders, [self.risk_engine.reference_price(order) for order in orders])
+        errors = [{"index": index, "error": error} for index, (_, error) in zip(legs, checked) if error]
+        if errors:
+            return {"success": False, "error": "Batch validation failed", "errors": errors}
+        for index, (order, _) in zip(legs, checked):
+            decoded[index] = decoded[index].replace(quantity=order.quantity, price=order.price)
+            
+        strategy = decoded[0].strategy
+        logging.info(f"Processing batch of {len(decoded)} signals ({strategy})")
+        
+        started = time.time()
+        futures = [self.batch_executor.submit(self._process_batch_leg, signal) for signal in decoded]
+        results = []
+        for future, signal in zip(futures, decoded):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(OrderResult.failed(f"Batch leg error: {str(e)}"))
+        elapsed_ms = (time.time() - started) * 1000
+        
+        succeeded = sum(1 for result in results if result.success)
+        
+        # 레그별 알림 대신 바스켓 요약 한 번만 전송
+        lines = []
+        for signal, result in zip(decoded, results):
+            mark = "✅" if result.success else "❌"
+            detail = result.order_id if result.success else result.error
+            lines.append(f"{mark} {signal.action.upper()} {signal.quantity} "
+                         f"{signal.ticker} ({signal.account or signal.exchange}) {detail or ''}")
+        self.discord_webhook.send_message(
+            f"🧺 **바스켓 시그널 처리 완료**\n"
+            f"• 전략: {strategy}\n"
+            f"• 성공: {succeeded}/{len(decoded)}\n"
+            f"• 소요시간: {elapsed_ms:.0f}ms\n" + "\n".join(lines)[:1500]
+        )
+        
+        return {
+            "success": succeeded == len(decoded),
+            "succeeded": succeeded,
+            "failed": len(decoded) - succeeded,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "results": [
+                {
+                    "index": index,
+                    "success": result.success,
+                    "ticker": signal.ticker,
+                    "action": signal.action,
+                    "account": signal.account,
+                    "exchange": signal.exchange,
+                    "order_id": result.order_id,
+                    "error": result.error
+                }
+                for index, (signal, result) in enumerate(zip(decoded, results))
+            ]
+        }
+        
+    def _process_batch_leg(self, signal: Signal) -> OrderResult:
+        """바스켓의 개별 레그를 실행합니다. (개별 디스코드 알림 없음)"""
+        return self._dispatch(signal, notify=False)
+        
+    def _dispatch(self, signal: Signal, notify: bool = True) -> OrderResult:
+        """시그널을 다계좌 복제, 스마트 라우팅, 청산, 일반 주문 중 하나로 실행합니다."""
+        if is_fanout_target(signal.account):
+            return self._execute_kis_fanout(signal, notify)
+        if is_routed(signal.exchange) and not signal.account.startswith("kis"):
+            return self._execute_routed(signal, notify)
+        if signal.action == "close":
+            return self._close_position(signal, notify)
+        if signal.algo:
+            return self._start_execution(signal.to_order(), signal.algo, notify)
+        return self._execute_trade(signal.to_order(), notify)
+        
+    def resolve_kis_accounts(self, account: str) -> List[str]:
+        """계좌 목록/와일드카드/그룹 지정을 KIS 계좌 이름 목록으로 펼칩니다."""
+        return resolve_kis_accounts(account, list(self.kis_clients), self.config_manager.get_kis_group)
+        
+    def _execute_kis_fanout(self, signal: Signal, notify: bool = True) -> OrderResult:
+        """하나의 시그널을 여러 KIS 계좌에서 동시에 실행하고 결과를 합칩니다."""
+        accounts = self.resolve_kis_accounts(signal.account)
+        if not accounts:
+            error_msg = f"No KIS accounts matched: {signal.account}"
+            if notify:
+                self.discord_webhook.send_error_alert("Unsupported Exchange", error_msg)
+            return OrderResult.failed(error_msg)
+            
+        logging.info(f"Fanning out {signal.action} {signal.ticker} to {len(accounts)} KIS accounts")
+        
+        legs = [signal.replace(account=account) for account in accounts]
+        results, elapsed_ms = self._run_legs(legs, self._process_fanout_leg, "KIS fan-out")
+        
+        succeeded = sum(1 for result in results if result.success)
+        summary = {
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "accounts": [
+                {
+                    "account": leg.account,
+                    "success": result.success,
+                    "order_id": result.order_id,
+                    "error": result.error
+                }
+                for leg, result in zip(legs, results)
+            ]
+        }
+        
+        # 계좌별 알림 대신 요약 한 번만 전송
+        if notify:
+            lines = [f"{'✅' if result.success else '❌'} {leg.account.upper()} "
+                     f"{(result.order_id if result.success else result.error) or ''}"
+                     for leg, result in zip(legs, results)]
+            self.discord_webhook.send_message(
+                f"👥 **다계좌 주문 처리 완료**\n"
+                f"• 전략: {signal.strategy}\n"
+                f"• 종목: {signal.ticker} {signal.action.upper()} {signal.quantity}\n"
+                f"• 성공: {succeeded}/{len(results)}\n"
+                f"• 소요시간: {elapsed_ms:.0f}ms\n" + "\n".join(lines)[:1500]
+            )
+            
+        if succeeded == len(results):
+            order_ids = ",".join(result.order_id or "" for result in results)
+            return OrderResult(True, order_id=order_ids, raw=summary)
+        return OrderResult(False, error=f"{len(results) - succeeded}/{len(results)} KIS accounts failed",
+                           raw=summary)
+        
+    def _run_legs(self, legs: List[Signal], runner: Callable[[Signal], OrderResult],
+                  label: str) -> Tuple[List[OrderResult], float]:
+        """레그들을 동시에 실행하고 (결과 목록, 소요시간 ms)를 반환합니다."""
+        started = time.time()
+        futures = [self.fanout_executor.submit(runner, leg) for leg in legs]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(OrderResult.failed(f"{label} error: {str(e)}"))
+        return results, (time.time() - started) * 1000
+        
+    def _execute_routed(self, signal: Signal, notify: bool = True) -> OrderResult:
+        """exchange가 auto/split인 시그널을 스마트 라우터가 고른 거래소(들)에서 실행합니다."""
+        started = time.perf_counter()
+        canonical = canonical_symbol(signal.ticker)
+        if signal.action == "close":
+            # 원장에 포지션이 있는 후보 거래소 모두에서 청산
+            symbol = position_symbol(False, signal.ticker)
+            legs = [signal.replace(exchange=venue, ticker=venue_symbol(canonical, venue))
+                    for venue in self.smart_router.candidates(signal.exchange)
+                    if self.position_ledger.get(venue, symbol)]
+        else:
+            plan = self.smart_router.route(signal.exchange, signal.ticker, signal.action, signal.quantity,
+                                           signal.order_type)
+            legs = [signal.replace(exchange=venue, ticker=symbol, quantity=quantity)
+                    for venue, symbol, quantity in plan]
+        route_us = (time.perf_counter() - started) * 1e6
+        
+        if not legs:
+            error_msg = f"No venue available for {signal.ticker} ({signal.exchange})"
+            if notify:
+                self.discord_webhook.send_error_alert("Routing Failed", error_msg)
+            return OrderResult.failed(error_msg)
+            
+        logging.info(f"Routed {signal.action} {signal.quantity} {signal.ticker} in {route_us:.0f}us: "
+                     + ", ".join(f"{leg.exchange}={leg.quantity}" for leg in legs))
+        
+        if len(legs) == 1:
+            return self._process_routed_leg(legs[0], notify)
+            
+        results, elapsed_ms = self._run_legs(legs, self._process_routed_leg, "Routed order")
+        succeeded = sum(1 for result in results if result.success)
+        summary = {
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "route_us": round(route_us, 1),
+            "elapsed_ms": round(elapsed_ms, 1),
+            "venues": [
+                {
+                    "exchange": leg.exchange,
+                    "symbol": leg.ticker,
+                    "quantity": leg.quantity,
+                    "success": result.success,
+                    "order_id": result.order_id,
+                    "error": result.error
+                }
+                for leg, result in zip(legs, results)
+            ]
+        }
+        
+        if notify:
+            lines = [f"{'✅' if result.success else '❌'} {leg.exchange.upper()} {leg.quantity} "
+                     f"{(result.order_id if result.success else result.error) or ''}"
+                     for leg, result in zip(legs, results)]
+            self.discord_webhook.send_message(
+                f"🧭 **분할 라우팅 주문 처리 완료**\n"
+                f"• 전략: {signal.strategy}\n"
+                f"• 종목: {signal.ticker} {signal.action.upper()} {signal.quantity}\n"
+                f"• 성공: {succeeded}/{len(results)}\n"
+                f"• 소요시간: {elapsed_ms:.0f}ms\n" + "\n".join(lines)[:1500]
+            )
+            
+        if succeeded == len(results):
+            order_ids = ",".join(result.order_id or "" for result in results)
+            return OrderResult(True, order_id=order_ids, raw=summary)
+        return OrderResult(False, error=f"{len(results) - succeeded}/{len(results)} venues failed", raw=summary)
+        
+    def _process_routed_leg(self, signal: Signal, notify: bool = False) -> OrderResult:
+        """라우팅된 개별 거래소 주문을 실행합니다."""
+        if signal.action == "close":
+            return self._close_position(signal, notify)
+        if signal.algo:
+            return self._start_execution(signal.to_order(), signal.algo, notify)
+        return self._execute_trade(signal.to_order(), notify)
+        
+    def _process_fanout_leg(self, signal: Signal) -> OrderResult:
+        """다계좌 주문의 개별 계좌 주문을 실행합니다. (개별 디스코드 알림 없음)"""
+        if signal.action == "close":
+            return self._close_position(signal, notify=False)
+        if signal.algo:
+            return self._start_execution(signal.to_order(), signal.algo, notify=False)
+        return self._execute_kis_trade(signal.to_order())
+        
+    def _start_execution(self, order: Order, algo: AlgoSpec, notify: bool = True) -> OrderResult:
+        """부모 주문 전체를 리스크 검사한 뒤 TWAP/아이스버그 분할 집행을 시작합니다."""
+        if not order.is_kis and order.exchange not in SUPPORTED_EXCHANGES:
+            return OrderResult.failed(f"Unsupported exchange or account: {order.exchange}/{order.account}", order)
+            
+        # 주문 수 한도는 실제로 전송되는 자식 주문마다 확인
+        rejected = self._pre_trade_check(order, order.quantity, record=False)
+        if rejected:
+            return rejected
+            
+        parent = self.execution_scheduler.submit(order, algo)
+        if notify:
+            detail = (f"{algo.duration:g}초 동안 {algo.slices}회" if algo.kind == "twap"
+                      else f"노출 수량 {algo.display_quantity:g}, 간격 {algo.interval:g}초")
+            self.discord_webhook.send_message(
+                f"⏱️ **분할 집행 시작 ({algo.kind.upper()})**\n"
+                f"• 종목: {order.symbol} {order.side.upper()} {order.quantity}\n"
+                f"• 거래소/계좌: {order.venue}\n"
+                f"• 방식: {detail}\n"
+                f"• 집행 ID: {parent.parent_id}"
+            )
+        return OrderResult(True, order_id=parent.parent_id, raw=parent.to_dict(), order=order)
+        
+    def _on_execution_finished(self, parent: ParentOrder):
+        """분할 집행이 끝나면 결과 요약을 전송합니다."""
+        order = parent.order
+        self.discord_webhook.send_message(
+            f"{'✅' if parent.status == 'done' else '⚠️'} **분할 집행 종료 ({parent.algo.kind.upper()})**\n"
+            f"• 종목: {order.symbol} {order.side.upper()}\n"
+            f"• 체결: {parent.filled_quantity:g}/{order.quantity:g} (전송 {parent.sent_quantity:g}, {len(parent.children)}건)\n"
+            f"• 상태: {parent.status}" + (f"\n• 오류: {parent.error}" if parent.error else "")
+        )
+        
+    def get_execution(self, parent_id: str) -> Optional[Dict[str, Any]]:
+        """분할 집행 상태를 조회합니다."""
+        return self.execution_scheduler.get(parent_id)
+            
+    def _execute_trade(self, order: Order, notify: bool = True) -> OrderResult:
+        """거래를 실행합니다."""
+        try:
             # KIS 계좌 처리
-            if account.startswith("kis"):
-                result = self._execute_kis_trade(symbol, action, quantity, price, account, order_type)
+            if order.is_kis:
+                result = self._execute_kis_trade(order)
             
             # 거래소 처리
-            elif exchange in ["binance", "upbit", "bybit", "okx", "bitget"]:
-                result = self._execute_exchange_trade(symbol, action, quantity, price, exchange, order_type)
+            elif order.exchange in SUPPORTED_EXCHANGES:
+                result = self._execute_exchange_trade(order)
             
             else:
-                error_msg = f"Unsupported exchange or account: {exchange}/{account}"
-                self.discord_webhook.send_error_alert("Unsupported Exchange", error_msg)
-                return {"success": False, "error": error_msg}
+                error_msg = f"Unsupported exchange or account: {order.exchange}/{order.account}"
+                if notify:
+                    self.discord_webhook.send_error_alert("Unsupported Exchange", error_msg)
+                return OrderResult.failed(error_msg, order)
                 
             # 결과 처리
-            if result and result.get("success"):
-                self.discord_webhook.send_trading_alert(
-                    symbol, action.upper(), quantity, price, "success",
-                    f"주문이 성공적으로 실행되었습니다. 주문 ID: {result.get('order_id', 'N/A')}"
-                )
-                return result
-            else:
-                error_msg = result.get("error", "Unknown error") if result else "Trade execution failed"
-                self.discord_webhook.send_trading_alert(
-                    symbol, action.upper(), quantity, price, "failed", error_msg
-                )
-                return {"success": False, "error": error_msg}
+            if notify:
+                self.discord_webhook.send_order_alert(order, result)
+            return result
                 
         except Exception as e:
             error_msg = f"Trade execution error: {str(e)}"
             logging.error(error_msg)
-            self.discord_webhook.send_error_alert("Trade Execution Error", error_msg)
-            return {"success": False, "error": error_msg}
+            if notify:
+                self.discord_webhook.send_error_alert("Trade Execution Error", error_msg)
+            return OrderResult.failed(error_msg, order)
             
-    def _execute_kis_trade(self, symbol: str, action: str, quantity: float, 
-                          price: float, account: str, order_type: str) -> Dict[str, Any]:
+    def _execute_kis_trade(self, order: Order) -> OrderResult:
         """KIS 계좌에서 거래를 실행합니다."""
         try:
-            client = self.kis_clients.get(account)
+            client = self.kis_clients.get(order.account)
             if not client:
-                return {"success": False, "error": f"KIS client {account} not found"}
+                return OrderResult.failed(f"KIS client {order.account} not found", order)
+                
+            rejected = self._circuit_check(order)
+            if rejected:
+                return rejected
+                
+            order, violation = self.order_rules.normalize(order)
+            if violation:
+                return OrderResult.failed(f"Order rule violation: {violation}", order)
                 
             # 주식 주문 실행
-            if order_type == "market":
+            if order.order_type == "market":
                 order_type_code = "01"  # 시장가
-                price = 0
+                price_int = 0
             else:
                 order_type_code = "00"  # 지정가
+                price_int = int(order.price) if order.price > 0 else 0
                 
-            quantity_int = int(quantity)  # 주식은 정수 수량
-            price_int = int(price) if price > 0 else 0
+            quantity_int = int(order.quantity)  # 주식은 정수 수량
             
-            result = client.create_order(symbol, action, quantity_int, price_int, order_type_code)
+            rejected = self._pre_trade_check(order, quantity_int)
+            if rejected:
+                return rejected
+                
+            self.kis_pacer.wait(order.account)  # 계좌별 주문 간격 제한
+            started = time.perf_counter()
+            try:
+                result = client.create_order(order.symbol, order.side, quantity_int, price_int, order_type_code)
+            finally:
+                ORDER_LATENCY.labels(order.account).observe(time.perf_counter() - started)
+            ORDER_RESULTS.labels(order.account, "accepted" if result.get("rt_cd") == "0" else "rejected").inc()
             
             if result.get("rt_cd") == "0":  # 성공
-                return {
-                    "success": True,
-                    "order_id": result.get("KRX_FWDG_ORD_ORGNO", ""),
-                    "result": result
-                }
+                output = result.get("output") or {}
+                order_id = output.get("ODNO") or result.get("KRX_FWDG_ORD_ORGNO", "")
+                self._on_order_accepted(order, quantity_int, order_id)
+                return OrderResult(True, order_id=order_id, raw=result, order=order.replace(quantity=quantity_int))
             else:
-                return {
-                    "success": False,
-                    "error": result.get("msg1", "KIS order failed")
-                }
+                return OrderResult.failed(result.get("msg1", "KIS order failed"), order)
                 
         except Exception as e:
-            return {"success": False, "error": f"KIS trade error: {str(e)}"}
+            return OrderResult.failed(f"KIS trade error: {str(e)}", order)
             
-    def _execute_exchange_trade(self, symbol: str, action: str, quantity: float,
-                               price: float, exchange: str, order_type: str) -> Dict[str, Any]:
+    @staticmethod
+    def _exchange_order_error(result: Optional[Dict]) -> Optional[str]:
+        """
+        거래소 주문 응답이 실패이면 사유를, 접수되었으면 None을 반환합니다.
+        업비트는 거부를 {"error": {...}} 본문으로 돌려주므로 주문 ID가 있는 응답만 접수로 봅니다.
+        """
+        if not isinstance(result, dict):
+            return "Exchange order failed"
+        error = result.get("error")
+        if error:
+            if isinstance(error, dict):
+                return f"Exchange order rejected: {error.get('name', '')} {error.get('message', '')}".strip()
+            return f"Exchange order rejected: {error}"
+        if not (result.get("id") or result.get("uuid")):
+            return "Exchange order failed: no order id in response"
+        return None
+        
+    def _price_from_book(self, order: Order) -> Tuple[Order, float]:
+        """
+        시장가 주문의 기준 가격을 로컬 호가창의 예상 평균 체결가로 정합니다.
+        MARKET_ORDER_PROTECTION_BPS가 설정되어 있으면 예상 마지막 체결가에서 그만큼만 벗어나는 지정가로 바꿉니다.
+        (업비트 시장가 매수 수량은 원화 금액이므로 제외)
+        """
+        reference_price = self.risk_engine.reference_price(order)
+        if order.order_type != "market" or order.exchange.lower() == "upbit":
+            return order, reference_price
+        order_book = self.exchange_clients.get_order_book(order.exchange, order.symbol)
+        fill = order_book.fill_price(order.side, order.quantity) if order_book else None
+        if fill is None:
+            return order, reference_price
+        average, worst = fill
+        if self.market_order_protection_bps:
+            slippage = self.market_order_protection_bps / 10000
+            price = worst * (1 + slippage) if order.side == "buy" else worst * (1 - slippage)
+            return order.replace(order_type="limit", price=price), price
+        return order, average
+
+    def _execute_exchange_trade(self, order: Order) -> OrderResult:
         """거래소에서 거래를 실행합니다."""
         try:
-            client = self.exchange_clients.get_client(exchange)
+            client = self.exchange_clients.get_client(order.exchange)
             if not client:
-                return {"success": False, "error": f"Exchange client {exchange} not found"}
+                return OrderResult.failed(f"Exchange client {order.exchange} not found", order)
+                
+            rejected = self._circuit_check(order)
+            if rejected:
+                return rejected
+                
+            self.exchange_clients.watch_market(order.exchange, order.symbol)
+            order, reference_price = self._price_from_book(order)
+            order, violation = self.order_rules.normalize(order, reference_price)
+            if violation:
+                return OrderResult.failed(f"Order rule violation: {violation}", order)
+                
+            rejected = self._pre_trade_check(order, order.quantity, reference_price)
+            if rejected:
+                return rejected
                 
-            # 사이드 변환 (buy/sell)
-            side = action
-            
             # 주문 실행
-            result = self.exchange_clients.create_order(
-                exchange, symbol, side, quantity, price, order_type
-            )
+            started = time.perf_counter()
+            try:
+                result = self.exchange_clients.create_order(
+                    order.exchange, order.symbol, order.side, order.quantity, order.price, order.order_type
+                )
+            finally:
+                ORDER_LATENCY.labels(order.exchange).observe(time.perf_counter() - started)
+            error = self._exchange_order_error(result)
+            ORDER_RESULTS.labels(order.exchange, "rejected" if error else "accepted").inc()
             
-            if result:
-                return {
-                    "success": True,
-                    "order_id": result.get("id", ""),
-                    "result": result
-                }
-            else:
-                return {"success": False, "error": "Exchange order failed"}
+            if error:
+                return OrderResult(False, error=error, raw=result, order=order)
+            order_id = str(result.get("id") or result.get("uuid"))
+            self._on_order_accepted(order, order.quantity, order_id)
+            return OrderResult(True, order_id=order_id, raw=result, order=order)
                 
         except Exception as e:
-            return {"success": False, "error": f"Exchange trade error: {str(e)}"}
+            return OrderResult.failed(f"Exchange trade error: {str(e)}", order)
             
-    def _close_position(self, symbol: str, exchange: str, account: str, strategy: str) -> Dict[str, Any]:
-        """포지션을 청산합니다."""
+    def _close_position(self, signal: Signal, notify: bool = True) -> OrderResult:
+        """포지션 원장의 보유 수량으로 반대 주문을 내어 포지션을 청산합니다."""
         try:
-            # 현재 포지션 조회
-            if account.startswith("kis"):
-                balance_info = self._get_kis_balance(account)
-            else:
-                balance_info = self._get_exchange_balance(exchange)
+            is_kis = signal.account.startswith("kis")
+            venue = signal.account if is_kis else signal.exchange
+            symbol = position_symbol(is_kis, signal.ticker)
+            
+            # 아직 잔고로 보정되지 않은 계좌/거래소만 잔고를 조회
+            if not self.position_ledger.knows(venue):
+                balance_info = self._get_kis_balance(venue) if is_kis else self._get_exchange_balance(venue)
+                holdings = parse_holdings(is_kis, balance_info) if balance_info else None
+                if holdings is None:
+                    return OrderResult.failed("Failed to get balance information")
+                self.position_ledger.reconcile(venue, holdings, available=parse_holdings(is_kis, balance_info, True))
                 
-            if not balance_info:
-                return {"success": False, "error": "Failed to get balance information"}
+            position = self.position_ledger.get(venue, symbol)
+            if not position:
+                return OrderResult.failed(f"No open position for {signal.ticker} on {venue}")
                 
-            # 포지션이 있는 경우 청산 주문 실행
-            # 실제 구현에서는 보유 수량을 조회하여 전량 매도 주문을 실행
+            quantity = abs(position)
+            available = self.position_ledger.available(venue, symbol) if position > 0 else None
+            if available is not None and available < quantity:
+                # 보유 수량 중 미체결 주문에 묶인 부분은 매도할 수 없으므로 주문 가능 수량만 청산
+                if available <= 0:
+                    return OrderResult.failed(f"Position {position} {signal.ticker} on {venue} is locked by open orders")
+                quantity = available
+                
+            exit_order = Order(signal.ticker, "sell" if position > 0 else "buy", quantity,
+                               signal.price, signal.order_type, signal.exchange, signal.account, signal.strategy)
             
-            self.discord_webhook.send_message(
-                f"📤 **포지션 청산 시도**\n"
-                f"• 종목: {symbol}\n"
-                f"• 거래소/계좌: {exchange}/{account}\n"
-                f"• 전략: {strategy}"
-            )
+            if notify:
+                self.discord_webhook.send_message(
+                    f"📤 **포지션 청산**\n"
+                    f"• 종목: {signal.ticker}\n"
+                    f"• 수량: {exit_order.side.upper()} {exit_order.quantity}\n"
+                    f"• 거래소/계좌: {signal.exchange}/{signal.account}\n"
+                    f"• 전략: {signal.strategy}"
+                )
             
-            return {"success": True, "message": "Position close attempted"}
+            if signal.algo:
+                return self._start_execution(exit_order, signal.algo, notify)
+            return self._execute_trade(exit_order, notify)
             
         except Exception as e:
             error_msg = f"Position close error: {str(e)}"
             logging.error(error_msg)
-            return {"success": False, "error": error_msg}
+            return OrderResult.failed(error_msg)
+            
+    def _circuit_check(self, order: Order) -> Optional[OrderResult]:
+        """계좌/거래소 회로가 열려 있으면 주문을 보내지 않고 바로 실패(재시도 대기 시간 포함)를 반환합니다."""
+        retry_after = get_circuit_breaker(order.venue).blocked_for()
+        if not retry_after:
+            return None
+        return OrderResult.failed(f"Circuit open for {order.venue}, retry in {retry_after:.1f}s", order,
+                                  retry_after=retry_after)
+        
+    def _pre_trade_check(self, order: Order, quantity: float, price: float = None,
+                         record: bool = True) -> Optional[OrderResult]:
+        """리스크 한도를 확인합니다. 거부되면 실패 결과를, 통과하면 None을 반환합니다."""
+        reason = self.risk_engine.check(order, quantity, price, record)
+        if reason is None:
+            return None
+        RISK_REJECTIONS.labels(order.venue).inc()
+        logging.warning(f"Risk check rejected {order.side} {quantity} {order.symbol} on {order.venue}: {reason}")
+        return OrderResult.failed(f"Risk check rejected: {reason}", order)
+        
+    def _on_order_accepted(self, order: Order, quantity: float, order_id: str):
+        """시장가 주문은 바로 체결로 반영하고, 지정가 주문은 주문 추적기에 등록합니다."""
+        if order.order_type == "market":
+            self._record_fill(order, quantity)
+        else:
+            if order.side == "sell":
+                self.position_ledger.reserve(order.venue, position_symbol(order.is_kis, order.symbol), quantity)
+            self.order_tracker.track(order_id, order)
+            
+    def _record_fill(self, order: Order, quantity: float, price: float = None):
+        """체결 수량을 포지션 원장과 리스크 카운터에 반영합니다."""
+        self.position_ledger.apply_fill(order.venue, position_symbol(order.is_kis, order.symbol),
+                                        order.side, quantity, resting=order.order_type != "market")
+        self.risk_engine.record_fill(order, quantity, price)
+        
+    def _order_statuses(self, venue: str, orders: List[TrackedOrder]) -> Optional[Dict[str, OrderStatus]]:
+        """
+        추적 주문 상태를 계좌/거래소당 한 번의 조회로 가져옵니다.
+        KIS는 당일 주문체결 내역, 거래소는 미체결 목록을 조회하며 목록에서 사라진(체결/취소) 주문만 개별 조회합니다.
+        """
+        if venue.startswith("kis"):
+            client = self.kis_clients.get(venue)
+            result = client.get_daily_orders() if client else None
+            if not result or result.get("rt_cd") != "0":
+                return None
+            rows = {str(row.get("odno", "")).lstrip("0"): row for row in result.get("output1") or []}
+            return {tracked.order_id: parse_kis_order(rows[tracked.order_id.lstrip("0")])
+                    for tracked in orders if tracked.order_id.lstrip("0") in rows}
+            
+        symbols = {tracked.order.symbol for tracked in orders}
+        open_orders = self.exchange_clients.fetch_open_orders(venue, symbols.pop() if len(symbols) == 1 else None)
+        if not isinstance(open_orders, list):
+            return None
+        by_id = {str(raw.get("id") or raw.get("uuid")): raw for raw in open_orders}
+        statuses = {}
+        for tracked in orders:
+            raw = by_id.get(tracked.order_id)
+            if raw is None:
+                raw = self.exchange_clients.fetch_order(venue, tracked.order_id, tracked.order.symbol)
+            status = parse_order_status(raw)
+            if status is not None:
+                statuses[tracked.order_id] = status
+        return statuses
+        
+    def _on_order_update(self, tracked: TrackedOrder):
+        """추적 주문의 체결/상태 변화를 분할 집행 자식 주문에 반영합니다."""
+        self.execution_scheduler.on_child_update(tracked.order.venue, tracked.order_id,
+                                                 tracked.filled, tracked.status)
+        
+    def _on_order_done(self, tracked: TrackedOrder):
+        """추적 주문이 체결 완료되거나 취소되면 알림을 전송합니다."""
+        order = tracked.order
+        filled = tracked.status == "filled"
+        self.discord_webhook.send_message(
+            f"{'📗' if filled else '📕'} **지정가 주문 {'체결 완료' if filled else '취소'}**\n"
+            f"• 종목: {order.symbol} {order.side.upper()}\n"
+            f"• 체결: {tracked.filled:g}/{order.quantity:g}"
+            + (f" @ {tracked.average_price:g}" if tracked.average_price else "") + "\n"
+            f"• 거래소/계좌: {order.venue}\n"
+            f"• 주문번호: {tracked.order_id}"
+        )
+        
+    def get_open_orders(self) -> List[Dict[str, Any]]:
+        """추적 중인 미체결 주문 목록을 반환합니다."""
+        return self.order_tracker.open_orders()
+            
+    def _reconcile_positions(self, group: str, name: str, balance: Any, as_of: float):
+        """잔고 스냅샷으로 포지션 원장과 라우팅용 가용 잔고를 보정합니다."""
+        is_kis = group == "kis_accounts"
+        holdings = parse_holdings(is_kis, balance)
+        if holdings is not None:
+            self.position_ledger.reconcile(name, holdings, as_of, parse_holdings(is_kis, balance, True))
+        if group == "exchanges":
+            self.smart_router.update_balance(name, balance)
             
     def _get_kis_balance(self, account: str) -> Optional[Dict]:
         """KIS 계좌 잔고를 조회합니다."""
@@ -232,59 +784,39 @@ class TradingEngine:
             return None
             
     def get_portfolio_status(self) -> Dict[str, Any]:
-        """전체 포트폴리오 상태를 조회합니다."""
+        """전체 포트폴리오 상태를 조회합니다. (백그라운드에서 갱신된 스냅샷)"""
         try:
-            status = {
-                "timestamp": datetime.now().isoformat(),
-                "kis_accounts": {},
-                "exchanges": {},
-                "total_active_accounts": 0
-            }
-            
-            # KIS 계좌 상태
-            for account_name, client in self.kis_clients.items():
-                try:
-                    balance = client.get_balance()
-                    status["kis_accounts"][account_name] = {
-                        "status": "active",
-                        "balance_retrieved": balance is not None
-                    }
-                    status["total_active_accounts"] += 1
-                except Exception as e:
-                    status["kis_accounts"][account_name] = {
-                        "status": "error",
-                        "error": str(e)
-                    }
-                    
-            # 거래소 상태
-            for exchange in ["binance", "upbit", "bybit", "okx", "bitget"]:
-                client = self.exchange_clients.get_client(exchange)
-                if client:
-                    try:
-                        balance = self.exchange_clients.get_balance(exchange)
-                        status["exchanges"][exchange] = {
-                            "status": "active",
-                            "balance_retrieved": balance is not None
-                        }
-                        status["total_active_accounts"] += 1
-                    except Exception as e:
-                        status["exchanges"][exchange] = {
-                            "status": "error",
-                            "error": str(e)
-                        }
-                else:
-                    status["exchanges"][exchange] = {"status": "not_configured"}
-                    
+            if self.background_services:
+                status = self.portfolio_snapshot.get()
+            else:
+                status = self.portfolio_snapshot.refresh()  # 주기 조회 스레드 없이 요청 시에만 조회
+            if self.risk_engine.enabled:
+                status["risk"] = self.risk_engine.snapshot()
+            status["http_pools"] = self.exchange_clients.transport.stats()
+            status["circuit_breakers"] = circuit_status()
+            if self.exchange_clients.market_feed is not None:
+                status["market_feed"] = self.exchange_clients.market_feed.status()
             return status
-            
         except Exception as e:
             logging.error(f"Error getting portfolio status: {e}")
             return {"error": str(e)}
             
+    def _portfolio_balance_jobs(self) -> Dict[Tuple[str, str], Optional[Callable[[], Any]]]:
+        """스냅샷 갱신 시 조회할 계좌/거래소별 잔고 조회 함수를 만듭니다."""
+        jobs = {}
+        for account_name, client in list(self.kis_clients.items()):
+            jobs[("kis_accounts", account_name)] = client.get_balance
+        for exchange in SUPPORTED_EXCHANGES:
+            if self.exchange_clients.get_client(exchange):
+                jobs[("exchanges", exchange)] = functools.partial(self.exchange_clients.get_balance, exchange)
+            else:
+                jobs[("exchanges", exchange)] = None
+        return jobs
+        
     def send_daily_report(self):
         """일일 리포트를 전송합니다."""
         try:
-            status = self.get_portfolio_status()
+            status = self.portfolio_snapshot.refresh()
             
             report = f"""📊 **일일 트레이딩 리포트**
             
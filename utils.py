@@ -6,8 +6,6 @@ Utility functions for the Trading Bot
 import os
 import json
 import time
-import hmac
-import hashlib
 import secrets
 import logging
 from datetime import datetime, timedelta
@@ -15,6 +13,8 @@ from typing import Dict, List, Optional, Union, Any
 from decimal import Decimal, ROUND_DOWN
 import re
 
+from signal_decoder import SignalDecodeError, decode_signal, verify_signature
+
 def format_currency(amount: float, currency: str = "USD", decimals: int = 2) -> str:
     """통화 포맷팅"""
     if currency.upper() == "KRW":
@@ -76,24 +76,7 @@ def generate_webhook_secret() -> str:
 
 def verify_webhook_signature(payload: bytes, signature: str, secret: str) -> bool:
     """웹훅 시그니처 검증"""
-    if not signature or not secret:
-        return True
-    
-    try:
-        expected_signature = hmac.new(
-            secret.encode('utf-8'),
-            payload,
-            hashlib.sha256
-        ).hexdigest()
-        
-        # 시그니처 형식 처리
-        if signature.startswith('sha256='):
-            signature = signature[7:]
-        
-        return hmac.compare_digest(expected_signature, signature)
-    except Exception as e:
-        logging.error(f"Signature verification error: {e}")
-        return False
+    return verify_signature(payload, signature, secret)
 
 def sanitize_filename(filename: str) -> str:
     """파일명 안전화"""
@@ -268,38 +251,10 @@ def create_limit_order_message(symbol: str, side: str, quantity: float,
 
 def validate_order_data(order_data: Dict) -> tuple[bool, str]:
     """주문 데이터 유효성 검증"""
-    required_fields = ['ticker', 'action', 'quantity']
-    
-    # 필수 필드 확인
-    for field in required_fields:
-        if field not in order_data:
-            return False, f"Missing required field: {field}"
-        
-        if not order_data[field]:
-            return False, f"Empty required field: {field}"
-    
-    # 액션 유효성 확인
-    valid_actions = ['buy', 'sell', 'close']
-    if order_data['action'].lower() not in valid_actions:
-        return False, f"Invalid action: {order_data['action']}"
-    
-    # 수량 유효성 확인
     try:
-        quantity = float(order_data['quantity'])
-        if quantity <= 0:
-            return False, "Quantity must be positive"
-    except (ValueError, TypeError):
-        return False, "Invalid quantity format"
-    
-    # 가격 유효성 확인 (지정가인 경우)
-    if order_data.get('order_type', 'market').lower() == 'limit':
-        try:
-            price = float(order_data.get('price', 0))
-            if price <= 0:
-                return False, "Price must be positive for limit orders"
-        except (ValueError, TypeError):
-            return False, "Invalid price format"
-    
+        decode_signal(order_data)
+    except SignalDecodeError as e:
+        return False, str(e)
     return True, "Valid"
 
 def load_json_file(filepath: str, default: Any = None) -> Any: